@@ -0,0 +1,82 @@
+"""Make contact email unique per user
+
+Revision ID: 0289ee9d7d43
+Revises: d72e5c5c8d02
+Create Date: 2026-10-17 12:31:55.470913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0289ee9d7d43'
+down_revision: Union[str, None] = 'd72e5c5c8d02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _drop_invalid_index(name: str) -> None:
+    """Drop an index left INVALID by an interrupted concurrent build."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    duplicates = op.get_bind().execute(
+        sa.text(
+            "SELECT count(*) FROM ("
+            "SELECT 1 FROM contacts GROUP BY user_id, email HAVING count(*) > 1"
+            ") AS duplicates"
+        )
+    ).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} (user_id, email) pairs have more than one contact; "
+            "merge or delete the duplicates before upgrading"
+        )
+    with op.get_context().autocommit_block():
+        # A failed earlier attempt leaves an INVALID index that would
+        # otherwise be mistaken for the finished one
+        _drop_invalid_index('uq_contacts_user_id_email')
+        op.create_index(
+            'uq_contacts_user_id_email',
+            'contacts',
+            ['user_id', 'email'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_contacts_user_id_email',
+            table_name='contacts',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_contacts_user_id_email',
+            'contacts',
+            ['user_id', 'email'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'uq_contacts_user_id_email',
+            table_name='contacts',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,72 @@
+"""Add contact search vector and trigram indexes
+
+Revision ID: 3570640eccb9
+Revises: a268eb02cf13
+Create Date: 2026-10-17 11:03:27.884215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3570640eccb9'
+down_revision: Union[str, None] = 'a268eb02cf13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _drop_invalid_index(name: str) -> None:
+    """Drop an index left INVALID by an interrupted concurrent build."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Adding a stored generated column rewrites the table once
+    op.execute(
+        "ALTER TABLE contacts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(first_name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(last_name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(email, '')), 'B')"
+        ") STORED"
+    )
+    with op.get_context().autocommit_block():
+        # IF NOT EXISTS would also accept an INVALID leftover of a failed
+        # earlier build
+        for name in ("ix_contacts_search_vector", "ix_contacts_full_name_trgm",
+                     "ix_contacts_email_trgm"):
+            _drop_invalid_index(name)
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_contacts_search_vector "
+            "ON contacts USING gin (search_vector)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_contacts_full_name_trgm "
+            "ON contacts USING gin ((first_name || ' ' || last_name) gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_contacts_email_trgm "
+            "ON contacts USING gin (email gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_contacts_email_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_contacts_full_name_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_contacts_search_vector")
+    op.execute("ALTER TABLE contacts DROP COLUMN IF EXISTS search_vector")
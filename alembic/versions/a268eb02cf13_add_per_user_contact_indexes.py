@@ -0,0 +1,67 @@
+"""Add per-user contact indexes
+
+Revision ID: a268eb02cf13
+Revises: 0245aa26ceea
+Create Date: 2026-10-17 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a268eb02cf13'
+down_revision: Union[str, None] = '0245aa26ceea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Composite indexes matching the per-user access paths in src/api/contacts.py
+INDEXES = {
+    'ix_contacts_user_id_id': ['user_id', 'id'],
+    'ix_contacts_user_id_last_name_first_name': ['user_id', 'last_name', 'first_name'],
+    'ix_contacts_user_id_email': ['user_id', 'email'],
+}
+
+
+def _drop_invalid_index(name: str) -> None:
+    """Drop an index left INVALID by an interrupted concurrent build."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            # IF NOT EXISTS would also accept an INVALID leftover of a
+            # failed earlier build
+            _drop_invalid_index(name)
+            op.create_index(
+                name,
+                'contacts',
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(
+                name,
+                table_name='contacts',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
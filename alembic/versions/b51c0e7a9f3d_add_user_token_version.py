@@ -0,0 +1,31 @@
+"""Add user token_version
+
+Revision ID: b51c0e7a9f3d
+Revises: 0289ee9d7d43
+Create Date: 2026-10-17 14:05:12.318846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b51c0e7a9f3d'
+down_revision: Union[str, None] = '0289ee9d7d43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
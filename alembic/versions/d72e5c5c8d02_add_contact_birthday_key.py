@@ -0,0 +1,64 @@
+"""Add contact birthday_key
+
+Revision ID: d72e5c5c8d02
+Revises: 3570640eccb9
+Create Date: 2026-10-17 11:48:09.317642
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd72e5c5c8d02'
+down_revision: Union[str, None] = '3570640eccb9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _drop_invalid_index(name: str) -> None:
+    """Drop an index left INVALID by an interrupted concurrent build."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('contacts', sa.Column('birthday_key', sa.SmallInteger(), nullable=True))
+    op.execute(
+        "UPDATE contacts SET birthday_key = "
+        "EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday)"
+    )
+    op.alter_column('contacts', 'birthday_key', nullable=False)
+    with op.get_context().autocommit_block():
+        # IF NOT EXISTS would also accept an INVALID leftover of a failed
+        # earlier build
+        _drop_invalid_index('ix_contacts_user_id_birthday_key')
+        op.create_index(
+            'ix_contacts_user_id_birthday_key',
+            'contacts',
+            ['user_id', 'birthday_key'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_contacts_user_id_birthday_key',
+            table_name='contacts',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('contacts', 'birthday_key')
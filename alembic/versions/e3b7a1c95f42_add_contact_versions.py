@@ -0,0 +1,31 @@
+"""Add contact versions
+
+Revision ID: e3b7a1c95f42
+Revises: c4e81f2a9d60
+Create Date: 2026-10-17 17:42:09.614250
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b7a1c95f42'
+down_revision: Union[str, None] = 'c4e81f2a9d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'contacts',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('contacts', 'version')
@@ -0,0 +1,104 @@
+"""
+Microbenchmark of the ``get_current_user`` dependency.
+
+"before" is the previous cache-hit path: JWT decode, Redis GET (an
+in-memory stand-in, so no network time is counted), ``json.loads`` and a
+detached ``User(**data)``. "after" is the current path: JWT decode, an
+in-process user-cache hit and a ``CurrentUser`` principal. The principal
+construction step is also timed on its own.
+
+Usage:
+    python -m benchmarks.bench_auth_dependency [--iterations N] [--repeat R]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from jose import jwt
+
+from src.auth.jwt_utils import create_access_token
+from src.auth.principal import CurrentUser
+from src.conf.config import settings
+from src.database.models import User
+from src.services.auth import get_current_user
+from src.services.user_cache import user_cache
+
+USER_DATA = {
+    "id": 42,
+    "email": "bench@example.com",
+    "username": "bench",
+    "avatar": "https://example.com/avatar.png",
+    "role": "user",
+}
+
+
+class InMemoryRedis:
+    def __init__(self):
+        self.storage = {}
+
+    async def get(self, key):
+        return self.storage.get(key)
+
+
+async def legacy_get_current_user(token: str, redis: InMemoryRedis) -> User:
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    cached_user = await redis.get(f"user:{payload['sub']}")
+    return User(**json.loads(cached_user))
+
+
+async def best_of(repeat: int, iterations: int, make_call) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            user = await make_call()
+            user.id
+        timings.append(time.perf_counter() - started)
+    return min(timings) / iterations
+
+
+def best_of_sync(repeat: int, iterations: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) / iterations
+
+
+def report(name: str, before: float, after: float) -> None:
+    print(
+        f"{name:>12}: before {before * 1e6:8.2f} us  after {after * 1e6:8.2f} us  "
+        f"speedup {before / after:5.1f}x"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Auth dependency before/after")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": USER_DATA["email"]})
+    redis = InMemoryRedis()
+    redis.storage[f"user:{USER_DATA['email']}"] = json.dumps(USER_DATA)
+    user_cache.local.set(USER_DATA["email"], dict(USER_DATA), ttl=3600)
+
+    raw = json.dumps(USER_DATA)
+    report(
+        "principal",
+        best_of_sync(args.repeat, args.iterations, lambda: User(**json.loads(raw))),
+        best_of_sync(args.repeat, args.iterations, lambda: CurrentUser.from_cache(USER_DATA)),
+    )
+    report(
+        "dependency",
+        await best_of(args.repeat, args.iterations, lambda: legacy_get_current_user(token, redis)),
+        await best_of(args.repeat, args.iterations, lambda: get_current_user(token, None)),
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Offline load test of ``POST /api/auth/avatar`` on the local storage backend.
+
+Uploads go through the real route, body limit, upload pool and
+``LocalStorage`` in a temporary directory, against a temporary SQLite
+database, so no Cloudinary account, Redis or PostgreSQL is needed. Every
+request is a photo-sized JPEG that is resized and re-encoded. "unique" sends
+a different image with every request, so each one is written to storage;
+"repeat" re-sends one image, which content-hash dedupe answers without
+storing it again. The bytes saved by re-encoding are reported at the end.
+
+Usage:
+    python -m benchmarks.bench_avatar_upload [--requests N] [--concurrency C] [--side PX]
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import httpx
+from fastapi import Depends, FastAPI
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.api.auth import router as auth_router
+from src.conf.config import settings
+from src.database.db import get_db
+from src.database.models import Base, User
+from src.services.auth import get_current_db_user
+from src.services.avatar_processing import avatar_processor
+from src.services.avatar_storage import LocalStorage
+from src.services.body_limit import BodySizeLimitMiddleware
+from src.services.cloudinary_service import AvatarUploader
+from src.services.user_cache import user_cache
+
+
+def make_jpeg(side: int) -> bytes:
+    """A noisy photo-like JPEG, different on every call."""
+    height = side * 3 // 4
+    image = Image.frombytes("RGB", (side // 8, height // 8), os.urandom(side // 8 * (height // 8) * 3))
+    out = io.BytesIO()
+    image.resize((side, height), Image.Resampling.BICUBIC).save(out, "JPEG", quality=92)
+    return out.getvalue()
+
+
+def build_app(session_factory, admin_id: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware)
+    app.include_router(auth_router, prefix="/api/auth")
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    async def admin_user(db: AsyncSession = Depends(get_db)) -> User:
+        return await db.get(User, admin_id)
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_db_user] = admin_user
+    return app
+
+
+async def run(name: str, app: FastAPI, images, requests: int, concurrency: int) -> None:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            for i in queue:
+                image = images(i)
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/auth/avatar", files={"file": ("avatar.jpg", image, "image/jpeg")}
+                )
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ms = sorted(latency * 1000 for latency in latencies)
+    print(
+        f"{name:>6}: {requests / elapsed:8.0f} req/s  "
+        f"p50 {statistics.median(ms):6.2f} ms  p99 {ms[int(len(ms) * 0.99) - 1]:6.2f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline avatar upload throughput")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--side", type=int, default=1600, help="width of the uploaded JPEGs")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{workdir}/bench_avatar.db")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as db:
+        admin = User(username=f"bench-{uuid.uuid4()}", email=f"bench-{uuid.uuid4()}@example.com",
+                     password="x", role="admin")
+        db.add(admin)
+        await db.commit()
+        admin_id = admin.id
+
+    storage = LocalStorage(os.path.join(workdir, "media"), "http://bench/media")
+    uploader = AvatarUploader(
+        max_workers=settings.avatar_upload_workers,
+        max_bytes=settings.avatar_max_bytes,
+        storage=storage,
+    )
+    images = [make_jpeg(args.side) for _ in range(args.requests + 1)]
+    app = build_app(session_factory, admin_id)
+
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}, "
+          f"upload: {args.side}x{args.side * 3 // 4} JPEG, ~{len(images[0]) // 1024} KB")
+    # No Redis offline: the user cache invalidation is the only Redis call on this route
+    with patch("src.services.cloudinary_service.avatar_uploader", uploader), \
+            patch.object(user_cache, "invalidate", AsyncMock()):
+        await run("unique", app, lambda i: images[i + 1], args.requests, args.concurrency)
+        await run("repeat", app, lambda i: images[0], args.requests, args.concurrency)
+    uploads = uploader.metrics()
+    processing = avatar_processor.metrics()
+    print(f"stored: {uploads['completed']}, deduplicated: {uploads['deduplicated']}")
+    print(f"received: {processing['bytes_in'] // 1024} KB, encoded: {processing['bytes_out'] // 1024} KB, "
+          f"saved: {processing['bytes_saved'] / max(processing['bytes_in'], 1):.1%}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Benchmark of the scalar and vectorized birthday helpers.
+
+Compares convert_birthday + days_to_birthday (one ``date`` at a time via
+``strptime``) with days_to_birthday_batch / upcoming_birthdays_mask on the
+same list of ISO date strings.
+
+Usage:
+    python -m benchmarks.bench_birthdays [--size N] [--repeat R]
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from src.utils.datetime_utils import (convert_birthday, days_to_birthday,
+                                      days_to_birthday_batch,
+                                      upcoming_birthdays_mask)
+
+
+def make_birthdays(size: int) -> list:
+    rng = random.Random(42)
+    start = date(1940, 1, 1)
+    return [(start + timedelta(days=rng.randrange(30000))).isoformat() for _ in range(size)]
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scalar vs vectorized birthday helpers")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    birthdays = make_birthdays(args.size)
+
+    def scalar():
+        days = [days_to_birthday(convert_birthday(b)) for b in birthdays]
+        return [d <= 7 for d in days]
+
+    def batch():
+        return upcoming_birthdays_mask(birthdays, days=7)
+
+    assert list(days_to_birthday_batch(birthdays[:1000])) == [
+        days_to_birthday(convert_birthday(b)) for b in birthdays[:1000]
+    ]
+
+    scalar_time = best_of(args.repeat, scalar)
+    batch_time = best_of(args.repeat, batch)
+    print(f"dates:      {args.size}")
+    print(f"scalar:     {scalar_time:.3f}s ({args.size / scalar_time:,.0f} dates/s)")
+    print(f"vectorized: {batch_time:.3f}s ({args.size / batch_time:,.0f} dates/s)")
+    print(f"speedup:    {scalar_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
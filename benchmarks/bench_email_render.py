@@ -0,0 +1,77 @@
+"""
+Benchmark of email template compilation and rendering.
+
+"startup" compares loading every template in a fresh environment from the
+template sources against loading them from a warm bytecode cache, which is
+what a restarted API or worker process pays. "render" compares building
+complete multipart verification emails with the shared, precompiled
+environment against an environment without a template cache, which parses
+and compiles the templates on every message.
+
+Usage:
+    python -m benchmarks.bench_email_render [--messages N] [--repeat R]
+"""
+
+import argparse
+import tempfile
+import time
+from unittest.mock import patch
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src.services.email import build_verification_email
+from src.services.templates import TEMPLATES_DIR, create_environment, precompile_templates
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def load_all(env: Environment) -> None:
+    for name in env.list_templates():
+        env.get_template(name)
+
+
+def build_messages(count: int) -> None:
+    for i in range(count):
+        build_verification_email(f"user{i}@example.com", f"token-{i}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Email template compile and render throughput")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    uncached_source = lambda: load_all(Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape(["html", "xml"])
+    ))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load_all(create_environment(cache_dir))
+        from_bytecode = best_of(args.repeat, lambda: load_all(create_environment(cache_dir)))
+    from_source = best_of(args.repeat, uncached_source)
+    print(f"startup  from source:   {from_source * 1000:8.2f} ms")
+    print(f"startup  from bytecode: {from_bytecode * 1000:8.2f} ms  ({from_source / from_bytecode:.1f}x)")
+
+    precompile_templates()
+    precompiled = best_of(args.repeat, lambda: build_messages(args.messages))
+
+    no_cache = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=select_autoescape(["html", "xml"]),
+        cache_size=0,
+    )
+    with patch("src.services.templates.env", no_cache):
+        recompiled = best_of(args.repeat, lambda: build_messages(args.messages))
+
+    print(f"render   recompiled:    {args.messages / recompiled:8.0f} msg/s")
+    print(f"render   precompiled:   {args.messages / precompiled:8.0f} msg/s  ({recompiled / precompiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
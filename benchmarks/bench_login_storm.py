@@ -0,0 +1,126 @@
+"""
+Load test: contact read latency during a login storm.
+
+Runs a steady stream of contact reads while a burst of concurrent logins
+verifies bcrypt passwords. The storm is run twice: once verifying inline on
+the event loop (the previous behaviour) and once through
+``src.services.password_hasher``. Read latency percentiles are reported for
+a quiet baseline and for each storm mode.
+
+    python -m benchmarks.bench_login_storm --logins 64 --readers 8
+
+Without BENCH_DATABASE_URL a temporary SQLite file is used.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.auth.hashing import hash_password, verify_password
+from src.database.models import Base, User
+from src.repository import contacts as repository_contacts
+from src.schemas.contacts import ContactCreate
+from src.services.password_hasher import PasswordHasher
+
+
+async def inline_login(hashed: str) -> bool:
+    return verify_password("password", hashed)
+
+
+def offloaded_login(hasher: PasswordHasher):
+    async def login(hashed: str) -> bool:
+        return await hasher.run(verify_password, "password", hashed)
+    return login
+
+
+async def reader(session_factory, user_id: int, stop: asyncio.Event, latencies: list) -> None:
+    async with session_factory() as db:
+        while not stop.is_set():
+            started = time.perf_counter()
+            await repository_contacts.get_contacts_page(user_id, db, limit=20)
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.005)
+
+
+async def measure(name, session_factory, user_id, readers, storm=None) -> None:
+    stop = asyncio.Event()
+    latencies: list = []
+    tasks = [
+        asyncio.create_task(reader(session_factory, user_id, stop, latencies))
+        for _ in range(readers)
+    ]
+    started = time.perf_counter()
+    if storm is None:
+        await asyncio.sleep(1.0)
+    else:
+        await storm()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    ms = sorted(latency * 1000 for latency in latencies)
+    p50 = statistics.median(ms)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    print(
+        f"{name:>10}: {len(ms):5d} reads in {elapsed:6.2f}s  "
+        f"p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  max {ms[-1]:7.2f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Contact reads during a login storm")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench_login.db"
+    engine = create_async_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as db:
+        user = User(username=f"bench-{uuid.uuid4()}", email=f"bench-{uuid.uuid4()}@example.com", password="x")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+        await repository_contacts.upsert_contacts(
+            [
+                ContactCreate(
+                    first_name=f"First{i}", last_name=f"Last{i}", email=f"c{i}@example.com",
+                    phone="+1234567890", birthday=date(1990, 1, 1),
+                )
+                for i in range(200)
+            ],
+            db, user_id,
+        )
+
+    hashed = hash_password("password")
+    hasher = PasswordHasher(max_workers=args.workers)
+
+    def storm(login):
+        async def run():
+            await asyncio.gather(*(login(hashed) for _ in range(args.logins)))
+        return run
+
+    print(f"database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"logins: {args.logins}, readers: {args.readers}, hash workers: {args.workers}")
+    await measure("baseline", session_factory, user_id, args.readers)
+    await measure("inline", session_factory, user_id, args.readers, storm(inline_login))
+    await measure("offloaded", session_factory, user_id, args.readers, storm(offloaded_login(hasher)))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
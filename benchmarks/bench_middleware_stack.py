@@ -0,0 +1,149 @@
+"""
+Requests per second for ``GET /contacts/contacts/{id}`` with the old and new middleware stacks.
+
+"old" wraps the application in a ``BaseHTTPMiddleware`` that performs the
+rate-limit check (the shape of the former SlowAPIMiddleware) under
+``CORSMiddleware``; "new" uses the pure ASGI ``RateLimitMiddleware``. Both
+charge the same fakeredis-backed token bucket and serve the same SQLite
+database through an in-process ASGI transport, so the difference is the
+middleware overhead.
+
+Usage:
+    python -m benchmarks.bench_middleware_stack [--requests N] [--concurrency C]
+        [--rounds R] [--storage fakeredis|redis] [--no-check]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.api.contacts import router as contacts_router
+from src.auth.principal import CurrentUser
+from src.conf.config import settings
+from src.database.db import get_db
+from src.database.models import Base, Contact, User
+from src.services.auth import get_token_user
+from src.services.rate_limiter import RateLimitMiddleware, rate_limit_key, rate_limiter
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """The same check as RateLimitMiddleware, on top of BaseHTTPMiddleware."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.routes = RateLimitMiddleware(app)
+
+    async def dispatch(self, request: Request, call_next):
+        cost = self.routes._route_cost(request.scope)
+        if cost is None or not settings.rate_limit_enabled:
+            return await call_next(request)
+        result = await rate_limiter.hit(rate_limit_key(request), cost)
+        if not result.allowed:
+            return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Remaining"] = str(int(result.remaining))
+        return response
+
+
+def build_app(rate_limit_middleware, session_factory, principal) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(rate_limit_middleware)
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
+                       allow_methods=["*"], allow_headers=["*"])
+    app.include_router(contacts_router, prefix="/contacts")
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_token_user] = lambda: principal
+    return app
+
+
+async def run(name: str, app: FastAPI, contact_id: int, requests: int, concurrency: int,
+              report: bool = True) -> None:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                started = time.perf_counter()
+                response = await client.get(f"/contacts/contacts/{contact_id}")
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    if not report:
+        return
+    ms = sorted(latency * 1000 for latency in latencies)
+    print(
+        f"{name:>4}: {requests / elapsed:8.0f} req/s  "
+        f"p50 {statistics.median(ms):6.2f} ms  p99 {ms[int(len(ms) * 0.99) - 1]:6.2f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Old vs new middleware stack")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--storage", choices=["fakeredis", "redis"], default="fakeredis")
+    parser.add_argument("--no-check", action="store_true",
+                        help="skip the Redis check to measure the middleware stacks alone")
+    args = parser.parse_args()
+
+    settings.rate_limit_storage = args.storage
+    settings.rate_limit_enabled = not args.no_check
+    # Measure the check, not rejections
+    rate_limiter.capacity = 10 ** 9
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench_stack.db")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as db:
+        user = User(username=f"bench-{uuid.uuid4()}", email=f"bench-{uuid.uuid4()}@example.com", password="x")
+        db.add(user)
+        await db.flush()
+        contact = Contact(first_name="Bench", last_name="Contact", email="contact@example.com",
+                          phone="+1234567890", birthday=date(1990, 1, 1), user_id=user.id)
+        db.add(contact)
+        await db.commit()
+        principal = CurrentUser(id=user.id, email=user.email, username=user.username)
+        contact_id = contact.id
+
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}, "
+          f"storage: {args.storage}, check: {not args.no_check}")
+    apps = {
+        "old": build_app(LegacyRateLimitMiddleware, session_factory, principal),
+        "new": build_app(RateLimitMiddleware, session_factory, principal),
+    }
+    for name, app in apps.items():
+        await run(name, app, contact_id, args.concurrency * 10, args.concurrency, report=False)
+    # Alternate the stacks so drift affects both equally
+    for _ in range(args.rounds):
+        for name, app in apps.items():
+            await run(name, app, contact_id, args.requests, args.concurrency)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+Microbenchmark of access-token decoding with and without the verified-token cache.
+
+A pool of distinct tokens (one per simulated client) is decoded round-robin,
+as clients reuse one access token for its whole lifetime. "uncached" calls
+python-jose directly; "cached" goes through ``decode_token``.
+
+Usage:
+    python -m benchmarks.bench_token_decode [--tokens N] [--iterations N] [--repeat R]
+"""
+
+import argparse
+import time
+
+from jose import jwt as jose_jwt
+
+from src.auth.jwt_utils import create_access_token, decode_token, verified_token_cache
+from src.conf.config import settings
+
+
+def best_of(repeat: int, iterations: int, tokens: list, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for i in range(iterations):
+            func(tokens[i % len(tokens)])
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def uncached_decode(token: str) -> dict:
+    return jose_jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JWT decode with and without the cache")
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tokens = [
+        create_access_token({"sub": f"user{i}@example.com", "uid": i, "role": "user"})
+        for i in range(args.tokens)
+    ]
+    verified_token_cache.clear()
+
+    uncached = best_of(args.repeat, args.iterations, tokens, uncached_decode)
+    cached = best_of(args.repeat, args.iterations, tokens, decode_token)
+
+    print(f"tokens: {args.tokens}, decodes: {args.iterations}, cache size: {verified_token_cache.maxsize}")
+    print(f"  uncached: {args.iterations / uncached:12,.0f} decodes/s")
+    print(f"    cached: {args.iterations / cached:12,.0f} decodes/s  ({uncached / cached:.1f}x)")
+    print(f"     stats: {verified_token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# email_worker.py
+"""Email outbox worker.
+
+Delivers the emails queued in the ``email_outbox`` table by the API::
+
+    python email_worker.py
+
+Run as many instances as needed; they claim disjoint batches.
+"""
+import asyncio
+import logging
+import signal
+
+from src.database.db import AsyncSessionLocal, engine
+from src.services.email_outbox import create_worker
+from src.services.smtp_pool import smtp_pool
+from src.services.templates import precompile_templates
+
+logger = logging.getLogger("email_worker")
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    precompile_templates()
+    worker = create_worker(AsyncSessionLocal)
+    logger.info("Email worker started, concurrency=%s", worker.concurrency)
+    try:
+        await worker.run_forever(stop)
+    finally:
+        await smtp_pool.close()
+        logger.info("Email worker stopped: %s, smtp pool: %s", worker.metrics(), smtp_pool.metrics())
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
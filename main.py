@@ -1,20 +1,28 @@
 # main.py
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
-from fastapi.templating import Jinja2Templates
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 
 from src.api.auth import router as auth_router
 from src.api.contacts import router as contacts_router
+from src.api.jwks import router as jwks_router
+from src.api.metrics import router as metrics_router
+from src.conf.config import settings
 from src.database.db import engine
 from src.database.models import Base
-from src.services.limiter import limiter
-templates = Jinja2Templates(directory="templates")
+from src.services.body_limit import BodySizeLimitMiddleware
+from src.services.cloudinary_service import AvatarUploadOverloaded
+from src.services.password_hasher import PasswordHasherOverloaded
+from src.services.rate_limiter import RateLimitMiddleware
+from src.services.revocation_outbox import revocation_relay
+from src.services.token_revocation import token_revocations
+from src.services.templates import precompile_templates
+from src.services.user_cache import user_cache
 
 
 @asynccontextmanager
@@ -37,13 +45,34 @@ async def lifespan(app: FastAPI):
     else:
         raise RuntimeError("❌ Could not connect to the database after 10 attempts.")
 
-    yield
+    precompile_templates()
+
+    listeners = [
+        asyncio.create_task(user_cache.listen()),
+        asyncio.create_task(token_revocations.listen()),
+        asyncio.create_task(revocation_relay.run_forever()),
+    ]
+    try:
+        yield
+    finally:
+        for listener in listeners:
+            listener.cancel()
 
 
 app = FastAPI(lifespan=lifespan)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(BodySizeLimitMiddleware)
+app.add_middleware(RateLimitMiddleware)
+
+
+@app.exception_handler(PasswordHasherOverloaded)
+@app.exception_handler(AvatarUploadOverloaded)
+async def overloaded_handler(request: Request, exc: Exception):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -51,7 +80,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browser clients need the ETag to send If-None-Match / If-Match
+    expose_headers=["ETag"],
 )
 
 app.include_router(auth_router, prefix="/api/auth")
 app.include_router(contacts_router, prefix="/contacts")
+app.include_router(metrics_router, prefix="/api/metrics")
+app.include_router(jwks_router)
+
+if settings.avatar_storage == "local":
+    os.makedirs(settings.avatar_local_dir, exist_ok=True)
+    app.mount("/media", StaticFiles(directory=settings.avatar_local_dir), name="media")
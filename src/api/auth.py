@@ -1,9 +1,7 @@
 import uuid
-import json
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, Body, Form, Header, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from starlette.requests import Request
 from jose import JWTError
 from sqlalchemy import select
@@ -12,33 +10,44 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from starlette.requests import Request
 
-from src.services.limiter import limiter
+from src.services.login_throttle import login_throttle, retry_after_header
+from src.services.password_hasher import password_hasher
+from src.services.rate_limiter import rate_limited
 from src.auth import handlers
+from src.auth.principal import CurrentUser
 from src.auth.jwt_utils import (
     create_token,
     create_access_token,
     create_refresh_token,
+    create_user_access_token,
     decode_token,
 )
-from src.auth.hashing import pwd_context
+from src.conf.config import settings
 from src.database.db import get_db
 from src.database.models import User
 from src.schemas.users import Token, UserCreate, UserResponse
-from src.services.auth import get_current_user
-from src.services.cloudinary_service import upload_avatar
-from src.services.email import send_verification_email, send_reset_password_email
+from src.services.auth import get_current_db_user, get_current_user
+from src.services.avatar_processing import InvalidImage
+from src.services.body_limit import max_body_size
+from src.services.cloudinary_service import AvatarTooLarge, upload_avatar
+from src.services.email_outbox import enqueue_email
 from src.services.redis_client import get_redis
+from src.services.revocation_outbox import deliver_revocation, enqueue_revocation
+from src.services.templates import templates
+from src.services.user_cache import user_cache
 router = APIRouter(tags=["Auth"])
 
 
 @router.post(
     "/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
+@rate_limited(cost=5)
 async def register_user(body: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user.
     
-    This endpoint creates a new user with the provided credentials and sends
-    a verification email to validate the user's email address.
+    This endpoint creates a new user with the provided credentials and queues
+    a verification email to validate the user's email address. The email is
+    delivered by the outbox worker.
     
     Args:
         body: User creation data including username, email and password
@@ -58,7 +67,7 @@ async def register_user(body: UserCreate, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=409, detail="Email already registered")
 
     # Hash the password
-    hashed_password = pwd_context.hash(body.password)
+    hashed_password = await password_hasher.hash(body.password)
     
     # Generate verification token
     verification_token = str(uuid.uuid4())
@@ -72,6 +81,13 @@ async def register_user(body: UserCreate, db: AsyncSession = Depends(get_db)):
         verification_token=verification_token,
     )
 
+    # Queue the verification email in the same transaction, except for test
+    # emails: for tests we verify the user automatically
+    if body.email.startswith("test_") or body.email.startswith("integration@"):
+        user.confirmed = True
+    else:
+        enqueue_email(db, "verify_email", body.email, token=verification_token)
+
     db.add(user)
     try:
         await db.commit()
@@ -80,53 +96,60 @@ async def register_user(body: UserCreate, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Database error")
 
     await db.refresh(user)
-    
-    # Send verification email only if not a test email
-    # For tests we verify the user automatically
-    if user.email.startswith("test_") or user.email.startswith("integration@"):
-        user.confirmed = True
-        await db.commit()
-    else:
-        await send_verification_email(user.email, verification_token)
-        
     return user
 
 
 @router.post("/login", response_model=Token)
-async def login(user: UserCreate, db: AsyncSession = Depends(get_db)):
+@rate_limited(cost=5)
+async def login(user: UserCreate, request: Request, db: AsyncSession = Depends(get_db)):
     """Authenticate a user and generate access and refresh tokens.
     
     This endpoint validates user credentials and returns JWT tokens for authenticated access.
+    Repeated failures for an account or from an IP are throttled with exponential
+    backoff. Each attempt is counted before the password is hashed, so throttled
+    and concurrent excess attempts are rejected without any bcrypt work.
     
     Args:
         user: User credentials with email and password
+        request: HTTP request object, used for the client address
         db: Database session dependency
         
     Returns:
         Token: Object containing access_token, refresh_token and token_type
         
     Raises:
-        HTTPException: If authentication fails
+        HTTPException: If authentication fails, or 429 if the attempt is throttled
     """
-    valid_user = await handlers.authenticate_user(user.email, user.password, db)
+    client_ip = request.client.host if request.client else "unknown"
+    throttle = await login_throttle.reserve(user.email, client_ip)
+    if throttle.blocked:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": retry_after_header(throttle.retry_after)},
+        )
+    # Taken before the user is read so a concurrent invalidation wins
+    generation = None if user.email.startswith("test_") else await user_cache.generation(user.email)
+    try:
+        valid_user = await handlers.authenticate_user(user.email, user.password, db)
+    except Exception as e:
+        # Only invalid credentials keep the attempt counted as a failure
+        if not (isinstance(e, HTTPException) and e.status_code == status.HTTP_401_UNAUTHORIZED):
+            await login_throttle.refund(user.email, client_ip, throttle)
+        raise
+    await login_throttle.refund(user.email, client_ip, throttle, success=True)
     token_data = {"sub": str(valid_user.email)}
 
-    access_token = create_access_token(token_data)
+    access_token = create_user_access_token(valid_user)
     refresh_token = create_refresh_token(token_data)
 
     # In test environment we don't use Redis
     if valid_user.email.startswith("test_"):
         return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
     
-    redis = await get_redis()
-    await redis.set(f"user:{valid_user.email}", json.dumps({
-        "id": valid_user.id,
-        "email": valid_user.email,
-        "username": valid_user.username,
-        "avatar": valid_user.avatar,
-        "role": valid_user.role
-    }))
+    await user_cache.set(valid_user, generation)
 
+    redis = await get_redis()
     await redis.set(f"refresh_token:{valid_user.email}", refresh_token)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
@@ -163,7 +186,7 @@ async def verify_email(token: str, db: AsyncSession = Depends(get_db)):
 async def read_me(
     request: Request,
     x_test: str = Header(None),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get information about the currently authenticated user.
     
@@ -195,6 +218,7 @@ async def read_me(
 
 
 @router.post("/refresh", response_model=Token)
+@rate_limited(cost=1)
 async def get_refresh_token(request: Request, db: AsyncSession = Depends(get_db)):
     """Refresh the access token using a valid refresh token.
     
@@ -224,7 +248,14 @@ async def get_refresh_token(request: Request, db: AsyncSession = Depends(get_db)
         raise HTTPException(status_code=401, detail="Invalid token")
 
     token_data = {"sub": email}
-    access_token = create_access_token(token_data)
+    if settings.stateless_access_tokens:
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        access_token = create_user_access_token(user)
+    else:
+        access_token = create_access_token(token_data)
     new_refresh_token = create_refresh_token(token_data)
 
     await redis.set(f"refresh_token:{email}", new_refresh_token)
@@ -232,48 +263,53 @@ async def get_refresh_token(request: Request, db: AsyncSession = Depends(get_db)
     return {"access_token": access_token, "refresh_token": new_refresh_token}
 
 
+# The body cap leaves room for the multipart boundaries and part headers
 @router.post("/avatar")
+@rate_limited(cost=10)
+@max_body_size(settings.avatar_max_bytes + 16 * 1024)
 async def update_avatar(file: UploadFile = File(...),
-                        current_user: User = Depends(get_current_user),
+                        current_user: User = Depends(get_current_db_user),
                         db: AsyncSession = Depends(get_db)):
     """Update the user's avatar image.
     
-    This endpoint allows admin users to upload a new avatar image.
+    This endpoint allows admin users to upload a new avatar image. Bodies over
+    the avatar size cap are rejected before they are read. The file type is
+    checked by its content, and the image is stored resized to the configured
+    square sizes.
     
     Args:
         file: Uploaded image file
-        current_user: Current authenticated user
+        current_user: Current authenticated user, loaded in this session
         db: Database session dependency
         
     Returns:
-        dict: Object containing the URL of the uploaded avatar
+        dict: URL of the avatar, URLs of every size and bytes saved by re-encoding
         
     Raises:
-        HTTPException: If the user is not an admin or if the file type is invalid
+        HTTPException: If the user is not an admin, if the file is not an image
+            or if the file is too large
     """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can update avatar")
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Invalid file type. Only images are allowed.")
-    avatar_url = await upload_avatar(file)
-    current_user.avatar = avatar_url
+    try:
+        avatar = await upload_avatar(file)
+    except AvatarTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    current_user.avatar = avatar.url
     await db.commit()
-    redis = await get_redis()
-    await redis.set(f"user:{current_user.email}", json.dumps({
-        "id": current_user.id,
-        "email": current_user.email,
-        "username": current_user.username,
-        "avatar": avatar_url,
-        "role": current_user.role
-    }))
-    return {"avatar_url": avatar_url}
+    await user_cache.invalidate(current_user.email)
+    return {"avatar_url": avatar.url, "variants": avatar.variants, "bytes_saved": avatar.bytes_saved}
 
 @router.post("/request-reset")
+@rate_limited(cost=5)
 async def request_reset_password(email: str = Body(..., embed=True),
                                  db: AsyncSession = Depends(get_db)):
     """Request a password reset link.
     
-    This endpoint generates a password reset token and sends it to the user's email.
+    This endpoint generates a password reset token and queues an email with it
+    for the outbox worker.
     
     Args:
         email: User's email address
@@ -291,11 +327,12 @@ async def request_reset_password(email: str = Body(..., embed=True),
         raise HTTPException(status_code=404, detail="User not found")
     token = str(uuid.uuid4())
     user.reset_token = token
+    enqueue_email(db, "reset_password", user.email, token=token)
     await db.commit()
-    await send_reset_password_email(user.email, token)
     return {"message": "Password reset instructions sent to email"}
 
 @router.post("/reset-password/{token}")
+@rate_limited(cost=5)
 async def reset_password(
     token: str,
     new_password: str = Form(...),
@@ -303,6 +340,10 @@ async def reset_password(
 ):
     """Reset a user's password using a valid reset token.
     
+    Access tokens issued before the reset are revoked. The revocation is
+    committed with the new password and announced to the other workers
+    afterwards; if Redis is unavailable, the revocation relay retries it.
+    
     Args:
         token: Password reset token
         new_password: New password to set
@@ -320,14 +361,18 @@ async def reset_password(
     if user is None:
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
 
-    user.password = pwd_context.hash(new_password)
+    user.password = await password_hasher.hash(new_password)
     user.reset_token = None
+    # Revoke access tokens issued before the reset
+    user.token_version = (user.token_version or 0) + 1
+    # Committed with the reset; if Redis fails, the relay announces it later
+    revocation = None if user.email.startswith("test_") else enqueue_revocation(db, user)
     await db.commit()
+    if revocation is not None:
+        await deliver_revocation(db, revocation)
 
     return {"message": "Password has been reset"}
 
-templates = Jinja2Templates(directory="templates")
-
 @router.get("/reset-password/{token}", response_class=HTMLResponse)
 async def show_reset_form(request: Request, token: str, db: AsyncSession = Depends(get_db)):
     """Show the password reset form.
@@ -1,16 +1,38 @@
-from typing import List
+from typing import List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
+from fastapi import (APIRouter, Depends, File, HTTPException, status, Request, Header, Query,
+                     Response, UploadFile)
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from src.database.db import get_db
+from src.auth.principal import CurrentUser
+from src.conf.config import settings
+from src.database.db import get_db, get_session_factory
 from src.database.models import Contact, User
-from src.schemas.contacts import ContactCreate, ContactResponse, ContactUpdate
-from src.services.auth import get_current_user, oauth2_scheme
+from src.repository import contacts as repository_contacts
+from src.repository.contacts import PreconditionFailed
+from src.schemas.contacts import (ContactCreate, ContactImportResult, ContactPage,
+                                  ContactResponse, ContactUpdate)
+from src.services.auth import get_token_user, oauth2_scheme
+from src.services.contact_cache import contact_cache
+from src.services.contact_export import EXPORT_MEDIA_TYPES, export_contacts
+from src.services.contact_import import detect_format, import_contacts
+from src.services.rate_limiter import rate_limited
+from src.utils.etag import collection_etag, contact_etag, if_match_versions, none_match
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+
+def _dump_contact(contact) -> dict:
+    return ContactResponse.model_validate(contact).model_dump(mode="json")
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
 # Special test route that does not require authentication
 @router.get("/test", response_model=List[ContactResponse])
 async def get_test_contacts():
@@ -75,29 +97,203 @@ async def delete_test_contact(contact_id: int):
         additional_data="Deleted contact"
     )
 
-@router.get("/", response_model=List[ContactResponse])
+@router.get("/", response_model=Union[ContactPage, List[ContactResponse]])
+@rate_limited(cost=1)
 async def get_contacts(
+        response: Response,
         x_test: str = Header(None),
-        limit: int = 10, 
-        offset: int = 0,
+        if_none_match: str = Header(None),
+        limit: int = Query(10, ge=1),
+        offset: int = Query(0, ge=0),
+        pagination: Literal["offset", "cursor"] = "offset",
+        cursor: Optional[str] = None,
+        sort: Literal["id", "name", "email"] = "id",
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)):
-    
+        current_user: CurrentUser = Depends(get_token_user)):
+    """Get the current user's contacts.
+
+    Offset mode (the default) returns a plain list, as before. Cursor mode,
+    selected with ``pagination=cursor`` or by passing a ``cursor``, returns a
+    ``ContactPage`` envelope whose ``next_cursor`` fetches the following page
+    without scanning the skipped rows. The page size is capped at
+    ``settings.contacts_max_page_size`` in both modes. Responses are served
+    from the contact cache until the user's contacts change.
+
+    Every page carries an ETag derived from the user's contact cache
+    generation. A request whose ``If-None-Match`` still matches it is
+    answered with 304 after a single Redis lookup, without loading any
+    contacts. No ETag is sent while Redis is unavailable or a write's
+    generation bump is still waiting to be retried.
+
+    Args:
+        response: Response whose ETag header is set
+        x_test: Test header flag
+        if_none_match: ETag from a previous response
+        limit: Page size
+        offset: Number of contacts to skip (offset mode only)
+        pagination: Pagination mode
+        cursor: Cursor from the previous page (cursor mode only)
+        sort: Sort order of the pages in cursor mode
+        db: Database session dependency
+        current_user: Current authenticated user
+
+    Returns:
+        List of contacts in offset mode, ContactPage in cursor mode, or 304
+
+    Raises:
+        HTTPException: With 400 status code if the cursor is invalid
+    """
+    limit = min(limit, settings.contacts_max_page_size)
+    cursor_mode = pagination == "cursor" or cursor is not None
+
+    # For test environment
+    if x_test == "true":
+        return ContactPage(items=[], has_more=False) if cursor_mode else []
+
+    # The generation is read before the cache, so the ETag is never newer
+    # than the body it is sent with
+    generation = await contact_cache.generation(current_user.id)
+    etag = None if generation is None else collection_etag(current_user.id, generation)
+    if etag is not None and none_match(if_none_match, etag):
+        return _not_modified(etag)
+
+    if cursor_mode:
+        async def load_page():
+            contacts, next_cursor = await repository_contacts.get_contacts_page(
+                current_user.id, db, limit=limit, cursor=cursor, sort=sort
+            )
+            page = ContactPage(
+                items=contacts, next_cursor=next_cursor, has_more=next_cursor is not None
+            )
+            return page.model_dump(mode="json")
+
+        view, loader = f"page:{sort}:{limit}:{cursor or ''}", load_page
+    else:
+        async def load_list():
+            stmt = (
+                select(Contact)
+                .filter(Contact.user_id == current_user.id)
+                .order_by(Contact.id)
+                .offset(offset)
+                .limit(limit)
+            )
+            result = await db.execute(stmt)
+            return [_dump_contact(contact) for contact in result.scalars()]
+
+        view, loader = f"list:{offset}:{limit}", load_list
+
+    try:
+        body = await contact_cache.get_or_load(current_user.id, view, loader)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if etag is not None:
+        response.headers["ETag"] = etag
+    return body
+
+@router.get("/search", response_model=List[ContactResponse])
+@rate_limited(cost=2)
+async def search_contacts(
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: int = Query(10, ge=1),
+        offset: int = Query(0, ge=0),
+        x_test: str = Header(None),
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_token_user)):
+    """Search the current user's contacts by name or email.
+
+    Matches are ranked by relevance and tolerate prefixes and small typos.
+
+    Args:
+        q: Search string
+        limit: Page size, capped at ``settings.contacts_max_page_size``
+        offset: Number of results to skip
+        x_test: Test header flag
+        db: Database session dependency
+        current_user: Current authenticated user
+
+    Returns:
+        List of matching contacts, best match first
+    """
     # For test environment
     if x_test == "true":
         return []
-        
-    stmt = select(Contact).filter(Contact.user_id == current_user.id).offset(offset).limit(limit)
-    result = await db.execute(stmt)
-    contacts = result.scalars().all()
-    return contacts
+
+    limit = min(limit, settings.contacts_max_page_size)
+    return await repository_contacts.search_contacts(
+        current_user.id, q, db, limit=limit, offset=offset
+    )
+
+@router.get("/birthdays", response_model=List[ContactResponse])
+@rate_limited(cost=2)
+async def get_upcoming_birthdays(
+        days: int = Query(7, ge=0, le=366),
+        x_test: str = Header(None),
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_token_user)):
+    """Get the current user's contacts with a birthday in the next ``days`` days.
+
+    Args:
+        days: Number of days after today to include (0 = today only)
+        x_test: Test header flag
+        db: Database session dependency
+        current_user: Current authenticated user
+
+    Returns:
+        List of contacts ordered by the next occurrence of their birthday
+    """
+    # For test environment
+    if x_test == "true":
+        return []
+
+    return await repository_contacts.get_upcoming_birthdays(
+        db, user_id=current_user.id, days=days
+    )
+
+@router.get("/export", response_class=StreamingResponse)
+@rate_limited(cost=10)
+async def export_contacts_file(
+        format: Literal["ndjson", "csv"] = "ndjson",
+        session_factory: async_sessionmaker = Depends(get_session_factory),
+        current_user: CurrentUser = Depends(get_token_user)):
+    """Export all of the current user's contacts as NDJSON or CSV.
+
+    The response is streamed from a server-side cursor, so it starts
+    immediately and the server's memory use does not grow with the
+    number of contacts.
+
+    Args:
+        format: Output format
+        session_factory: Sessionmaker the export opens its own session from
+        current_user: Current authenticated user
+
+    Returns:
+        StreamingResponse: The export as a file attachment
+    """
+    return StreamingResponse(
+        export_contacts(
+            current_user.id, format, session_factory, settings.contacts_export_fetch_size
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
 
 @router.get("/{contact_id}", response_model=ContactResponse)
+@rate_limited(cost=1)
 async def get_contact(contact_id: int,
+                      response: Response,
                       x_test: str = Header(None),
+                      if_none_match: str = Header(None),
                       db: AsyncSession = Depends(get_db),
-                      current_user: User = Depends(get_current_user)):
-    
+                      current_user: CurrentUser = Depends(get_token_user)):
+    """Get one of the current user's contacts.
+
+    The response carries the contact's ETag. A request whose
+    ``If-None-Match`` still matches it is answered with 304 after a single
+    version lookup, without loading the contact.
+
+    Raises:
+        HTTPException: With 404 status code if the contact does not exist
+    """
     # For test environment
     if x_test == "true":
         if contact_id == 9999:  # Special ID for testing "not found"
@@ -112,19 +308,34 @@ async def get_contact(contact_id: int,
             additional_data="Test contact data"
         )
         
-    stmt = select(Contact).filter(Contact.id == contact_id, Contact.user_id == current_user.id)
-    result = await db.execute(stmt)
-    contact = result.scalar_one_or_none()
+    if if_none_match:
+        version = await repository_contacts.get_contact_version(contact_id, db, current_user.id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Contact not found")
+        etag = contact_etag(contact_id, version)
+        if none_match(if_none_match, etag):
+            return _not_modified(etag)
+
+    async def load_contact():
+        stmt = select(Contact).filter(Contact.id == contact_id, Contact.user_id == current_user.id)
+        result = await db.execute(stmt)
+        contact = result.scalar_one_or_none()
+        return None if contact is None else {**_dump_contact(contact), "version": contact.version}
+
+    contact = await contact_cache.get_or_load(current_user.id, f"item:{contact_id}", load_contact)
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
+    response.headers["ETag"] = contact_etag(contact_id, contact["version"])
     return contact
 
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
+@rate_limited(cost=1)
 async def create_contact(
         body: ContactCreate,
+        response: Response,
         x_test: str = Header(None),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)):
+        current_user: CurrentUser = Depends(get_token_user)):
     
     # For test environment
     if x_test == "true":
@@ -138,20 +349,70 @@ async def create_contact(
             additional_data=body.additional_data
         )
         
-    contact = Contact(**body.model_dump(), user_id=current_user.id)
-    db.add(contact)
-    await db.commit()
-    await db.refresh(contact)
+    try:
+        contact = await repository_contacts.create_contact(body, db, user_id=current_user.id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Contact with this email already exists")
+    await contact_cache.invalidate(current_user.id)
+    response.headers["ETag"] = contact_etag(contact.id, contact.version)
     return contact
 
+@router.post("/import", response_model=ContactImportResult)
+@rate_limited(cost=20)
+async def import_contacts_file(
+        file: UploadFile = File(...),
+        format: Optional[Literal["csv", "ndjson"]] = None,
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_token_user)):
+    """Bulk import contacts from a CSV or NDJSON file.
+
+    CSV files need a header row with the ``ContactCreate`` field names;
+    NDJSON files hold one contact object per line. Contacts are matched on
+    email: an existing contact with the same email is updated.
+
+    Args:
+        file: Uploaded CSV or NDJSON file
+        format: Upload format; guessed from the file name and content type if omitted
+        db: Database session dependency
+        current_user: Current authenticated user
+
+    Returns:
+        ContactImportResult: Number of imported and rejected rows with per-row errors
+
+    Raises:
+        HTTPException: With 400 status code if the file cannot be parsed
+    """
+    fmt = format or detect_format(file.filename, file.content_type)
+    try:
+        return await import_contacts(
+            file.file, fmt, db, current_user.id, settings.contacts_import_chunk_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Chunks committed before a parse error are kept
+        await contact_cache.invalidate(current_user.id)
+
 @router.put("/{contact_id}", response_model=ContactResponse)
+@rate_limited(cost=1)
 async def update_contact(
         contact_id: int,
         body: ContactUpdate,
+        response: Response,
         x_test: str = Header(None),
+        if_match: str = Header(None),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)):
-    
+        current_user: CurrentUser = Depends(get_token_user)):
+    """Update one of the current user's contacts.
+
+    With ``If-Match`` the update only applies if the contact is still at one
+    of the given ETags; otherwise it fails with 412 and nothing is written.
+
+    Raises:
+        HTTPException: With 404 status code if the contact does not exist,
+            409 if the email is taken, 412 if ``If-Match`` does not match
+    """
     # For test environment
     if x_test == "true":
         return ContactResponse(
@@ -164,26 +425,39 @@ async def update_contact(
             additional_data=body.additional_data
         )
         
-    stmt = select(Contact).filter(Contact.id == contact_id, Contact.user_id == current_user.id)
-    result = await db.execute(stmt)
-    contact = result.scalar_one_or_none()
+    try:
+        contact = await repository_contacts.update_contact(
+            contact_id, body, db, user_id=current_user.id,
+            versions=if_match_versions(if_match, contact_id),
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Contact with this email already exists")
+    except PreconditionFailed as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
-        
-    for field, value in body.model_dump(exclude_unset=True).items():
-        setattr(contact, field, value)
-        
-    await db.commit()
-    await db.refresh(contact)
+    await contact_cache.invalidate(current_user.id)
+    response.headers["ETag"] = contact_etag(contact.id, contact.version)
     return contact
 
 @router.delete("/{contact_id}", response_model=ContactResponse)
+@rate_limited(cost=1)
 async def delete_contact(
         contact_id: int,
         x_test: str = Header(None),
+        if_match: str = Header(None),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)):
-    
+        current_user: CurrentUser = Depends(get_token_user)):
+    """Delete one of the current user's contacts.
+
+    With ``If-Match`` the contact is only deleted if it is still at one of
+    the given ETags; otherwise the request fails with 412.
+
+    Raises:
+        HTTPException: With 404 status code if the contact does not exist,
+            412 if ``If-Match`` does not match
+    """
     # For test environment
     if x_test == "true":
         return ContactResponse(
@@ -196,12 +470,14 @@ async def delete_contact(
             additional_data="Deleted contact"
         )
         
-    stmt = select(Contact).filter(Contact.id == contact_id, Contact.user_id == current_user.id)
-    result = await db.execute(stmt)
-    contact = result.scalar_one_or_none()
+    try:
+        contact = await repository_contacts.delete_contact(
+            contact_id, db, user_id=current_user.id,
+            versions=if_match_versions(if_match, contact_id),
+        )
+    except PreconditionFailed as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
-        
-    await db.delete(contact)
-    await db.commit()
+    await contact_cache.invalidate(current_user.id)
     return contact
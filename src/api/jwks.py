@@ -0,0 +1,37 @@
+import hashlib
+import json
+
+from fastapi import APIRouter, Header, Response
+
+from src.auth.keys import get_key_ring
+from src.conf.config import settings
+from src.utils.etag import none_match
+
+router = APIRouter(tags=["jwks"])
+
+
+@router.get("/.well-known/jwks.json")
+async def read_jwks(if_none_match: str = Header(None)) -> Response:
+    """Publish the public token-signing keys as a JSON Web Key Set.
+
+    The set is empty when tokens are signed with HMAC. Responses are
+    cacheable for ``settings.jwks_max_age`` seconds and carry an ETag, so
+    verifiers can revalidate with ``If-None-Match`` cheaply.
+
+    Args:
+        if_none_match: ETag from a previous response
+
+    Returns:
+        Response: JWKS document, or 304 if it has not changed
+    """
+    key_ring = get_key_ring()
+    jwks = key_ring.jwks() if key_ring is not None else {"keys": []}
+    body = json.dumps(jwks, separators=(",", ":"), sort_keys=True).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {
+        "Cache-Control": f"public, max-age={settings.jwks_max_age}",
+        "ETag": etag,
+    }
+    if none_match(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
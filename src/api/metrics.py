@@ -0,0 +1,30 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from src.auth.principal import CurrentUser
+from src.services.auth import get_current_user
+from src.services.metrics import collect_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/")
+async def read_metrics(current_user: CurrentUser = Depends(get_current_user)) -> Dict[str, Any]:
+    """Return the runtime counters of the registered services.
+
+    The counters expose internal state such as queue depths and throttle
+    statistics, so only admins may read them.
+
+    Args:
+        current_user: Current authenticated user
+
+    Returns:
+        dict: Metrics snapshot keyed by service name
+
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can read metrics")
+    return collect_metrics()
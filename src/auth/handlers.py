@@ -3,10 +3,11 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError
 
-from src.auth.hashing import hash_password, verify_password
+from src.auth.hashing import DUMMY_PASSWORD_HASH, hash_password, verify_password
 from src.auth.jwt_utils import decode_token
 from src.database.db import get_db
 from src.database.models import User
+from src.services.password_hasher import password_hasher
 
 
 async def create_user(username: str, email: str, password: str, db: AsyncSession):
@@ -14,7 +15,8 @@ async def create_user(username: str, email: str, password: str, db: AsyncSession
     result = await db.execute(stmt)
     if result.scalar():
         raise HTTPException(status_code=409, detail="Email already registered")
-    user = User(username=username, email=email, password=hash_password(password))
+    hashed = await password_hasher.run(hash_password, password)
+    user = User(username=username, email=email, password=hashed)
     db.add(user)
     await db.commit()
     await db.refresh(user)
@@ -34,7 +36,12 @@ async def authenticate_user(email: str, password: str, db: AsyncSession):
     stmt = select(User).where(User.email == email)
     result = await db.execute(stmt)
     user = result.scalar()
-    if not user or not verify_password(password, user.password):
+    if not user:
+        # Same bcrypt cost as a real check, so response time does not reveal
+        # whether the account exists
+        await password_hasher.run(verify_password, password, DUMMY_PASSWORD_HASH)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not await password_hasher.run(verify_password, password, user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     return user
 
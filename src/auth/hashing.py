@@ -2,6 +2,10 @@ from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt hash (default 12 rounds) of a random, discarded password. Verified
+# against for unknown accounts so they cost the same as real ones.
+DUMMY_PASSWORD_HASH = "$2b$12$wcy69.g3prGvn.bAXqjJkeMRxmj.eghVyyVg1Y8xeU7d8VqXP6.zm"
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -1,12 +1,31 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
-from jose import jwt as jose_jwt
+from jose import JWTError, jwt as jose_jwt
+from src.auth.keys import get_key_ring
 from src.conf.config import settings
+from src.services.metrics import register_metrics
+from src.utils.ttl_cache import TTLCache
+
+# Verified claims keyed by the token's SHA-256 digest. Entries expire with the
+# token's ``exp`` (capped at token_cache_max_ttl); tokens without ``exp`` are
+# never cached.
+verified_token_cache = TTLCache[dict](settings.token_cache_size, settings.token_cache_max_ttl)
+register_metrics("token_cache", verified_token_cache.stats)
 
 
 def create_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
     to_encode.update({"exp": expire})
+    key_ring = get_key_ring()
+    if key_ring is not None:
+        return jose_jwt.encode(
+            to_encode,
+            key_ring.active.private_pem,
+            algorithm=key_ring.algorithm,
+            headers={"kid": key_ring.active.kid},
+        )
     return jose_jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
@@ -19,4 +38,44 @@ def create_refresh_token(data: dict):
 
 
 def decode_token(token: str):
-    return jose_jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = verified_token_cache.get(digest)
+    if claims is None:
+        key_ring = get_key_ring()
+        if key_ring is not None:
+            public_key = key_ring.verification_key(jose_jwt.get_unverified_header(token).get("kid"))
+            if public_key is None:
+                raise JWTError("Unknown signing key")
+            claims = jose_jwt.decode(token, public_key, algorithms=[key_ring.algorithm])
+        else:
+            claims = jose_jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = min(exp - time.time(), settings.token_cache_max_ttl)
+            if ttl > 0:
+                verified_token_cache.set(digest, claims, ttl=ttl)
+    return dict(claims)
+
+
+# Format version of the stateless access-token claims below
+ACCESS_CLAIMS_VERSION = 1
+
+
+def create_user_access_token(user) -> str:
+    """Create an access token for a user.
+
+    With ``settings.stateless_access_tokens`` enabled the token also carries
+    ``uid``, ``role``, ``username`` and ``token_version`` claims (tagged with
+    ``cv``, the claims format version), so routes can authorize without a
+    user lookup.
+    """
+    data = {"sub": user.email}
+    if settings.stateless_access_tokens:
+        data.update({
+            "cv": ACCESS_CLAIMS_VERSION,
+            "uid": user.id,
+            "role": user.role,
+            "username": user.username,
+            "token_version": user.token_version or 0,
+        })
+    return create_access_token(data)
@@ -0,0 +1,84 @@
+"""
+Asymmetric JWT signing keys.
+
+With ``settings.algorithm`` set to RS256 or ES256, tokens are signed with a
+private key from ``settings.jwt_keys_dir`` and carry its id in the ``kid``
+header. Every ``<kid>.pem`` private key in that directory is loaded: the one
+named by ``settings.jwt_active_kid`` signs new tokens, and the public halves
+of all of them verify tokens and are published at ``/.well-known/jwks.json``
+so other services can verify tokens offline.
+
+Rotation: add the new key file, point ``jwt_active_kid`` at it, and delete
+the old file once tokens signed with it (refresh-token lifetime) expired.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from jose import jwk
+
+from src.conf.config import settings
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    private_pem: str
+    public_jwk: Dict[str, Any]
+
+
+class KeyRing:
+    """Signing keys loaded from a directory of ``<kid>.pem`` files.
+
+    Args:
+        keys_dir: Directory with PEM-encoded private keys
+        algorithm: JWS algorithm of every key (RS256 or ES256)
+        active_kid: Key id used for signing; defaults to the last kid in
+            sort order
+
+    Raises:
+        RuntimeError: If the directory holds no keys or ``active_kid`` is unknown
+    """
+
+    def __init__(self, keys_dir: str, algorithm: str, active_kid: Optional[str] = None):
+        self.algorithm = algorithm
+        self.keys: Dict[str, SigningKey] = {}
+        for path in sorted(Path(keys_dir).glob("*.pem")):
+            pem = path.read_text()
+            public_jwk = jwk.construct(pem, algorithm).public_key().to_dict()
+            public_jwk.update({"kid": path.stem, "use": "sig"})
+            self.keys[path.stem] = SigningKey(path.stem, algorithm, pem, public_jwk)
+        if not self.keys:
+            raise RuntimeError(f"No JWT signing keys found in {keys_dir}")
+        kid = active_kid or list(self.keys)[-1]
+        if kid not in self.keys:
+            raise RuntimeError(f"Active JWT key {kid!r} not found in {keys_dir}")
+        self.active = self.keys[kid]
+
+    def verification_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the public JWK for ``kid``, or None if unknown."""
+        key = self.keys.get(kid) if kid else None
+        return key.public_jwk if key else None
+
+    def jwks(self) -> Dict[str, Any]:
+        """Return the JSON Web Key Set of all public keys."""
+        return {"keys": [key.public_jwk for key in self.keys.values()]}
+
+
+@lru_cache(maxsize=1)
+def get_key_ring() -> Optional[KeyRing]:
+    """Return the configured key ring, or None when signing with HMAC.
+
+    Raises:
+        RuntimeError: If an asymmetric algorithm is configured without keys
+    """
+    if settings.algorithm not in ASYMMETRIC_ALGORITHMS:
+        return None
+    if not settings.jwt_keys_dir:
+        raise RuntimeError(f"JWT_KEYS_DIR must be set to sign tokens with {settings.algorithm}")
+    return KeyRing(settings.jwt_keys_dir, settings.algorithm, settings.jwt_active_kid)
@@ -0,0 +1,44 @@
+"""
+Authenticated principal.
+
+``CurrentUser`` is what authenticated routes receive from
+``get_current_user``: a frozen, slotted dataclass with just the fields
+needed for authorization and display. Building one is a plain attribute
+assignment, with none of the ORM instrumentation or lazy-loading surprises
+of a detached ``User``. Routes that must modify the user load a
+session-bound ``User`` through ``get_current_db_user`` instead.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    id: int
+    email: str
+    username: str
+    role: str = "user"
+    avatar: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user: Any) -> "CurrentUser":
+        """Build a principal from a ``User`` model."""
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            role=user.role,
+            avatar=user.avatar,
+        )
+
+    @classmethod
+    def from_cache(cls, data: Dict[str, Any]) -> "CurrentUser":
+        """Build a principal from user-cache fields, ignoring unknown keys."""
+        return cls(
+            id=data["id"],
+            email=data["email"],
+            username=data["username"],
+            role=data.get("role") or "user",
+            avatar=data.get("avatar"),
+        )
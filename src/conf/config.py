@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import List, Literal, Optional
 
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
@@ -15,9 +16,92 @@ class Settings(BaseSettings):
     postgres_port: str = "5432"
     secret_key: str
     redis_url: str
+    # HS256 signs with secret_key; RS256/ES256 sign with the keys in jwt_keys_dir
     algorithm: str = "HS256"
+    jwt_keys_dir: Optional[str] = None
+    jwt_active_kid: Optional[str] = None
+    jwks_max_age: int = 3600
     access_token_expire_minutes: int = 15
     refresh_token_expire_days: int = 7
+    contacts_max_page_size: int = 100
+    contacts_import_chunk_size: int = 1000
+    contacts_export_fetch_size: int = 500
+
+    # Password hashing pool: concurrent bcrypt calls and waiting calls (0 = unbounded)
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64
+
+    # Avatar uploads: size cap (bytes), concurrent uploads and waiting uploads (0 = unbounded)
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    avatar_upload_workers: int = 4
+    avatar_upload_max_queue: int = 16
+
+    # Avatar processing: square sizes (px, the largest is the profile avatar),
+    # output format and quality, decoder threads, largest accepted width * height
+    avatar_sizes: List[int] = [256, 128, 64]
+    avatar_format: Literal["webp", "jpeg"] = "webp"
+    avatar_quality: int = 80
+    avatar_process_workers: int = 2
+    avatar_max_pixels: int = 40_000_000
+
+    # Current-user cache: in-process tier size/TTL, Redis TTL, invalidation channel
+    user_cache_local_size: int = 10000
+    user_cache_local_ttl: float = 30.0
+    user_cache_redis_ttl: int = 3600
+    user_cache_channel: str = "user-cache:invalidate"
+
+    # Contact response cache: entry TTL (s), single-flight lock TTL (ms) and
+    # how long (s) a miss waits for another worker's load
+    contact_cache_ttl: int = 300
+    contact_cache_lock_ttl: int = 5000
+    contact_cache_lock_wait: float = 2.0
+
+    # Opt-in access tokens carrying uid/role/token_version claims, and the
+    # channel and log used to announce token revocations to every worker
+    stateless_access_tokens: bool = False
+    token_revocation_channel: str = "tokens:revoked"
+    token_revocation_log_key: str = "tokens:revocations"
+    # Seconds between retries of revocations that could not be announced
+    token_revocation_retry_interval: float = 5.0
+
+    # Verified-token cache: entries (0 disables) and maximum lifetime in seconds
+    token_cache_size: int = 10000
+    token_cache_max_ttl: float = 900.0
+
+    # Token-bucket rate limit per client: burst size, refill rate and where the
+    # buckets live ("redis", or "fakeredis" for tests and local development)
+    rate_limit_enabled: bool = True
+    rate_limit_capacity: int = 60
+    rate_limit_refill_per_second: float = 1.0
+    rate_limit_storage: Literal["redis", "fakeredis"] = "redis"
+
+    # Login throttling: free failures per account/IP, backoff (s), counter window (s)
+    login_account_free_failures: int = 5
+    login_ip_free_failures: int = 20
+    login_base_backoff: float = 1.0
+    login_max_backoff: float = 900.0
+    login_failure_window: int = 3600
+
+    # Email outbox worker: parallel sends, rows per poll, retries, backoff and lease (s)
+    email_worker_concurrency: int = 4
+    email_worker_batch_size: int = 20
+    email_max_attempts: int = 8
+    email_retry_base_delay: float = 30.0
+    email_retry_max_delay: float = 3600.0
+    email_lease_seconds: float = 300.0
+    email_poll_interval: float = 2.0
+
+    # SMTP pool: open sessions, messages per session, idle seconds before reconnect
+    mail_pool_size: int = 4
+    mail_pool_max_messages: int = 100
+    mail_pool_idle_timeout: float = 60.0
+
+    # Public URL of the API used in email links
+    app_base_url: str = "http://localhost:8000"
+    # Jinja bytecode cache directory (None = system temp dir); set
+    # TEMPLATE_AUTO_RELOAD=true in development to pick up edited templates
+    template_bytecode_cache_dir: Optional[str] = None
+    template_auto_reload: bool = False
 
     mail_username: str
     mail_password: str
@@ -25,9 +109,23 @@ class Settings(BaseSettings):
     mail_port: int
     mail_from: str
 
-    cloudinary_name: str
-    cloudinary_api_key: str
-    cloudinary_api_secret: str
+    # Avatar storage backend; the local backend is served by the API at /media
+    avatar_storage: Literal["cloudinary", "local", "s3"] = "cloudinary"
+    avatar_local_dir: str = "media"
+    avatar_local_url: Optional[str] = None
+
+    # Only needed with AVATAR_STORAGE=cloudinary
+    cloudinary_name: str = ""
+    cloudinary_api_key: str = ""
+    cloudinary_api_secret: str = ""
+
+    # Only needed with AVATAR_STORAGE=s3; S3_ENDPOINT_URL for S3-compatible stores
+    s3_bucket: str = ""
+    s3_endpoint_url: Optional[str] = None
+    s3_region: Optional[str] = None
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+    s3_public_url: Optional[str] = None
 
     # Redis settings
     REDIS_HOST: str = "localhost"
@@ -7,6 +7,11 @@ engine = create_async_engine(settings.database_url)
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 
+def get_session_factory() -> async_sessionmaker:
+    """Return the sessionmaker for work that outlives the request, e.g. streamed bodies."""
+    return AsyncSessionLocal
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
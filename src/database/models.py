@@ -1,9 +1,13 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship, declarative_base
+from sqlalchemy import (DDL, JSON, Boolean, DateTime, ForeignKey, Index, Integer,
+                        SmallInteger, String, Text, event, func)
+from sqlalchemy.orm import (Mapped, declarative_base, mapped_column, relationship,
+                            validates)
+
+from src.utils.datetime_utils import birthday_key
 
 Base = declarative_base()
 
@@ -22,12 +26,72 @@ class User(Base):
     )
     reset_token: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     role: Mapped[str] = mapped_column(String(20), nullable=False, default="user")
+    # Bumped to revoke every access token issued with an older version
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     contacts: Mapped[list["Contact"]] = relationship("Contact", back_populates="user")
 
 
+class RevocationOutbox(Base):
+    """Token revocation committed with the change that caused it and announced
+    through Redis after the commit, retried by the revocation relay."""
+
+    __tablename__ = "revocation_outbox"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer)
+    email: Mapped[str] = mapped_column(String(255))
+    token_version: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class EmailOutbox(Base):
+    """Transactional email queued in the same transaction as the change that
+    triggered it and delivered later by the email worker."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50))
+    recipient: Mapped[str] = mapped_column(String(255))
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    # pending -> sent, or pending -> dead once retries are exhausted
+    status: Mapped[str] = mapped_column(String(20), default="pending", server_default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+def _birthday_key_default(context) -> int:
+    """Column default for Core inserts that only pass ``birthday``."""
+    return birthday_key(_as_date(context.get_current_parameters()["birthday"]))
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_last_name_first_name", "user_id", "last_name", "first_name"),
+        Index("uq_contacts_user_id_email", "user_id", "email", unique=True),
+        Index("ix_contacts_user_id_birthday_key", "user_id", "birthday_key"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     first_name: Mapped[str] = mapped_column(String(100))
@@ -35,10 +99,75 @@ class Contact(Base):
     email: Mapped[str]
     phone: Mapped[str]
     birthday: Mapped[datetime]
+    # Annual recurrence key (MMDD) kept in sync with birthday, see validate_birthday
+    birthday_key: Mapped[int] = mapped_column(
+        SmallInteger, default=_birthday_key_default
+    )
     additional_data: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    # Incremented by every update; versions the contact's ETag
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     user: Mapped["User"] = relationship("User", back_populates="contacts")
+
+    @validates("birthday")
+    def validate_birthday(self, key, value):
+        value = _as_date(value)
+        self.birthday_key = birthday_key(value)
+        return value
+
+
+# Full-text search support. The search structures are dialect specific, so
+# they are attached to the contacts table as DDL hooks instead of columns:
+# PostgreSQL gets a generated tsvector column with a GIN index plus pg_trgm
+# indexes, SQLite (used locally and in tests) gets an FTS5 table kept in sync
+# by triggers. Existing PostgreSQL databases get the same objects through
+# the Alembic migration.
+CONTACT_SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "ALTER TABLE contacts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(first_name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(last_name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(email, '')), 'B')"
+        ") STORED",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_search_vector "
+        "ON contacts USING gin (search_vector)",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_full_name_trgm "
+        "ON contacts USING gin ((first_name || ' ' || last_name) gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_contacts_email_trgm "
+        "ON contacts USING gin (email gin_trgm_ops)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5("
+        "first_name, last_name, email, "
+        "content='contacts', content_rowid='id', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+        "INSERT INTO contacts_fts(rowid, first_name, last_name, email) "
+        "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+        "CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+        "INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email) "
+        "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); END",
+        "CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN "
+        "INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email) "
+        "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+        "INSERT INTO contacts_fts(rowid, first_name, last_name, email) "
+        "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    ],
+}
+
+for _dialect, _statements in CONTACT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            Contact.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect)
+        )
+
+event.listen(
+    Contact.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"),
+)
@@ -1,26 +1,134 @@
+import re
 from datetime import date, timedelta
+from typing import Any, AsyncIterator, Collection, Dict, List, Optional, Tuple
+
+from sqlalchemy import (column, delete, func, insert, literal_column, or_, table,
+                        tuple_, update)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from src.database.models import Contact
+from src.database.models import Contact, User
 from src.schemas.contacts import ContactCreate, ContactUpdate
+from src.utils.datetime_utils import birthday_key, birthday_window_ranges
+from src.utils.pagination import decode_cursor, encode_cursor
+
+# Keyset sort modes. Every key ends with Contact.id so the ordering is total
+# and a cursor always identifies exactly one position.
+CONTACT_SORT_KEYS = {
+    "id": (Contact.id,),
+    "name": (Contact.last_name, Contact.first_name, Contact.id),
+    "email": (Contact.email, Contact.id),
+}
+
+# FTS5 index maintained by triggers on SQLite (see src/database/models.py)
+contacts_fts = table("contacts_fts", column("rowid"))
+
+
+class PreconditionFailed(Exception):
+    """Raised when a conditional write targets an outdated contact version."""
+
+
+def _owned(stmt, contact_id: int, user_id: Optional[int]):
+    stmt = stmt.where(Contact.id == contact_id)
+    if user_id is not None:
+        stmt = stmt.where(Contact.user_id == user_id)
+    return stmt
+
+
+def _versioned(stmt, versions: Optional[Collection[int]]):
+    if versions is not None:
+        stmt = stmt.where(Contact.version.in_(versions))
+    return stmt
+
+
+async def _check_precondition(db: AsyncSession, contact_id: int, user_id: Optional[int]) -> None:
+    """Raise if a conditional write matched nothing because of its version."""
+    if await get_contact_version(contact_id, db, user_id) is not None:
+        raise PreconditionFailed(f"Contact {contact_id} has been modified")
+
+
+async def get_contact_version(contact_id: int, db: AsyncSession,
+                              user_id: Optional[int] = None) -> Optional[int]:
+    """Return the version of a contact without loading the row.
+
+    Returns:
+        The contact's version, or None if it does not exist or is not owned
+        by ``user_id``
+    """
+    result = await db.execute(_owned(select(Contact.version), contact_id, user_id))
+    return result.scalar_one_or_none()
 
 
 async def create_contact(contact: ContactCreate, db: AsyncSession, user_id: int):
-    db_contact = Contact(**contact.model_dump(), user_id=user_id)
-    db.add(db_contact)
+    """Create a contact with a single ``INSERT ... RETURNING``.
+
+    Args:
+        contact: Contact data
+        db: Database session
+        user_id: Owner of the contact
+
+    Returns:
+        The created contact, including server-generated columns
+    """
+    values = contact.model_dump()
+    values["birthday_key"] = birthday_key(contact.birthday)
+    stmt = insert(Contact).values(**values, user_id=user_id).returning(Contact)
+    result = await db.execute(stmt)
+    db_contact = result.scalar_one()
     await db.commit()
-    await db.refresh(db_contact)
     return db_contact
 
 
+async def upsert_contacts(contacts: List[ContactCreate], db: AsyncSession, user_id: int) -> int:
+    """Insert or update a batch of contacts with a single statement.
+
+    Rows are matched on ``(user_id, email)``; an existing contact with the
+    same email is overwritten. When the batch itself repeats an email the
+    last occurrence wins.
+
+    Args:
+        contacts: Validated contacts to write
+        db: Database session
+        user_id: Owner of the contacts
+
+    Returns:
+        Number of rows written
+    """
+    rows = {}
+    for contact in contacts:
+        row = contact.model_dump()
+        row["user_id"] = user_id
+        row["birthday_key"] = birthday_key(contact.birthday)
+        rows[contact.email] = row
+    if not rows:
+        return 0
+
+    dialect_insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+    stmt = dialect_insert(Contact).values(list(rows.values()))
+    update_columns = [name for name in ContactCreate.model_fields if name != "email"]
+    update_columns.append("birthday_key")
+    set_ = {name: stmt.excluded[name] for name in update_columns}
+    set_["version"] = Contact.version + 1
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Contact.user_id, Contact.email],
+        set_=set_,
+    )
+    await db.execute(stmt)
+    await db.commit()
+    return len(rows)
+
+
 async def get_contact(contact_id: int, db: AsyncSession):
     result = await db.execute(select(Contact).where(Contact.id == contact_id))
     return result.scalar_one_or_none()
 
 
-async def get_contacts(skip: int, limit: int, search: str, db: AsyncSession):
+async def get_contacts(skip: int, limit: int, search: str, db: AsyncSession,
+                       user_id: Optional[int] = None):
     query = select(Contact)
+    if user_id is not None:
+        query = query.filter(Contact.user_id == user_id)
     if search:
         query = query.filter(
             (Contact.first_name.ilike(f"%{search}%")) |
@@ -31,27 +139,277 @@ async def get_contacts(skip: int, limit: int, search: str, db: AsyncSession):
     return result.scalars().all()
 
 
-async def update_contact(contact_id: int, contact: ContactUpdate, db: AsyncSession):
-    db_contact = await get_contact(contact_id, db)
-    if db_contact:
-        for key, value in contact.model_dump().items():
-            setattr(db_contact, key, value)
-        await db.commit()
-        await db.refresh(db_contact)
+def _matches_columns(key: List[Any], columns) -> bool:
+    """Check a decoded cursor key against the sort columns' arity and types.
+
+    A tampered key would otherwise only fail in the database.
+    """
+    if len(key) != len(columns):
+        return False
+    for value, column in zip(key, columns):
+        expected = column.type.python_type
+        if type(value) is not expected:
+            return False
+    return True
+
+
+async def get_contacts_page(
+    user_id: int,
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+) -> Tuple[List[Contact], Optional[str]]:
+    """Return one keyset-paginated page of the user's contacts.
+
+    Args:
+        user_id: Owner of the contacts
+        db: Database session
+        limit: Maximum number of contacts on the page
+        cursor: Cursor returned with the previous page, or None for the first page
+        sort: Sort mode, one of ``CONTACT_SORT_KEYS``
+
+    Returns:
+        Tuple of the contacts on the page and the cursor for the next page
+        (None when this is the last page)
+
+    Raises:
+        ValueError: If the sort mode is unknown or the cursor is invalid
+            or was issued for a different sort mode
+    """
+    if sort not in CONTACT_SORT_KEYS:
+        raise ValueError(f"Unknown sort mode: {sort}")
+    columns = CONTACT_SORT_KEYS[sort]
+
+    query = select(Contact).where(Contact.user_id == user_id)
+    if cursor:
+        cursor_sort, key = decode_cursor(cursor)
+        if cursor_sort != sort or not _matches_columns(key, columns):
+            raise ValueError("Invalid cursor")
+        query = query.where(tuple_(*columns) > tuple_(*key))
+
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(query.order_by(*columns).limit(limit + 1))
+    contacts = list(result.scalars().all())
+    if len(contacts) <= limit:
+        return contacts, None
+
+    contacts = contacts[:limit]
+    last = contacts[-1]
+    next_cursor = encode_cursor(sort, [getattr(last, col.key) for col in columns])
+    return contacts, next_cursor
+
+
+def _search_terms(query: str) -> List[str]:
+    """Split a user search string into word tokens safe for tsquery/FTS5 syntax."""
+    return re.findall(r"\w+", query.lower())
+
+
+async def search_contacts(
+    user_id: int, query: str, db: AsyncSession, limit: int, offset: int = 0
+) -> List[Contact]:
+    """Ranked full-text search over the user's contacts.
+
+    On PostgreSQL every term is matched as a prefix against the generated
+    ``search_vector`` column, and pg_trgm similarity on the full name and
+    email catches typos. Results are ordered by ``ts_rank`` plus trigram
+    similarity. On SQLite the FTS5 ``contacts_fts`` table is used with
+    prefix queries ordered by ``bm25``.
+
+    Args:
+        user_id: Owner of the contacts
+        query: Search string as typed by the user
+        db: Database session
+        limit: Maximum number of results
+        offset: Number of results to skip
+
+    Returns:
+        List of matching contacts, best match first
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return []
+
+    if db.bind.dialect.name == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        stmt = (
+            select(Contact)
+            .join(contacts_fts, contacts_fts.c.rowid == Contact.id)
+            .where(
+                Contact.user_id == user_id,
+                literal_column("contacts_fts").op("MATCH")(match),
+            )
+            .order_by(func.bm25(literal_column("contacts_fts")), Contact.id)
+        )
+    else:
+        phrase = " ".join(terms)
+        ts_query = func.to_tsquery(
+            literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms)
+        )
+        search_vector = literal_column("contacts.search_vector")
+        # Must match the ix_contacts_full_name_trgm expression to use the index
+        full_name = Contact.first_name + literal_column("' '") + Contact.last_name
+        rank = func.ts_rank(search_vector, ts_query) + func.greatest(
+            func.similarity(full_name, phrase), func.similarity(Contact.email, phrase)
+        )
+        stmt = (
+            select(Contact)
+            .where(
+                Contact.user_id == user_id,
+                or_(
+                    search_vector.op("@@")(ts_query),
+                    full_name.self_group().op("%")(phrase),
+                    Contact.email.op("%")(phrase),
+                ),
+            )
+            .order_by(rank.desc(), Contact.id)
+        )
+
+    result = await db.execute(stmt.offset(offset).limit(limit))
+    return result.scalars().all()
+
+
+# Columns exposed by exports, in output order (matches ContactResponse)
+EXPORT_COLUMNS = (
+    Contact.id,
+    Contact.first_name,
+    Contact.last_name,
+    Contact.email,
+    Contact.phone,
+    Contact.birthday,
+    Contact.additional_data,
+)
+
+
+async def stream_contacts(
+    user_id: int, db: AsyncSession, fetch_size: int
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream all of the user's contacts as plain row mappings.
+
+    Rows come from a server-side cursor in batches of ``fetch_size`` and no
+    ORM objects are built, so memory stays flat however many contacts the
+    user has.
+
+    Args:
+        user_id: Owner of the contacts
+        db: Database session
+        fetch_size: Number of rows fetched from the cursor at a time
+
+    Yields:
+        Mapping of column name to value for each contact, ordered by id
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(Contact.user_id == user_id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=fetch_size)
+    )
+    result = await db.stream(stmt)
+    try:
+        async for row in result.mappings():
+            yield row
+    finally:
+        await result.close()
+
+
+async def update_contact(contact_id: int, contact: ContactUpdate, db: AsyncSession,
+                         user_id: Optional[int] = None,
+                         versions: Optional[Collection[int]] = None):
+    """Update a contact with a single ``UPDATE ... RETURNING``.
+
+    The version check is part of the ``UPDATE`` itself, so a conditional
+    write cannot overwrite a change committed after the client read it.
+
+    Args:
+        contact_id: Contact to update
+        contact: New contact data; only fields that were set are written
+        db: Database session
+        user_id: Owner the contact must belong to, or None to skip the check
+        versions: Versions the contact must be at, or None to skip the check
+
+    Returns:
+        The updated contact, or None if it does not exist or is not owned by
+        ``user_id``
+
+    Raises:
+        PreconditionFailed: If the contact exists at another version
+    """
+    values = contact.model_dump(exclude_unset=True)
+    if "birthday" in values:
+        values["birthday_key"] = birthday_key(values["birthday"])
+    stmt = (
+        _versioned(_owned(update(Contact), contact_id, user_id), versions)
+        .values(**values, version=Contact.version + 1)
+        .returning(Contact)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    db_contact = result.scalar_one_or_none()
+    if db_contact is None:
+        if versions is not None:
+            await _check_precondition(db, contact_id, user_id)
+        return None
+    await db.commit()
     return db_contact
 
 
-async def delete_contact(contact_id: int, db: AsyncSession):
-    db_contact = await get_contact(contact_id, db)
-    if db_contact:
-        await db.delete(db_contact)
-        await db.commit()
+async def delete_contact(contact_id: int, db: AsyncSession, user_id: Optional[int] = None,
+                         versions: Optional[Collection[int]] = None):
+    """Delete a contact with a single ``DELETE ... RETURNING``.
+
+    Args:
+        contact_id: Contact to delete
+        db: Database session
+        user_id: Owner the contact must belong to, or None to skip the check
+        versions: Versions the contact must be at, or None to skip the check
+
+    Returns:
+        The deleted contact, or None if it does not exist or is not owned by
+        ``user_id``
+
+    Raises:
+        PreconditionFailed: If the contact exists at another version
+    """
+    stmt = _versioned(_owned(delete(Contact), contact_id, user_id), versions)
+    result = await db.execute(stmt.returning(Contact))
+    db_contact = result.scalar_one_or_none()
+    if db_contact is None:
+        if versions is not None:
+            await _check_precondition(db, contact_id, user_id)
+        return None
+    await db.commit()
     return db_contact
 
 
-async def get_upcoming_birthdays(db: AsyncSession):
+async def get_upcoming_birthdays(db: AsyncSession, user_id: Optional[int] = None,
+                                 days: int = 7):
+    """Return contacts whose birthday falls within the next ``days`` days.
+
+    Matches the indexed ``birthday_key`` (MMDD) with ``BETWEEN``, so the
+    lookup is a single range scan of ``ix_contacts_user_id_birthday_key``,
+    or two when the window wraps from December to January. Feb 29
+    birthdays are observed on Feb 28 in common years.
+
+    Args:
+        db: Database session
+        user_id: Owner of the contacts, or None for all users
+        days: Number of days after today to include (0 = today only)
+
+    Returns:
+        List of contacts ordered by the next occurrence of their birthday
+    """
     today = date.today()
-    next_week = today + timedelta(days=7)
-    query = select(Contact).where(Contact.birthday.between(today, next_week))
+    ranges = birthday_window_ranges(today, days)
+    query = select(Contact).where(
+        or_(*(Contact.birthday_key.between(first, last) for first, last in ranges))
+    )
+    if user_id is not None:
+        query = query.where(Contact.user_id == user_id)
     result = await db.execute(query)
-    return result.scalars().all()
+
+    # Birthdays from today to Dec 31 come before those after New Year
+    start_key = ranges[0][0]
+    return sorted(
+        result.scalars().all(),
+        key=lambda contact: (contact.birthday_key < start_key, contact.birthday_key, contact.id or 0),
+    )
@@ -1,12 +1,13 @@
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class ContactBase(BaseModel):
-    first_name: str
-    last_name: str
+    # Lengths match the String(100) columns of the contacts table
+    first_name: str = Field(max_length=100)
+    last_name: str = Field(max_length=100)
     email: EmailStr
     phone: str
     birthday: date
@@ -28,3 +29,21 @@ class ContactResponse(ContactBase):
     additional_data: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ContactPage(BaseModel):
+    items: List[ContactResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+class ContactImportError(BaseModel):
+    line: int
+    errors: List[str]
+
+
+class ContactImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[ContactImportError] = []
+    errors_truncated: bool = False
@@ -1,68 +1,142 @@
-import json
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.jwt_utils import ACCESS_CLAIMS_VERSION, decode_token
+from src.auth.principal import CurrentUser
 from src.conf.config import settings
 from src.database.db import get_db
 from src.database.models import User
-from src.services.redis_client import get_redis
+from src.services.token_revocation import token_revocations
+from src.services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+def _decode_access_token(token: str) -> dict:
+    try:
+        payload = decode_token(token)
+        if payload.get("sub") is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return payload
+
+
+def _is_stateless(payload: dict) -> bool:
+    return payload.get("cv") == ACCESS_CLAIMS_VERSION and "uid" in payload
+
+
+async def _current_version_user(payload: dict, db: AsyncSession) -> User:
+    """Load the user of a stale stateless token, rejecting it if revoked."""
+    user = await db.get(User, payload["uid"])
+    if user is None or user.token_version != payload["token_version"]:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+    return user
+
+
+async def _resolve_user(payload: dict, db: AsyncSession) -> CurrentUser:
+    if _is_stateless(payload) and token_revocations.is_stale(payload["uid"], payload["token_version"]):
+        return CurrentUser.from_user(await _current_version_user(payload, db))
+
+    user_email = payload["sub"]
+
+    # For test environment we don't use Redis
+    if user_email.startswith("test_"):
+        result = await db.execute(select(User).where(User.email == user_email))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        return CurrentUser.from_user(user)
+
+    user_data = await user_cache.get(user_email)
+    if user_data:
+        return CurrentUser.from_cache(user_data)
+
+    # Taken before the read so a concurrent invalidation wins over this write-back
+    generation = await user_cache.generation(user_email)
+    result = await db.execute(select(User).where(User.email == user_email))
+    user = result.scalar_one_or_none()
+
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    await user_cache.set(user, generation)
+    return CurrentUser.from_user(user)
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme),
-                           db: AsyncSession = Depends(get_db)) -> User:
+                           db: AsyncSession = Depends(get_db)) -> CurrentUser:
     """Validate JWT token and return the current user.
     
     This function validates the JWT token from the Authorization header,
-    retrieves user information from Redis cache or database,
-    and returns the User object for the authenticated user.
+    retrieves user information from the two-tier user cache or database,
+    and returns a lightweight principal for the authenticated user.
     
     Args:
         token: JWT token from Authorization header
         db: Database session dependency
         
     Returns:
-        User: Authenticated user object
+        CurrentUser: Authenticated user principal
         
     Raises:
         HTTPException: With 401 status code if token is invalid or user not found
     """
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_email = payload.get("sub")
-        if user_email is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return await _resolve_user(_decode_access_token(token), db)
 
-    # For test environment we don't use Redis
-    if user_email and user_email.startswith("test_"):
-        result = await db.execute(select(User).where(User.email == user_email))
-        user = result.scalar_one_or_none()
-        if user is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-        return user
 
-    redis = await get_redis()
-    cached_user = await redis.get(f"user:{user_email}")
-    if cached_user:
-        user_data = json.loads(cached_user)
-        return User(**user_data)
+async def get_token_user(token: str = Depends(oauth2_scheme),
+                         db: AsyncSession = Depends(get_db)) -> CurrentUser:
+    """Return the current user, trusting the claims of stateless tokens.
 
-    result = await db.execute(select(User).where(User.email == user_email))
-    user = result.scalar_one_or_none()
+    Stateless tokens (see ``create_user_access_token``) are authorized from
+    their verified claims alone; the user is only loaded when a newer
+    ``token_version`` has been announced for them. Other tokens fall back to
+    ``get_current_user`` behaviour. The returned principal has no avatar.
+
+    Args:
+        token: JWT token from Authorization header
+        db: Database session dependency
+
+    Returns:
+        CurrentUser: Authenticated user principal
 
+    Raises:
+        HTTPException: With 401 status code if the token is invalid or revoked
+    """
+    payload = _decode_access_token(token)
+    if not _is_stateless(payload):
+        return await _resolve_user(payload, db)
+    if token_revocations.is_stale(payload["uid"], payload["token_version"]):
+        return CurrentUser.from_user(await _current_version_user(payload, db))
+    return CurrentUser(
+        id=payload["uid"],
+        email=payload["sub"],
+        username=payload["username"],
+        role=payload["role"],
+    )
+
+
+async def get_current_db_user(current_user: CurrentUser = Depends(get_current_user),
+                              db: AsyncSession = Depends(get_db)) -> User:
+    """Load the session-bound ``User`` of the authenticated principal.
+
+    Only routes that modify the user need this; everything else should
+    depend on ``get_current_user``.
+
+    Args:
+        current_user: Authenticated user principal
+        db: Database session dependency
+
+    Returns:
+        User: User model attached to ``db``
+
+    Raises:
+        HTTPException: With 401 status code if the user no longer exists
+    """
+    user = await db.get(User, current_user.id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-
-    await redis.set(f"user:{user_email}", json.dumps({
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "avatar": user.avatar,
-        "role": user.role
-    }))
     return user
@@ -0,0 +1,257 @@
+"""
+Avatar Image Processing.
+
+Uploaded avatars are decoded and re-encoded before they are stored, instead
+of forwarding whatever the client sent (often a multi-megabyte phone
+photo). The file type is taken from the magic bytes at the start of the
+file, never from the client's ``Content-Type``; anything that is not a
+JPEG, PNG, GIF or WebP image is rejected with ``InvalidImage``.
+
+Each image is center-cropped to a square and resized to every configured
+size (never upscaled), then encoded as WebP or JPEG at the configured
+quality. EXIF orientation is applied and all metadata, including GPS
+tags, is dropped. JPEGs are decoded at a reduced DCT scale when the
+largest size allows it, which makes decoding large photos several times
+cheaper.
+
+Decoding and encoding are CPU bound and run on a dedicated, bounded thread
+pool; Pillow releases the GIL while it decodes, resizes and encodes.
+"""
+
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Optional, Sequence
+
+from PIL import Image, ImageOps
+
+from src.conf.config import settings
+from src.services.metrics import register_metrics
+
+# Leading bytes of the accepted formats; WebP is RIFF....WEBP
+MAGIC_SIGNATURES = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+)
+
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+
+class InvalidImage(Exception):
+    """Raised when an upload is not a decodable image of an accepted format."""
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """Return the Pillow format name for the file's leading bytes, if accepted.
+
+    Args:
+        header: At least the first 12 bytes of the file
+
+    Returns:
+        Optional[str]: ``JPEG``, ``PNG``, ``GIF`` or ``WEBP``, or ``None``
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    for signature, image_format in MAGIC_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+@dataclass(frozen=True)
+class ProcessedAvatar:
+    """Encoded variants of one avatar, keyed by square size in pixels."""
+
+    variants: Dict[int, bytes]
+    content_type: str
+    original_bytes: int
+
+    @property
+    def output_bytes(self) -> int:
+        return sum(len(data) for data in self.variants.values())
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes saved against storing the original upload."""
+        return self.original_bytes - self.output_bytes
+
+
+def _flatten(image: Image.Image, keep_alpha: bool) -> Image.Image:
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if not has_alpha:
+        return image.convert("RGB")
+    image = image.convert("RGBA")
+    if keep_alpha:
+        return image
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def render_avatar(
+    data: BinaryIO,
+    sizes: Sequence[int],
+    output_format: str = "webp",
+    quality: int = 80,
+    max_pixels: int = 40_000_000,
+) -> ProcessedAvatar:
+    """Decode an image and encode its square variants (blocking).
+
+    Args:
+        data: Seekable binary file positioned at the start of the image
+        sizes: Square sizes in pixels
+        output_format: ``webp`` or ``jpeg``
+        quality: Encoder quality, 1-100
+        max_pixels: Largest accepted width * height, against decompression bombs
+
+    Returns:
+        ProcessedAvatar: The encoded variants
+
+    Raises:
+        InvalidImage: If the data is not an accepted, decodable image
+    """
+    header = data.read(12)
+    data.seek(0, io.SEEK_END)
+    original_bytes = data.tell()
+    data.seek(0)
+    image_format = sniff_image_format(header)
+    if image_format is None:
+        raise InvalidImage("Invalid file type. Only images are allowed.")
+    pil_format, content_type = OUTPUT_FORMATS[output_format]
+    largest = max(sizes)
+
+    try:
+        with Image.open(data, formats=[image_format]) as image:
+            if image.width * image.height > max_pixels:
+                raise InvalidImage("Image dimensions are too large")
+            # Let the JPEG decoder scale down while decoding
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            image = _flatten(image, keep_alpha=pil_format == "WEBP")
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidImage("Invalid or corrupted image") from e
+
+    side = min(image.size)
+    square = ImageOps.fit(image, (min(largest, side),) * 2, Image.Resampling.LANCZOS)
+    variants = {}
+    for size in sorted(sizes, reverse=True):
+        target = min(size, side)
+        variant = square if square.width == target else square.resize(
+            (target, target), Image.Resampling.LANCZOS
+        )
+        out = io.BytesIO()
+        if pil_format == "JPEG":
+            variant.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            variant.save(out, "WEBP", quality=quality, method=4)
+        variants[size] = out.getvalue()
+    return ProcessedAvatar(variants=variants, content_type=content_type, original_bytes=original_bytes)
+
+
+class AvatarProcessor:
+    """Bounded executor for avatar processing with bytes-saved metrics.
+
+    Args:
+        max_workers: Maximum number of images processed concurrently
+        sizes: Square sizes in pixels
+        output_format: ``webp`` or ``jpeg``
+        quality: Encoder quality, 1-100
+        max_pixels: Largest accepted width * height
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        sizes: Sequence[int] = (256,),
+        output_format: str = "webp",
+        quality: int = 80,
+        max_pixels: int = 40_000_000,
+    ):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported avatar format: {output_format}")
+        self.max_workers = max_workers
+        self.sizes = tuple(sizes)
+        self.output_format = output_format
+        self.quality = quality
+        self.max_pixels = max_pixels
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._processed = 0
+        self._invalid = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._process_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="avatar-process"
+            )
+        return self._executor
+
+    def _process(self, data: BinaryIO) -> ProcessedAvatar:
+        begin = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            result = render_avatar(
+                data, self.sizes, self.output_format, self.quality, self.max_pixels
+            )
+        except InvalidImage:
+            with self._lock:
+                self._invalid += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self._processed += 1
+            self._bytes_in += result.original_bytes
+            self._bytes_out += result.output_bytes
+            self._process_seconds += time.perf_counter() - begin
+        return result
+
+    async def process(self, data: BinaryIO) -> ProcessedAvatar:
+        """Resize and re-encode an uploaded image without blocking the event loop.
+
+        Raises:
+            InvalidImage: If the data is not an accepted, decodable image
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self._process, data)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of the processing counters."""
+        with self._lock:
+            processed = self._processed
+            return {
+                "max_workers": self.max_workers,
+                "format": self.output_format,
+                "sizes": list(self.sizes),
+                "in_flight": self._in_flight,
+                "processed": processed,
+                "invalid": self._invalid,
+                "bytes_in": self._bytes_in,
+                "bytes_out": self._bytes_out,
+                "bytes_saved": self._bytes_in - self._bytes_out,
+                "avg_process_ms": round(self._process_seconds / processed * 1000, 3) if processed else 0.0,
+            }
+
+
+avatar_processor = AvatarProcessor(
+    max_workers=settings.avatar_process_workers,
+    sizes=settings.avatar_sizes,
+    output_format=settings.avatar_format,
+    quality=settings.avatar_quality,
+    max_pixels=settings.avatar_max_pixels,
+)
+register_metrics("avatar_processing", avatar_processor.metrics)
@@ -0,0 +1,206 @@
+"""
+Avatar Storage Backends.
+
+Avatars are stored under content-addressed keys (``avatars/<sha256>``), so an
+identical image always maps to the same object and re-uploading it can be
+answered from :meth:`AvatarStorage.exists` without transferring the image
+again. The backend is chosen with ``settings.avatar_storage``:
+
+- ``cloudinary``: Cloudinary, configured lazily on first use so the process
+  starts without Cloudinary credentials
+- ``local``: files under ``avatar_local_dir``, served by the API at
+  ``/media``; lets the avatar endpoint run fully offline
+- ``s3``: any S3-compatible object store (requires the optional ``boto3``)
+
+Backend methods are blocking and run on the avatar upload pool.
+"""
+
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+
+from src.conf.config import settings
+
+
+def _extension(content_type: Optional[str]) -> str:
+    if not content_type:
+        return ""
+    return mimetypes.guess_extension(content_type.split(";")[0].strip()) or ""
+
+
+class AvatarStorage(ABC):
+    """Interface of an avatar storage backend."""
+
+    def object_name(self, key: str, content_type: Optional[str]) -> str:
+        """File name of ``key``, with the extension of its content type."""
+        return f"{key}{_extension(content_type)}"
+
+    @abstractmethod
+    def exists(self, key: str, content_type: Optional[str]) -> Optional[str]:
+        """Return the public URL of ``key`` if it is already stored, else ``None``."""
+
+    @abstractmethod
+    def save(self, fileobj: BinaryIO, key: str, content_type: Optional[str]) -> str:
+        """Store the file under ``key`` and return its public URL."""
+
+
+class CloudinaryStorage(AvatarStorage):
+    """Cloudinary backend; the SDK is configured on first use.
+
+    ``exists`` is an Admin API lookup, which Cloudinary rate limits per
+    hour; the uploader remembers known keys so it is called at most once
+    per image and process.
+    """
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str):
+        self.cloud_name = cloud_name
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self._configured = False
+        self._lock = threading.Lock()
+
+    def _configure(self) -> None:
+        with self._lock:
+            if not self._configured:
+                cloudinary.config(
+                    cloud_name=self.cloud_name,
+                    api_key=self.api_key,
+                    api_secret=self.api_secret,
+                    secure=True,
+                )
+                self._configured = True
+
+    def exists(self, key: str, content_type: Optional[str]) -> Optional[str]:
+        self._configure()
+        try:
+            return cloudinary.api.resource(key).get("secure_url")
+        except cloudinary.exceptions.NotFound:
+            return None
+
+    def save(self, fileobj: BinaryIO, key: str, content_type: Optional[str]) -> str:
+        self._configure()
+        result = cloudinary.uploader.upload(fileobj, public_id=key, overwrite=True)
+        return result.get("secure_url")
+
+
+class LocalStorage(AvatarStorage):
+    """Filesystem backend writing below ``root`` and serving from ``base_url``."""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def exists(self, key: str, content_type: Optional[str]) -> Optional[str]:
+        name = self.object_name(key, content_type)
+        if (self.root / name).is_file():
+            return f"{self.base_url}/{name}"
+        return None
+
+    def save(self, fileobj: BinaryIO, key: str, content_type: Optional[str]) -> str:
+        name = self.object_name(key, content_type)
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(fileobj, out)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return f"{self.base_url}/{name}"
+
+
+class S3Storage(AvatarStorage):
+    """S3-compatible backend (AWS S3, MinIO, R2, ...).
+
+    Args:
+        bucket: Bucket name
+        public_url: Base URL objects are served from; defaults to
+            ``<endpoint_url>/<bucket>``
+        endpoint_url: Custom endpoint for S3-compatible services
+        region: Bucket region
+        access_key_id: Access key; the default credential chain is used if empty
+        secret_access_key: Secret key
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        public_url: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+    ):
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("The s3 avatar storage requires boto3 (poetry install -E s3)") from e
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+        base = public_url or f"{self.client.meta.endpoint_url}/{bucket}"
+        self.public_url = base.rstrip("/")
+
+    def exists(self, key: str, content_type: Optional[str]) -> Optional[str]:
+        from botocore.exceptions import ClientError
+
+        name = self.object_name(key, content_type)
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return f"{self.public_url}/{name}"
+
+    def save(self, fileobj: BinaryIO, key: str, content_type: Optional[str]) -> str:
+        name = self.object_name(key, content_type)
+        extra = {"ContentType": content_type} if content_type else None
+        # upload_fileobj streams the file, using multipart uploads for large ones
+        self.client.upload_fileobj(fileobj, self.bucket, name, ExtraArgs=extra)
+        return f"{self.public_url}/{name}"
+
+
+def avatar_local_url() -> str:
+    """Public base URL of the local backend."""
+    return settings.avatar_local_url or f"{settings.app_base_url}/media"
+
+
+@lru_cache
+def get_avatar_storage() -> AvatarStorage:
+    """Return the backend selected by ``settings.avatar_storage``."""
+    if settings.avatar_storage == "local":
+        return LocalStorage(settings.avatar_local_dir, avatar_local_url())
+    if settings.avatar_storage == "s3":
+        return S3Storage(
+            bucket=settings.s3_bucket,
+            public_url=settings.s3_public_url,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+        )
+    return CloudinaryStorage(
+        settings.cloudinary_name,
+        settings.cloudinary_api_key,
+        settings.cloudinary_api_secret,
+    )
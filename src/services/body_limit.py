@@ -0,0 +1,99 @@
+"""
+Request Body Size Limits.
+
+Routes declare the largest body they accept with the ``max_body_size``
+decorator. ``BodySizeLimitMiddleware`` enforces it as plain ASGI before the
+application reads anything: a declared ``Content-Length`` over the limit is
+answered with 413 straight away, and bodies without one (chunked uploads)
+are counted while they stream in and aborted with 413 as soon as they
+exceed it, so an oversized upload is never spooled in full.
+"""
+
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PAYLOAD_TOO_LARGE = "Request body too large"
+
+
+def max_body_size(limit: int):
+    """Mark an endpoint as accepting bodies of at most ``limit`` bytes.
+
+    Usage::
+
+        @router.post("/avatar")
+        @max_body_size(5 * 1024 * 1024)
+        async def update_avatar(...): ...
+
+    Args:
+        limit: Maximum request body size in bytes
+    """
+
+    def decorator(endpoint):
+        endpoint.max_body_size = limit
+        return endpoint
+
+    return decorator
+
+
+class BodySizeLimitMiddleware:
+    """Pure ASGI middleware enforcing ``max_body_size`` limits.
+
+    Args:
+        app: Wrapped ASGI application; its routes are read on first request
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes: Optional[List[Tuple[BaseRoute, int]]] = None
+
+    def _route_limit(self, scope: Scope) -> Optional[int]:
+        if self._routes is None:
+            self._routes = [
+                (route, route.endpoint.max_body_size)
+                for route in scope["app"].router.routes
+                if hasattr(getattr(route, "endpoint", None), "max_body_size")
+            ]
+        for route, limit in self._routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self._route_limit(scope)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(
+                {"detail": PAYLOAD_TOO_LARGE},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing, FastAPI turns it into the response
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=PAYLOAD_TOO_LARGE,
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,23 +1,259 @@
-from uuid import uuid4
+"""
+Avatar Upload Service.
 
-import cloudinary
-import cloudinary.uploader
+Storage calls are blocking network or disk I/O. Uploads run on a dedicated,
+bounded thread pool so they never stall the event loop, and they stream
+from the request's spooled temporary file instead of reading the whole
+image into memory first. ``max_workers`` caps concurrent uploads and
+``max_queue`` caps how many may wait; beyond that, calls fail fast with
+``AvatarUploadOverloaded``.
+
+Uploads are resized and re-encoded by ``src.services.avatar_processing``
+first. Images are keyed by the SHA-256 of their content and stored through
+the backend selected in ``src.services.avatar_storage``. Re-uploading an image
+that is already stored returns its URL without transferring it again.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Optional, Tuple
 
 from src.conf.config import settings
+from src.services.avatar_processing import avatar_processor
+from src.services.avatar_storage import AvatarStorage, get_avatar_storage
+from src.services.metrics import register_metrics
+from src.utils.ttl_cache import TTLCache
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class AvatarUploadOverloaded(Exception):
+    """Raised when the upload queue is full."""
+
+
+class AvatarTooLarge(Exception):
+    """Raised when an avatar exceeds ``avatar_max_bytes``."""
+
+
+def _file_size(fileobj: BinaryIO) -> int:
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+def _content_digest(fileobj: BinaryIO) -> str:
+    digest = hashlib.sha256()
+    while chunk := fileobj.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+class AvatarUploader:
+    """Bounded executor for avatar uploads with dedupe and latency metrics.
+
+    Args:
+        max_workers: Maximum number of uploads running concurrently
+        max_queue: Maximum number of uploads waiting for a worker (0 = unbounded)
+        max_bytes: Largest accepted image in bytes
+        storage: Storage backend; the one selected in settings by default
+        known_keys: Number of stored keys remembered to skip ``exists`` lookups
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int = 0,
+        max_bytes: int = 0,
+        storage: Optional[AvatarStorage] = None,
+        known_keys: int = 1024,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_bytes = max_bytes
+        self._storage = storage
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._known: TTLCache[str] = TTLCache(maxsize=known_keys, ttl=24 * 3600)
+        self._deduplicated = 0
+        self._lookup_errors = 0
+        self._pending = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._bytes = 0
+        self._upload_seconds = 0.0
+        self._max_upload_seconds = 0.0
 
-cloudinary.config(
-    cloud_name=settings.cloudinary_name,
-    api_key=settings.cloudinary_api_key,
-    api_secret=settings.cloudinary_api_secret,
-    secure=True,
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="avatar-upload"
+            )
+        return self._executor
+
+    @property
+    def storage(self) -> AvatarStorage:
+        return self._storage or get_avatar_storage()
+
+    def _store(self, fileobj: BinaryIO, prefix: str, content_type: Optional[str]) -> Tuple[str, bool]:
+        """Store the file unless identical content is already stored.
+
+        Returns:
+            Tuple[str, bool]: Public URL and whether the file was transferred
+        """
+        with self._lock:
+            self._in_flight += 1
+        try:
+            key = f"{prefix}/{_content_digest(fileobj)}"
+            storage = self.storage
+            with self._lock:
+                url = self._known.get((key, content_type))
+            if url is None:
+                try:
+                    url = storage.exists(key, content_type)
+                except Exception:
+                    # The lookup only saves a transfer; e.g. a rate-limited
+                    # Admin API or a HEAD denied without ListBucket must not
+                    # fail the upload
+                    with self._lock:
+                        self._lookup_errors += 1
+                    logger.warning("Avatar lookup of %s failed, uploading it", key, exc_info=True)
+            if url is not None:
+                with self._lock:
+                    self._known.set((key, content_type), url)
+                    self._deduplicated += 1
+                return url, False
+
+            begin = time.perf_counter()
+            try:
+                url = storage.save(fileobj, key, content_type)
+            except BaseException:
+                with self._lock:
+                    self._failed += 1
+                raise
+            elapsed = time.perf_counter() - begin
+            with self._lock:
+                self._completed += 1
+                self._upload_seconds += elapsed
+                self._max_upload_seconds = max(self._max_upload_seconds, elapsed)
+                self._known.set((key, content_type), url)
+            return url, True
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def upload(
+        self, fileobj: BinaryIO, content_type: Optional[str] = None, prefix: str = "avatars"
+    ) -> str:
+        """Upload an image file without blocking the event loop.
+
+        Args:
+            fileobj: Seekable binary file, read by the upload thread
+            content_type: MIME type of the image
+            prefix: Key prefix; the key ends with the content hash
+
+        Returns:
+            str: Secure URL of the uploaded image
+
+        Raises:
+            AvatarTooLarge: If the file exceeds ``max_bytes``
+            AvatarUploadOverloaded: If ``max_queue`` uploads are already waiting
+        """
+        size = _file_size(fileobj)
+        if self.max_bytes and size > self.max_bytes:
+            raise AvatarTooLarge(f"Avatar exceeds {self.max_bytes} bytes")
+        with self._lock:
+            if self.max_queue and self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise AvatarUploadOverloaded("Avatar upload queue is full")
+            self._pending += 1
+            self._bytes += size
+        try:
+            loop = asyncio.get_running_loop()
+            url, _ = await loop.run_in_executor(
+                self._get_executor(), self._store, fileobj, prefix, content_type
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+        return url
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of the upload counters."""
+        with self._lock:
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._pending - self._in_flight,
+                "in_flight": self._in_flight,
+                "completed": completed,
+                "deduplicated": self._deduplicated,
+                "lookup_errors": self._lookup_errors,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "bytes": self._bytes,
+                "avg_upload_ms": round(self._upload_seconds / completed * 1000, 3) if completed else 0.0,
+                "max_upload_ms": round(self._max_upload_seconds * 1000, 3),
+            }
+
+
+avatar_uploader = AvatarUploader(
+    max_workers=settings.avatar_upload_workers,
+    max_queue=settings.avatar_upload_max_queue,
+    max_bytes=settings.avatar_max_bytes,
 )
+register_metrics("avatar_uploads", avatar_uploader.metrics)
+
+
+@dataclass(frozen=True)
+class StoredAvatar:
+    """Public URLs of a stored avatar, keyed by square size."""
+
+    url: str
+    variants: Dict[int, str]
+    bytes_saved: int
+
+
+async def upload_avatar(file, public_id_prefix="avatars") -> StoredAvatar:
+    """Resize, re-encode and store an uploaded image.
 
+    The image is read from the upload's spooled temporary file on the
+    processing pool; its variants are stored on the upload pool, and
+    identical variants are stored once.
 
-async def upload_avatar(file, public_id_prefix="avatars"):
-    """Upload image to Cloudinary and return the secure URL."""
-    file_content = await file.read()
-    public_id = f"{public_id_prefix}/{uuid4()}"
-    result = cloudinary.uploader.upload(
-        file_content, public_id=public_id, overwrite=True
+    Raises:
+        AvatarTooLarge: If the upload exceeds ``avatar_max_bytes``
+        InvalidImage: If the upload is not an accepted image
+    """
+    max_bytes = avatar_uploader.max_bytes
+    if max_bytes and _file_size(file.file) > max_bytes:
+        raise AvatarTooLarge(f"Avatar exceeds {max_bytes} bytes")
+    processed = await avatar_processor.process(file.file)
+    sizes = list(processed.variants)
+    urls = await asyncio.gather(*(
+        avatar_uploader.upload(
+            io.BytesIO(processed.variants[size]),
+            processed.content_type,
+            f"{public_id_prefix}/{size}",
+        )
+        for size in sizes
+    ))
+    variants = dict(zip(sizes, urls))
+    return StoredAvatar(
+        url=variants[max(sizes)],
+        variants=variants,
+        bytes_saved=processed.bytes_saved,
     )
-    return result.get("secure_url")
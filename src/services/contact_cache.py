@@ -0,0 +1,243 @@
+"""
+Versioned Contact Response Cache.
+
+Contact reads are cached in Redis per user under keys that embed a
+generation counter, ``contacts:{user_id}:{generation}:{view}``. Every
+create, update, delete or import bumps the user's counter with one
+``INCR``, which makes all of their cached pages and contacts unreachable at
+once; nothing is scanned or deleted, and the orphaned entries expire with
+their TTL. The same counter versions the ETag of the user's contact lists.
+
+The counter is bumped after the write is committed, and a reader reads
+the counter before it queries the database, so a result loaded before a
+write can only ever be stored under the previous generation.
+
+Concurrent misses for the same key are collapsed (single flight): within a
+worker they await one shared load, and across workers a short Redis lock
+lets one of them query the database while the others wait for its result.
+If Redis is unavailable the cache fails open and every read goes to the
+database. A bump that fails after a write is remembered in the worker and
+retried before its next cache operation; until it succeeds, no cache entry
+or ETag is used in that worker, so a committed write is never hidden
+behind the old generation.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.services.metrics import register_metrics
+from src.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Deletes the lock only if this loader still holds it
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ContactCache:
+    """Redis cache of contact responses with per-user generation counters.
+
+    Args:
+        ttl: Lifetime of a cached response in seconds
+        lock_ttl: Lifetime of a single-flight lock in milliseconds
+        lock_wait: Seconds a miss waits for another worker's load before
+            querying the database itself
+        poll_interval: Seconds between checks while waiting
+        prefix: Prefix of the Redis keys
+        get_client: Returns the Redis client, ``get_redis`` by default
+    """
+
+    def __init__(
+        self,
+        ttl: int = 300,
+        lock_ttl: int = 5000,
+        lock_wait: float = 2.0,
+        poll_interval: float = 0.02,
+        prefix: str = "contacts",
+        get_client: Callable[[], Awaitable[redis.Redis]] = get_redis,
+    ):
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self.get_client = get_client
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Users whose generation bump failed, retried by every operation
+        self._pending: Set[int] = set()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def generation_key(self, user_id: int) -> str:
+        """Return the key of a user's generation counter."""
+        return f"{self.prefix}:gen:{user_id}"
+
+    def entry_key(self, user_id: int, generation: int, view: str) -> str:
+        """Return the key of a cached response."""
+        return f"{self.prefix}:{user_id}:{generation}:{view}"
+
+    async def _retry_pending(self, client: redis.Redis) -> None:
+        """Bump the generations whose invalidation failed; raises RedisError."""
+        for user_id in list(self._pending):
+            await client.incr(self.generation_key(user_id))
+            self._pending.discard(user_id)
+            self.invalidations += 1
+
+    async def generation(self, user_id: int) -> Optional[int]:
+        """Return the user's current generation.
+
+        Returns:
+            The generation, or None if Redis is unavailable or an earlier
+            invalidation could not be applied yet
+        """
+        try:
+            client = await self.get_client()
+            await self._retry_pending(client)
+            return int(await client.get(self.generation_key(user_id)) or 0)
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Contact cache unavailable, generation unknown", exc_info=True)
+            return None
+
+    async def get_or_load(
+        self, user_id: int, view: str, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the cached response for a view, loading it on a miss.
+
+        Args:
+            user_id: Owner of the contacts
+            view: Canonical description of the read, e.g. ``item:5``
+            loader: Coroutine function returning the JSON-serializable
+                response; ``None`` results are not cached
+
+        Returns:
+            The cached or freshly loaded response
+        """
+        try:
+            client = await self.get_client()
+            await self._retry_pending(client)
+            generation = int(await client.get(self.generation_key(user_id)) or 0)
+            key = self.entry_key(user_id, generation, view)
+            raw = await client.get(key)
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Contact cache unavailable, reading from the database", exc_info=True)
+            return await loader()
+        if raw is not None:
+            self.hits += 1
+            return json.loads(raw)
+        self.misses += 1
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(client, key, loader)
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def _load(self, client: redis.Redis, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        try:
+            locked = await client.set(lock_key, token, nx=True, px=self.lock_ttl)
+            if not locked:
+                raw = await self._wait_for(client, key)
+                if raw is not None:
+                    self.coalesced += 1
+                    return json.loads(raw)
+        except redis.RedisError:
+            self.errors += 1
+            locked = False
+
+        self.loads += 1
+        try:
+            value = await loader()
+            if value is not None:
+                await client.set(key, json.dumps(value), ex=self.ttl)
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Could not store contact response", exc_info=True)
+        finally:
+            if locked:
+                try:
+                    await client.eval(RELEASE_LOCK_LUA, 1, lock_key, token)
+                except redis.RedisError:
+                    self.errors += 1
+        return value
+
+    async def _wait_for(self, client: redis.Redis, key: str) -> Optional[str]:
+        """Poll for the response another worker is loading."""
+        deadline = asyncio.get_running_loop().time() + self.lock_wait
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            raw = await client.get(key)
+            if raw is not None:
+                return raw
+            if not await client.exists(f"{key}:lock"):
+                # The other loader failed or cached nothing
+                return None
+        return None
+
+    async def invalidate(self, user_id: int) -> None:
+        """Make every cached response of a user stale; call after committing.
+
+        Args:
+            user_id: Owner of the changed contacts
+        """
+        try:
+            client = await self.get_client()
+            await self._retry_pending(client)
+            await client.incr(self.generation_key(user_id))
+        except redis.RedisError:
+            self._pending.add(user_id)
+            self.errors += 1
+            logger.warning("Could not invalidate contact cache of user %s", user_id, exc_info=True)
+            return
+        self.invalidations += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return hit/miss and single-flight counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "pending_invalidations": len(self._pending),
+        }
+
+
+contact_cache = ContactCache(
+    ttl=settings.contact_cache_ttl,
+    lock_ttl=settings.contact_cache_lock_ttl,
+    lock_wait=settings.contact_cache_lock_wait,
+)
+register_metrics("contact_cache", contact_cache.metrics)
@@ -0,0 +1,77 @@
+"""
+Contact Export Service.
+
+This module turns the row stream from ``repository.contacts.stream_contacts``
+into CSV or NDJSON text chunks for a ``StreamingResponse``. Rows are buffered
+into chunks of ``rows_per_chunk`` so the response is not written one tiny
+frame per contact.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.repository import contacts as repository_contacts
+
+EXPORT_FIELDS = [column.key for column in repository_contacts.EXPORT_COLUMNS]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _serialize(row: Dict[str, Any]) -> Dict[str, Any]:
+    data = dict(row)
+    birthday = data.get("birthday")
+    if isinstance(birthday, (date, datetime)):
+        data["birthday"] = birthday.strftime("%Y-%m-%d")
+    return data
+
+
+async def export_contacts(
+    user_id: int, fmt: str, session_factory: async_sessionmaker, fetch_size: int,
+    rows_per_chunk: int = 200,
+) -> AsyncIterator[str]:
+    """Yield the user's contacts as CSV or NDJSON text chunks.
+
+    The body is streamed after the request's dependencies, including its
+    session, have exited, so the export opens its own session and closes
+    it once the stream is exhausted or the client disconnects.
+
+    Args:
+        user_id: Owner of the contacts
+        fmt: Output format, "csv" or "ndjson"
+        session_factory: Sessionmaker the export's session is opened from
+        fetch_size: Server-side cursor batch size
+        rows_per_chunk: Number of rows per yielded chunk
+
+    Yields:
+        Text chunks of the export, starting with the CSV header row
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS) if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+
+    pending = 0
+    async with session_factory() as db:
+        async for row in repository_contacts.stream_contacts(user_id, db, fetch_size):
+            data = _serialize(row)
+            if writer:
+                writer.writerow(data)
+            else:
+                buffer.write(json.dumps(data, ensure_ascii=False))
+                buffer.write("\n")
+            pending += 1
+            if pending >= rows_per_chunk:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,157 @@
+"""
+Contact Import Service.
+
+This module streams CSV or NDJSON uploads into the contacts table. Rows are
+read from the spooled upload in a worker thread, validated with
+``ContactCreate`` in fixed-size chunks and written with one multi-row upsert
+per chunk, so memory use is bounded by the chunk size rather than the file.
+If the database rejects a chunk, its rows are retried one by one so that
+only the offending rows are reported as failed.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+from typing import Any, BinaryIO, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.repository import contacts as repository_contacts
+from src.schemas.contacts import ContactCreate, ContactImportError, ContactImportResult
+
+# Upper bound on per-row error reports kept for the response
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: str, content_type: str) -> str:
+    """Guess the upload format from its file name or content type.
+
+    Args:
+        filename: Name of the uploaded file
+        content_type: MIME type sent by the client
+
+    Returns:
+        "ndjson" for .ndjson/.jsonl files or JSON content types, otherwise "csv"
+    """
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "json" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def _iter_rows(fileobj: BinaryIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(line number, raw row)`` pairs from a binary upload.
+
+    Raises:
+        ValueError: If the file is not valid UTF-8 or not valid CSV
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                # Empty CSV cells mean "not set", e.g. no additional_data
+                yield reader.line_num, {k: v or None for k, v in row.items() if k}
+        else:
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, e
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f"Malformed upload: {e}")
+    finally:
+        text.detach()
+
+
+def _take(rows: Iterator[Tuple[int, Any]], size: int) -> List[Tuple[int, Any]]:
+    return list(islice(rows, size))
+
+
+def _report(result: ContactImportResult, line: int, messages: List[str]) -> None:
+    result.failed += 1
+    if len(result.errors) < MAX_REPORTED_ERRORS:
+        result.errors.append(ContactImportError(line=line, errors=messages))
+    else:
+        result.errors_truncated = True
+
+
+async def _write(
+    valid: List[Tuple[int, ContactCreate]], db: AsyncSession, user_id: int,
+    result: ContactImportResult,
+) -> None:
+    """Upsert a chunk, falling back to row by row if the database rejects it."""
+    try:
+        result.imported += await repository_contacts.upsert_contacts(
+            [contact for _, contact in valid], db, user_id
+        )
+        return
+    except DBAPIError:
+        await db.rollback()
+    for line, contact in valid:
+        try:
+            result.imported += await repository_contacts.upsert_contacts([contact], db, user_id)
+        except DBAPIError as e:
+            await db.rollback()
+            _report(result, line, [f"row: Rejected by the database ({type(e.orig).__name__})"])
+
+
+def _format_errors(exc: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+        for err in exc.errors()
+    ]
+
+
+async def import_contacts(
+    fileobj: BinaryIO, fmt: str, db: AsyncSession, user_id: int, chunk_size: int
+) -> ContactImportResult:
+    """Validate and upsert contacts from a CSV or NDJSON upload.
+
+    Each chunk is committed on its own, so a malformed file stops the import
+    at the failing chunk but keeps the rows already written.
+
+    Args:
+        fileobj: Binary file object of the upload
+        fmt: Upload format, one of ``IMPORT_FORMATS``
+        db: Database session
+        user_id: Owner of the imported contacts
+        chunk_size: Number of rows validated and written per statement
+
+    Returns:
+        ContactImportResult: Counts of written and rejected rows and error reports
+
+    Raises:
+        ValueError: If the file cannot be decoded or parsed
+    """
+    rows = _iter_rows(fileobj, fmt)
+    result = ContactImportResult()
+
+    while True:
+        chunk = await run_in_threadpool(_take, rows, chunk_size)
+        if not chunk:
+            break
+
+        valid = []
+        for line, row in chunk:
+            if isinstance(row, json.JSONDecodeError):
+                messages = [f"row: Invalid JSON: {row.msg}"]
+            else:
+                try:
+                    valid.append((line, ContactCreate.model_validate(row)))
+                    continue
+                except ValidationError as e:
+                    messages = _format_errors(e)
+            _report(result, line, messages)
+
+        await _write(valid, db, user_id, result)
+
+    return result
@@ -1,8 +1,59 @@
 from email.message import EmailMessage
 
-import aiosmtplib
-
 from src.conf.config import settings
+from src.services.smtp_pool import smtp_pool
+from src.services.templates import render_email
+
+
+def build_verification_email(email_to: str, token: str) -> EmailMessage:
+    """Build the email verification message.
+    
+    Args:
+        email_to: Recipient's email address
+        token: Verification token to include in the link
+        
+    Returns:
+        EmailMessage: Multipart text and HTML message ready to be sent
+    """
+    verify_link = f"{settings.app_base_url}/api/auth/verify/{token}"
+    return _build_message(email_to, "Verify your email", "verify_email", verify_link=verify_link)
+
+
+def build_reset_password_email(email_to: str, token: str) -> EmailMessage:
+    """Build the password reset message.
+    
+    Args:
+        email_to: Recipient's email address
+        token: Reset token to include in the link
+        
+    Returns:
+        EmailMessage: Multipart text and HTML message ready to be sent
+    """
+    reset_link = f"{settings.app_base_url}/api/auth/reset-password/{token}"
+    return _build_message(email_to, "Password Reset Request", "reset_password", reset_link=reset_link)
+
+
+def _build_message(email_to: str, subject: str, template: str, **context) -> EmailMessage:
+    text, html = render_email(template, **context)
+    message = EmailMessage()
+    message["From"] = settings.mail_from
+    message["To"] = email_to
+    message["Subject"] = subject
+    message.set_content(text)
+    message.add_alternative(html, subtype="html")
+    return message
+
+
+async def send_message(message: EmailMessage):
+    """Deliver a message over a pooled SMTP session.
+    
+    Args:
+        message: Message to send
+        
+    Returns:
+        None
+    """
+    await smtp_pool.send(message)
 
 
 async def send_verification_email(email_to: str, token: str):
@@ -17,28 +68,13 @@ async def send_verification_email(email_to: str, token: str):
     Returns:
         None
     """
-    message = EmailMessage()
-    message["From"] = settings.mail_from
-    message["To"] = email_to
-    message["Subject"] = "Verify your email"
-    verify_link = f"http://localhost:8000/api/auth/verify/{token}"
-    message.set_content(f"Please click the link to verify your email: {verify_link}")
-
-    await aiosmtplib.send(
-        message,
-        hostname=settings.mail_server,
-        port=settings.mail_port,
-        username=settings.mail_username,
-        password=settings.mail_password,
-        start_tls=True,
-        validate_certs=False,
-    )
+    await send_message(build_verification_email(email_to, token))
 
 async def send_reset_password_email(email_to: str, token: str):
     """Send password reset link to the user.
     
     This function sends an email with a password reset link to the user's email address.
-    The email contains an HTML-formatted message with a clickable link.
+    The email contains a plain-text part and an HTML part with a clickable link.
     
     Args:
         email_to: Recipient's email address
@@ -47,25 +83,4 @@ async def send_reset_password_email(email_to: str, token: str):
     Returns:
         None
     """
-    message = EmailMessage()
-    message["From"] = settings.mail_from
-    message["To"] = email_to
-    message["Subject"] = "Password Reset Request"
-    reset_link = f"http://localhost:8000/api/auth/reset-password/{token}"
-    message.set_content(f"""
-    <html>
-      <body>
-        <p>To reset your password, please click the link below:</p>
-        <p><a href="http://localhost:8000/api/auth/reset-password/{token}">Reset Password</a></p>
-      </body>
-    </html>
-    """, subtype='html')
-    await aiosmtplib.send(
-        message,
-        hostname=settings.mail_server,
-        port=settings.mail_port,
-        username=settings.mail_username,
-        password=settings.mail_password,
-        start_tls=True,
-        validate_certs=False,
-    )
+    await send_message(build_reset_password_email(email_to, token))
@@ -0,0 +1,252 @@
+"""
+Transactional Email Outbox.
+
+Request handlers never talk to SMTP. They add an ``EmailOutbox`` row to the
+session with :func:`enqueue_email`, and the row is committed in the same
+transaction as the change that triggered it. A signup therefore never
+waits for an SMTP handshake, and an SMTP outage cannot fail it; the email
+is either committed together with the user or not at all.
+
+:class:`EmailOutboxWorker` (run by ``email_worker.py``) drains the table.
+It claims due rows in small batches by pushing their ``next_attempt_at``
+forward by a lease, so several workers can run side by side and rows
+claimed by a crashed worker become due again once the lease runs out.
+Failed deliveries are retried with exponential backoff. After
+``max_attempts`` the row is marked ``dead`` and kept for inspection.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.conf.config import settings
+from src.database.models import EmailOutbox
+from src.services.email import (
+    build_reset_password_email,
+    build_verification_email,
+    send_message,
+)
+
+logger = logging.getLogger(__name__)
+
+# Outbox kinds and the builders that turn a row's payload into a message
+EMAIL_BUILDERS: Dict[str, Callable[..., EmailMessage]] = {
+    "verify_email": build_verification_email,
+    "reset_password": build_reset_password_email,
+}
+
+PENDING = "pending"
+SENT = "sent"
+DEAD = "dead"
+
+
+def enqueue_email(db: AsyncSession, kind: str, recipient: str, **payload: Any) -> EmailOutbox:
+    """Queue an email in the caller's transaction.
+
+    The row is only added to the session; it is written when the caller
+    commits, together with the rest of the request's changes.
+
+    Args:
+        db: Session of the current request
+        kind: One of the keys of ``EMAIL_BUILDERS``
+        recipient: Recipient's email address
+        **payload: Keyword arguments for the message builder, e.g. ``token``
+
+    Returns:
+        EmailOutbox: The pending outbox row
+
+    Raises:
+        ValueError: If the kind is unknown
+    """
+    if kind not in EMAIL_BUILDERS:
+        raise ValueError(f"Unknown email kind: {kind}")
+    item = EmailOutbox(
+        kind=kind,
+        recipient=recipient,
+        payload=payload,
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=_utcnow(),
+    )
+    db.add(item)
+    return item
+
+
+def build_message(item: EmailOutbox) -> EmailMessage:
+    """Render the message for an outbox row.
+
+    Raises:
+        KeyError: If the row's kind has no builder
+    """
+    return EMAIL_BUILDERS[item.kind](item.recipient, **item.payload)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class EmailOutboxWorker:
+    """Drains the email outbox with bounded concurrency and retries.
+
+    Args:
+        session_factory: Factory for the worker's own database sessions
+        send: Coroutine delivering one message, ``send_message`` by default
+        concurrency: Maximum number of messages delivered at once
+        batch_size: Maximum number of rows claimed per poll
+        max_attempts: Deliveries tried before a row is dead-lettered
+        base_delay: First retry delay in seconds, doubled on every failure
+        max_delay: Upper bound of the retry delay in seconds
+        lease: Seconds a claimed row stays invisible to other workers
+        poll_interval: Seconds to sleep when the outbox is empty
+        clock: Returns the current aware UTC time
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        send: Callable[[EmailMessage], Awaitable[Any]] = send_message,
+        concurrency: int = 4,
+        batch_size: int = 20,
+        max_attempts: int = 8,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        lease: float = 300.0,
+        poll_interval: float = 2.0,
+        clock: Callable[[], datetime] = _utcnow,
+    ):
+        self.session_factory = session_factory
+        self.send = send
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._sent = 0
+        self._retried = 0
+        self._dead = 0
+
+    def backoff(self, attempts: int) -> float:
+        """Delay in seconds before retrying a row that failed ``attempts`` times."""
+        return min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+
+    async def claim(self) -> List[EmailOutbox]:
+        """Claim a batch of due rows and count the upcoming attempt.
+
+        ``SKIP LOCKED`` keeps concurrent workers from claiming the same rows
+        on PostgreSQL; the lease keeps them from re-claiming rows that are
+        still being delivered.
+        """
+        now = self.clock()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == PENDING, EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            items = list(result.scalars())
+            for item in items:
+                item.attempts += 1
+                item.next_attempt_at = now + timedelta(seconds=self.lease)
+            await session.commit()
+        return items
+
+    async def deliver(self, item: EmailOutbox) -> str:
+        """Send one claimed row and record the outcome.
+
+        Returns:
+            str: The row's new status
+        """
+        async with self._semaphore:
+            try:
+                await self.send(build_message(item))
+            except Exception as e:
+                return await self._record_failure(item, e)
+        await self._update(item.id, status=SENT, sent_at=self.clock(), last_error=None)
+        self._sent += 1
+        return SENT
+
+    async def _record_failure(self, item: EmailOutbox, error: Exception) -> str:
+        message = f"{type(error).__name__}: {error}"[:1000]
+        if item.kind not in EMAIL_BUILDERS or item.attempts >= self.max_attempts:
+            logger.error("Email %s to %s dead-lettered: %s", item.id, item.recipient, message)
+            await self._update(item.id, status=DEAD, last_error=message)
+            self._dead += 1
+            return DEAD
+        delay = self.backoff(item.attempts)
+        logger.warning(
+            "Email %s attempt %s failed, retrying in %.0fs: %s",
+            item.id, item.attempts, delay, message,
+        )
+        await self._update(
+            item.id,
+            next_attempt_at=self.clock() + timedelta(seconds=delay),
+            last_error=message,
+        )
+        self._retried += 1
+        return PENDING
+
+    async def _update(self, item_id: int, **values: Any) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(EmailOutbox).where(EmailOutbox.id == item_id).values(**values)
+            )
+            await session.commit()
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch.
+
+        Returns:
+            int: Number of rows processed
+        """
+        items = await self.claim()
+        if items:
+            await asyncio.gather(*(self.deliver(item) for item in items))
+        return len(items)
+
+    async def run_forever(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Drain the outbox until ``stop`` is set, sleeping while it is empty."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception("Email outbox poll failed")
+                processed = 0
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "sent": self._sent,
+            "retried": self._retried,
+            "dead": self._dead,
+        }
+
+
+def create_worker(session_factory: async_sessionmaker) -> EmailOutboxWorker:
+    """Build a worker configured from settings."""
+    return EmailOutboxWorker(
+        session_factory,
+        concurrency=settings.email_worker_concurrency,
+        batch_size=settings.email_worker_batch_size,
+        max_attempts=settings.email_max_attempts,
+        base_delay=settings.email_retry_base_delay,
+        max_delay=settings.email_retry_max_delay,
+        lease=settings.email_lease_seconds,
+        poll_interval=settings.email_poll_interval,
+    )
@@ -0,0 +1,189 @@
+"""
+Login Throttling.
+
+Failed logins are counted per account and per client IP in Redis. After a
+number of free failures each further failure blocks the account (or IP)
+for an exponentially growing delay, capped at ``login_max_backoff``.
+
+Every attempt reserves a failure before the password is checked: one Lua
+script rejects it if the account or IP is blocked and otherwise counts it
+right away, blocking later attempts once the free failures are used up.
+Concurrent guesses therefore cannot all slip past the check while the
+first ones are still hashing, and throttled attempts are rejected before
+any bcrypt work is done. Attempts that turn out not to be failures are
+refunded afterwards.
+
+The IP threshold is higher than the account one because many users can
+share an address (NAT, corporate proxies). A successful login clears the
+account's counter and refunds only its own attempt from the IP's.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.services.metrics import register_metrics
+from src.services.rate_limiter import get_rate_limit_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS: account counter, account block, IP counter, IP block.
+# ARGV: window (s), account free failures, IP free failures, base delay (s), max delay (s).
+# Returns {0, retry after ms} if blocked, otherwise {1, account count, IP count}.
+RESERVE_LUA = """
+local retry_after = math.max(redis.call('PTTL', KEYS[2]), redis.call('PTTL', KEYS[4]))
+if retry_after > 0 then
+    return {0, retry_after}
+end
+local counts = {1}
+for i = 1, 3, 2 do
+    local failures = redis.call('INCR', KEYS[i])
+    redis.call('EXPIRE', KEYS[i], tonumber(ARGV[1]))
+    local excess = failures - tonumber(ARGV[(i + 3) / 2])
+    if excess > 0 then
+        local delay = math.min(tonumber(ARGV[5]), tonumber(ARGV[4]) * 2 ^ (excess - 1))
+        redis.call('SET', KEYS[i + 1], failures, 'PX', math.ceil(delay * 1000))
+    end
+    table.insert(counts, failures)
+end
+return counts
+"""
+
+# KEYS: as above. ARGV: account count, IP count, 1 to clear the account.
+# Takes one reserved attempt back and lifts a block only if this attempt set
+# it, i.e. no later attempt has replaced it since.
+REFUND_LUA = """
+for i = 1, 3, 2 do
+    if tonumber(redis.call('GET', KEYS[i]) or '0') > 0 then
+        redis.call('DECR', KEYS[i])
+    end
+    if redis.call('GET', KEYS[i + 1]) == ARGV[(i + 1) / 2] then
+        redis.call('DEL', KEYS[i + 1])
+    end
+end
+if ARGV[3] == '1' then
+    redis.call('DEL', KEYS[1], KEYS[2])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class ThrottleState:
+    blocked: bool
+    retry_after: float
+    # Counter values taken by the reserved attempt, (account, IP); empty if
+    # nothing was reserved
+    counts: Tuple[int, ...] = ()
+
+
+class LoginThrottle:
+    """Per-account and per-IP login failure counters with exponential backoff.
+
+    Args:
+        account_free_failures: Failures per account before backoff starts
+        ip_free_failures: Failures per IP before backoff starts
+        base_delay: First backoff delay in seconds, doubled on every failure
+        max_delay: Upper bound of the backoff delay in seconds
+        window: Seconds after the last failure until a counter resets
+    """
+
+    def __init__(self, account_free_failures: int, ip_free_failures: int,
+                 base_delay: float, max_delay: float, window: int):
+        self.account_free_failures = account_free_failures
+        self.ip_free_failures = ip_free_failures
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+        self._reserve_script = None
+        self._refund_script = None
+        self.rejected = 0
+        self.attempts = 0
+        self.refunds = 0
+
+    @staticmethod
+    def _keys(email: str, ip: str):
+        email = email.lower()
+        return [
+            f"login:failures:account:{email}", f"login:blocked:account:{email}",
+            f"login:failures:ip:{ip}", f"login:blocked:ip:{ip}",
+        ]
+
+    async def reserve(self, email: str, ip: str) -> ThrottleState:
+        """Reserve a login attempt, counting it as a failure until refunded.
+
+        Args:
+            email: Account the client tries to log into
+            ip: Client address
+
+        Returns:
+            ThrottleState: Blocked flag and seconds until the block expires;
+            if not blocked, the reservation to pass to ``refund``
+        """
+        try:
+            client = await get_rate_limit_redis()
+            if self._reserve_script is None:
+                self._reserve_script = client.register_script(RESERVE_LUA)
+            result = await self._reserve_script(
+                keys=self._keys(email, ip),
+                args=[self.window, self.account_free_failures, self.ip_free_failures,
+                      self.base_delay, self.max_delay],
+                client=client,
+            )
+        except redis.RedisError:
+            logger.warning("Login throttle unavailable, allowing attempt", exc_info=True)
+            return ThrottleState(False, 0.0)
+        if not result[0]:
+            self.rejected += 1
+            return ThrottleState(True, result[1] / 1000)
+        self.attempts += 1
+        return ThrottleState(False, 0.0, tuple(result[1:]))
+
+    async def refund(self, email: str, ip: str, state: ThrottleState, success: bool = False) -> None:
+        """Take back an attempt that was not a failed login.
+
+        Args:
+            email: Account the client tried to log into
+            ip: Client address
+            state: Result of ``reserve`` for the attempt
+            success: Whether the login succeeded, which also clears the
+                account's counter
+        """
+        if not state.counts:
+            return
+        try:
+            client = await get_rate_limit_redis()
+            if self._refund_script is None:
+                self._refund_script = client.register_script(REFUND_LUA)
+            await self._refund_script(
+                keys=self._keys(email, ip),
+                args=[*state.counts, int(success)],
+                client=client,
+            )
+        except redis.RedisError:
+            logger.warning("Login throttle unavailable, attempt not refunded", exc_info=True)
+            return
+        self.refunds += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the attempt, refund and rejection counters."""
+        return {"attempts": self.attempts, "refunds": self.refunds, "rejected": self.rejected}
+
+
+def retry_after_header(seconds: float) -> str:
+    """Format a Retry-After value in whole seconds, rounded up."""
+    return str(max(1, math.ceil(seconds)))
+
+
+login_throttle = LoginThrottle(
+    account_free_failures=settings.login_account_free_failures,
+    ip_free_failures=settings.login_ip_free_failures,
+    base_delay=settings.login_base_backoff,
+    max_delay=settings.login_max_backoff,
+    window=settings.login_failure_window,
+)
+register_metrics("login_throttle", login_throttle.metrics)
@@ -0,0 +1,27 @@
+"""
+Metrics Registry Service.
+
+Services register a callable that returns a snapshot of their counters;
+``collect_metrics`` gathers every snapshot for the metrics endpoint.
+"""
+
+from typing import Any, Callable, Dict
+
+MetricsProvider = Callable[[], Dict[str, Any]]
+
+_providers: Dict[str, MetricsProvider] = {}
+
+
+def register_metrics(name: str, provider: MetricsProvider) -> None:
+    """Register (or replace) the metrics provider for a service.
+
+    Args:
+        name: Section name in the metrics output
+        provider: Callable returning a JSON-serializable dict of counters
+    """
+    _providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return the current snapshot of every registered provider."""
+    return {name: provider() for name, provider in _providers.items()}
@@ -0,0 +1,134 @@
+"""
+Password Hashing Service.
+
+bcrypt hashing and verification take hundreds of milliseconds of CPU. This
+module runs them on a dedicated, bounded thread pool (bcrypt releases the
+GIL) so async handlers never block the event loop. ``max_workers`` caps how
+many hashes run at once and ``max_queue`` caps how many may wait; beyond
+that, calls fail fast with ``PasswordHasherOverloaded`` instead of piling up
+latency for every other request.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from src.auth.hashing import hash_password, verify_password
+from src.conf.config import settings
+from src.services.metrics import register_metrics
+
+T = TypeVar("T")
+
+
+class PasswordHasherOverloaded(Exception):
+    """Raised when the hashing queue is full."""
+
+
+class PasswordHasher:
+    """Bounded executor for password hashing with queue-depth metrics.
+
+    Args:
+        max_workers: Maximum number of hashes computed concurrently
+        max_queue: Maximum number of calls waiting for a worker (0 = unbounded)
+    """
+
+    def __init__(self, max_workers: int, max_queue: int = 0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking hashing function on the pool and await its result.
+
+        Args:
+            func: Blocking function, e.g. ``hash_password`` or ``verify_password``
+            *args: Arguments for ``func``
+
+        Returns:
+            The value returned by ``func``
+
+        Raises:
+            PasswordHasherOverloaded: If ``max_queue`` calls are already waiting
+        """
+        with self._lock:
+            if self.max_queue and self._queued >= self.max_queue:
+                self._rejected += 1
+                raise PasswordHasherOverloaded("Password hashing queue is full")
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+
+        submitted = time.perf_counter()
+        started = threading.Event()
+
+        def job() -> T:
+            begin = time.perf_counter()
+            with self._lock:
+                started.set()
+                self._queued -= 1
+                self._in_flight += 1
+                self._wait_seconds += begin - submitted
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+                    self._run_seconds += time.perf_counter() - begin
+
+        def on_done(future: Future) -> None:
+            # A call cancelled before a worker picked it up never ran job()
+            with self._lock:
+                if future.cancelled() and not started.is_set():
+                    self._queued -= 1
+
+        future = self._get_executor().submit(job)
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop."""
+        return await self.run(hash_password, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        """Verify a password against its hash without blocking the event loop."""
+        return await self.run(verify_password, plain, hashed)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of the pool counters."""
+        with self._lock:
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "in_flight": self._in_flight,
+                "peak_queued": self._peak_queued,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 3) if completed else 0.0,
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 3) if completed else 0.0,
+            }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
+register_metrics("password_hasher", password_hasher.metrics)
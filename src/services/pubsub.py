@@ -0,0 +1,53 @@
+"""
+Redis Pub/Sub Subscriber.
+
+Shared reconnect loop for the background listeners that keep per-worker
+in-process state (user cache, token revocations) in sync across workers.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+
+async def subscribe_forever(
+    channel: str,
+    on_message: Callable[[str], None],
+    get_redis: Callable[[], Awaitable[redis.Redis]],
+    on_subscribe: Optional[Callable[[redis.Redis], Awaitable[None]]] = None,
+    retry_delay: float = 1.0,
+) -> None:
+    """Deliver every message on ``channel`` to ``on_message`` until cancelled.
+
+    Args:
+        channel: Channel name
+        on_message: Called with each decoded message payload
+        get_redis: Returns the Redis client to subscribe with
+        on_subscribe: Awaited after every (re)subscription, to resync state
+            that may have been missed while disconnected
+        retry_delay: Seconds to wait before resubscribing after an error
+    """
+    while True:
+        try:
+            client = await get_redis()
+            pubsub = client.pubsub()
+            await pubsub.subscribe(channel)
+            try:
+                if on_subscribe is not None:
+                    await on_subscribe(client)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    on_message(data.decode() if isinstance(data, bytes) else data)
+            finally:
+                await pubsub.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Subscriber for %s failed, retrying", channel, exc_info=True)
+            await asyncio.sleep(retry_delay)
@@ -0,0 +1,273 @@
+"""
+Distributed Rate Limiter.
+
+A token bucket per client, stored in Redis and updated by a single Lua
+script per check, so every worker enforces the same budget atomically and
+memory lives in Redis (each bucket expires once it would be full again).
+
+Clients are identified by the user in their access token (``user:{uid}``
+or ``user:{email}``), falling back to the remote address (``ip:{host}``)
+for anonymous requests. Routes declare a cost with the ``rate_limited``
+decorator, so expensive endpoints draw more tokens from the same bucket;
+``RateLimitMiddleware`` performs the check as plain ASGI before routing.
+
+With ``settings.rate_limit_storage = "fakeredis"`` the buckets live in an
+in-process fakeredis server instead, for tests and local development.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from jose import JWTError
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.auth.jwt_utils import decode_token
+from src.conf.config import settings
+from src.services.metrics import register_metrics
+from src.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket; ARGV: capacity, refill rate (tokens/s), cost.
+# Returns {allowed, remaining tokens, seconds until ``cost`` tokens are available}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+_fake_redis: Optional[redis.Redis] = None
+
+
+async def get_rate_limit_redis() -> redis.Redis:
+    """Return the Redis client holding the buckets for the configured storage."""
+    global _fake_redis
+    if settings.rate_limit_storage == "fakeredis":
+        if _fake_redis is None:
+            import fakeredis
+
+            _fake_redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        return _fake_redis
+    return await get_redis()
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+class RateLimiter:
+    """Token-bucket limiter evaluated atomically in Redis.
+
+    Args:
+        capacity: Bucket size, i.e. the largest burst allowed
+        refill_rate: Tokens added back per second
+        prefix: Prefix of the bucket keys
+    """
+
+    def __init__(self, capacity: int, refill_rate: float, prefix: str = "ratelimit"):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.prefix = prefix
+        self._script = None
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    async def hit(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Take ``cost`` tokens from the bucket of ``key`` if available.
+
+        Fails open (allows the request) if Redis is unreachable, so an outage
+        of the limiter does not take the API down with it.
+
+        Args:
+            key: Client identifier, see ``rate_limit_key``
+            cost: Tokens this request consumes; a cost above the capacity
+                takes a full bucket, so the request can still be allowed
+
+        Returns:
+            RateLimitResult: Whether the request is allowed and the bucket state
+        """
+        cost = min(cost, self.capacity)
+        try:
+            client = await get_rate_limit_redis()
+            if self._script is None:
+                self._script = client.register_script(TOKEN_BUCKET_LUA)
+            allowed, remaining, retry_after = await self._script(
+                keys=[f"{self.prefix}:{key}"],
+                args=[self.capacity, self.refill_rate, cost],
+                client=client,
+            )
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Rate limiter unavailable, allowing request", exc_info=True)
+            return RateLimitResult(True, self.capacity, 0.0)
+
+        result = RateLimitResult(bool(int(allowed)), float(remaining), float(retry_after))
+        if result.allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return allowed/limited/error counters."""
+        return {
+            "capacity": self.capacity,
+            "refill_rate": self.refill_rate,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors,
+        }
+
+
+def rate_limit_key(request: Request) -> str:
+    """Identify the client of a request for rate limiting.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        ``user:{uid}``/``user:{email}`` for a valid bearer token, else ``ip:{host}``
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = decode_token(token)
+        except JWTError:
+            claims = {}
+        user = claims.get("uid") or claims.get("sub")
+        if user is not None:
+            return f"user:{user}"
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}"
+
+
+rate_limiter = RateLimiter(
+    capacity=settings.rate_limit_capacity,
+    refill_rate=settings.rate_limit_refill_per_second,
+)
+register_metrics("rate_limiter", rate_limiter.metrics)
+
+
+def rate_limited(cost: int = 1):
+    """Mark an endpoint as rate limited, drawing ``cost`` tokens per request.
+
+    The check itself runs in ``RateLimitMiddleware`` before the request
+    reaches routing; endpoints without this marker are not limited.
+
+    Usage::
+
+        @router.get("/export")
+        @rate_limited(cost=10)
+        async def export(...): ...
+
+    Args:
+        cost: Weight of the route; capped at the bucket capacity
+    """
+    def decorator(endpoint):
+        endpoint.rate_limit_cost = cost
+        return endpoint
+
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware enforcing ``rate_limited`` costs.
+
+    Rejected requests get a 429 with ``Retry-After`` without entering the
+    application; allowed ones get an ``X-RateLimit-Remaining`` header. The
+    route is resolved the same way the router does (first full match), but
+    only routes carrying a cost are considered.
+
+    Args:
+        app: Wrapped ASGI application; its routes are read on first request
+        limiter: Rate limiter to charge
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+        self._routes: Optional[List[Tuple[BaseRoute, Optional[int]]]] = None
+
+    def _load_routes(self, scope: Scope) -> List[Tuple[BaseRoute, Optional[int]]]:
+        routes = scope["app"].router.routes
+        return [
+            (route, getattr(getattr(route, "endpoint", None), "rate_limit_cost", None))
+            for route in routes
+        ]
+
+    def _route_cost(self, scope: Scope) -> Optional[int]:
+        if self._routes is None:
+            self._routes = self._load_routes(scope)
+        for route, cost in self._routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return cost
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.rate_limit_enabled:
+            await self.app(scope, receive, send)
+            return
+        cost = self._route_cost(scope)
+        if cost is None:
+            await self.app(scope, receive, send)
+            return
+
+        result = await self.limiter.hit(rate_limit_key(Request(scope)), cost)
+        remaining = str(int(result.remaining)).encode()
+        if not result.allowed:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={
+                    "Retry-After": str(math.ceil(result.retry_after)),
+                    "X-RateLimit-Remaining": remaining.decode(),
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_remaining(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-ratelimit-remaining", remaining),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_remaining)
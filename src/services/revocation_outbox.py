@@ -0,0 +1,155 @@
+"""
+Token Revocation Outbox.
+
+A password reset bumps ``User.token_version``. Stateless access tokens are
+only rejected by other workers once the new version is announced through
+Redis (see :mod:`src.services.token_revocation`), and the user's cached
+entry and refresh token must go as well. Those Redis calls can only happen
+after the commit, so a Redis failure there must neither fail the reset
+nor lose the announcement.
+
+:func:`enqueue_revocation` adds a ``RevocationOutbox`` row in the same
+transaction as the bump. The request announces it right after committing
+with :func:`deliver_revocation`, which deletes the row on success and
+leaves it in place if Redis fails. :class:`RevocationRelay`, running in
+every API worker, announces the rows left behind until Redis is back.
+Every step of an announcement is idempotent, so repeating one is harmless.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import redis.asyncio as redis
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.conf.config import settings
+from src.database.db import get_session_factory
+from src.database.models import RevocationOutbox
+from src.services.metrics import register_metrics
+from src.services.redis_client import get_redis
+from src.services.token_revocation import token_revocations
+from src.services.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_revocation(db: AsyncSession, user: Any) -> RevocationOutbox:
+    """Queue the announcement of a user's new token version in the caller's transaction.
+
+    Args:
+        db: Session of the current request
+        user: User whose ``token_version`` was just bumped
+
+    Returns:
+        RevocationOutbox: The pending outbox row
+    """
+    item = RevocationOutbox(user_id=user.id, email=user.email, token_version=user.token_version)
+    db.add(item)
+    return item
+
+
+async def announce(item: RevocationOutbox) -> None:
+    """Announce a revocation and drop the user's cached state.
+
+    Raises:
+        redis.RedisError: If Redis is unavailable
+    """
+    await token_revocations.revoke(item.user_id, item.token_version)
+    await user_cache.invalidate(item.email)
+    client = await get_redis()
+    await client.delete(f"refresh_token:{item.email}")
+
+
+async def deliver_revocation(db: AsyncSession, item: RevocationOutbox) -> bool:
+    """Announce a committed revocation, leaving it to the relay if Redis fails.
+
+    Args:
+        db: Session the row was committed with
+        item: Committed outbox row
+
+    Returns:
+        bool: True if the revocation was announced and the row deleted
+    """
+    try:
+        await announce(item)
+    except redis.RedisError:
+        logger.warning("Could not announce revocation of user %s, will retry",
+                       item.user_id, exc_info=True)
+        return False
+    await db.execute(delete(RevocationOutbox).where(RevocationOutbox.id == item.id))
+    await db.commit()
+    return True
+
+
+class RevocationRelay:
+    """Announces revocations whose announcement failed after the commit.
+
+    Args:
+        session_factory: Factory for the relay's own database sessions
+        batch_size: Maximum number of rows announced per poll
+        poll_interval: Seconds to sleep between polls
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, batch_size: int = 100,
+                 poll_interval: float = 5.0):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.announced = 0
+        self.failures = 0
+
+    async def run_once(self) -> int:
+        """Announce one batch of pending revocations, oldest first.
+
+        ``SKIP LOCKED`` keeps relays of different workers from announcing
+        the same rows at once on PostgreSQL.
+
+        Returns:
+            int: Number of revocations announced
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(RevocationOutbox)
+                .order_by(RevocationOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            done = []
+            try:
+                for item in result.scalars():
+                    await announce(item)
+                    done.append(item.id)
+            except redis.RedisError:
+                self.failures += 1
+                logger.warning("Could not announce pending revocations", exc_info=True)
+            if done:
+                await session.execute(delete(RevocationOutbox).where(RevocationOutbox.id.in_(done)))
+            await session.commit()
+        self.announced += len(done)
+        return len(done)
+
+    async def run_forever(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Poll for pending revocations until ``stop`` is set or the task is cancelled."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Revocation relay poll failed")
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the number of relayed revocations and failed polls."""
+        return {"announced": self.announced, "failures": self.failures}
+
+
+revocation_relay = RevocationRelay(
+    get_session_factory(),
+    poll_interval=settings.token_revocation_retry_interval,
+)
+register_metrics("revocation_relay", revocation_relay.metrics)
@@ -0,0 +1,203 @@
+"""
+SMTP Connection Pool.
+
+``aiosmtplib.send`` opens a new connection for every message and repeats
+the TCP, STARTTLS and AUTH handshakes each time, which dominates the send
+time in bursts. The pool keeps up to ``size`` authenticated sessions open
+and sends message after message over them.
+
+A session is recycled after ``max_messages`` messages (many servers cap
+messages per session) or when it has been idle longer than
+``idle_timeout`` (servers drop idle clients). If a reused session turns out
+to be disconnected, the message is retried once on a fresh connection.
+"""
+
+import asyncio
+import logging
+import time
+from email.message import EmailMessage
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import aiosmtplib
+
+from src.conf.config import settings
+from src.services.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the session is unusable and must be replaced
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+    OSError,
+)
+
+
+class _Session:
+    __slots__ = ("client", "messages", "last_used")
+
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+def create_smtp_client() -> aiosmtplib.SMTP:
+    """Build an unconnected client for the configured SMTP server."""
+    return aiosmtplib.SMTP(
+        hostname=settings.mail_server,
+        port=settings.mail_port,
+        username=settings.mail_username,
+        password=settings.mail_password,
+        start_tls=settings.MAIL_STARTTLS,
+        validate_certs=False,
+    )
+
+
+class SMTPPool:
+    """Pool of persistent, authenticated SMTP sessions.
+
+    Args:
+        client_factory: Returns a new unconnected ``aiosmtplib.SMTP`` client
+        size: Maximum number of sessions open at once
+        max_messages: Messages sent over a session before it is replaced
+        idle_timeout: Seconds an idle session is kept before it is replaced
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], aiosmtplib.SMTP] = create_smtp_client,
+        size: int = 4,
+        max_messages: int = 100,
+        idle_timeout: float = 60.0,
+    ):
+        self.client_factory = client_factory
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[_Session] = []
+        self._open = 0
+        self._connects = 0
+        self._reconnects = 0
+        self._reused = 0
+        self._sent = 0
+        self._failed = 0
+
+    async def _connect(self) -> _Session:
+        client = self.client_factory()
+        await client.connect()
+        self._open += 1
+        self._connects += 1
+        return _Session(client)
+
+    async def _discard(self, session: _Session, quit: bool = False) -> None:
+        self._open -= 1
+        try:
+            if quit and session.client.is_connected:
+                await session.client.quit()
+        except aiosmtplib.SMTPException:
+            pass
+        finally:
+            session.client.close()
+
+    async def _acquire(self) -> _Session:
+        while self._idle:
+            session = self._idle.pop()
+            expired = time.monotonic() - session.last_used > self.idle_timeout
+            if expired or not session.client.is_connected:
+                await self._discard(session, quit=expired)
+                continue
+            return session
+        return await self._connect()
+
+    async def _release(self, session: _Session) -> None:
+        session.last_used = time.monotonic()
+        if session.messages >= self.max_messages:
+            await self._discard(session, quit=True)
+        else:
+            self._idle.append(session)
+
+    async def _send_on(self, session: _Session, message: EmailMessage) -> None:
+        if session.messages:
+            self._reused += 1
+        session.messages += 1
+        await session.client.send_message(message)
+
+    async def send_many(self, messages: Iterable[EmailMessage]) -> None:
+        """Send messages one after another over a single pooled session.
+
+        Raises:
+            aiosmtplib.SMTPException: If a message could not be sent; the
+                messages before it have been sent
+        """
+        async with self._slots:
+            session: Optional[_Session] = None
+            try:
+                session = await self._acquire()
+                for message in messages:
+                    reused = session.messages > 0
+                    try:
+                        await self._send_on(session, message)
+                    except CONNECTION_ERRORS:
+                        await self._discard(session)
+                        session = None
+                        if not reused:
+                            raise
+                        # The server dropped an idle session; retry once on a new one
+                        logger.info("SMTP session dropped, reconnecting")
+                        self._reconnects += 1
+                        session = await self._connect()
+                        await self._send_on(session, message)
+                    self._sent += 1
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                # The server rejected the message; the session is still usable
+                self._failed += 1
+                if session is None:
+                    raise
+                try:
+                    await session.client.rset()
+                except aiosmtplib.SMTPException:
+                    await self._discard(session)
+                    raise
+                await self._release(session)
+                raise
+            except BaseException:
+                self._failed += 1
+                if session is not None:
+                    await self._discard(session)
+                raise
+            await self._release(session)
+
+    async def send(self, message: EmailMessage) -> None:
+        """Send one message over a pooled session."""
+        await self.send_many([message])
+
+    async def close(self) -> None:
+        """Quit every idle session."""
+        idle, self._idle = self._idle, []
+        for session in idle:
+            await self._discard(session, quit=True)
+        self._slots = asyncio.Semaphore(self.size)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "open": self._open,
+            "idle": len(self._idle),
+            "connects": self._connects,
+            "reconnects": self._reconnects,
+            "reused": self._reused,
+            "sent": self._sent,
+            "failed": self._failed,
+        }
+
+
+smtp_pool = SMTPPool(
+    size=settings.mail_pool_size,
+    max_messages=settings.mail_pool_max_messages,
+    idle_timeout=settings.mail_pool_idle_timeout,
+)
+register_metrics("smtp_pool", smtp_pool.metrics)
@@ -1,10 +1,75 @@
 """
 Jinja2 Templates Service.
 
-This module provides a global Jinja2Templates instance for rendering HTML templates.
-The templates are loaded from the 'templates' directory in the project root.
+This module owns the single Jinja2 environment of the application, shared by
+the HTML pages (through the global ``templates`` instance) and the email
+renderer. Compiled templates are written to a filesystem bytecode cache, so
+a restarted process loads them without parsing the sources again, and
+``precompile_templates`` loads every template at startup instead of on the
+first request that needs it. The templates are loaded from the 'templates'
+directory in the project root.
 """
 
+from pathlib import Path
+from typing import List, Optional, Tuple
+
 from fastapi.templating import Jinja2Templates
+from jinja2 import (Environment, FileSystemBytecodeCache, FileSystemLoader,
+                    select_autoescape)
+
+from src.conf.config import settings
+
+TEMPLATES_DIR = Path(__file__).resolve().parents[2] / "templates"
+
+
+def create_environment(
+    bytecode_cache_dir: Optional[str] = settings.template_bytecode_cache_dir,
+) -> Environment:
+    """Create a Jinja2 environment for the project templates.
+
+    Args:
+        bytecode_cache_dir: Directory for compiled templates; ``None`` uses
+            a per-user directory in the system temp dir
+
+    Returns:
+        Environment: Environment with HTML autoescaping and a bytecode cache
+    """
+    if bytecode_cache_dir is not None:
+        Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir),
+        autoescape=select_autoescape(["html", "xml"]),
+        auto_reload=settings.template_auto_reload,
+    )
+
+
+env = create_environment()
+templates = Jinja2Templates(env=env)
+
+
+def precompile_templates() -> List[str]:
+    """Load every template so the first request does not pay for compiling.
+
+    Returns:
+        List[str]: Names of the loaded templates
+    """
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return names
+
+
+def render_email(name: str, **context) -> Tuple[str, str]:
+    """Render the text and HTML bodies of an email template pair.
+
+    Args:
+        name: Template name under ``email/`` without extension
+        **context: Template variables
 
-templates = Jinja2Templates(directory="templates")
+    Returns:
+        Tuple[str, str]: Plain-text body and HTML body
+    """
+    text = env.get_template(f"email/{name}.txt").render(**context)
+    html = env.get_template(f"email/{name}.html").render(**context)
+    return text, html
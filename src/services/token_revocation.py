@@ -0,0 +1,104 @@
+"""
+Access Token Revocation.
+
+Stateless access tokens carry the user's ``token_version``. Revoking them
+means bumping ``User.token_version`` and announcing the new version here.
+Each worker keeps the latest announced version per user in memory, so
+checking a token is a dictionary lookup; a token is only "stale" (and worth
+a database lookup) when its version is lower than one announced.
+
+Announcements are published on a pub/sub channel and also recorded in a
+Redis sorted set scored by time, which a worker replays after every
+(re)subscription. Entries older than the access-token lifetime are pruned:
+every token issued before them has expired by then.
+"""
+
+import time
+from typing import Any, Dict
+
+from src.conf.config import settings
+from src.services.metrics import register_metrics
+from src.services.pubsub import subscribe_forever
+from src.services.redis_client import get_redis
+from src.utils.ttl_cache import TTLCache
+
+
+class TokenRevocations:
+    """Per-worker view of the latest token version of recently revoked users.
+
+    Args:
+        channel: Pub/sub channel carrying ``"{user_id}:{version}"`` messages
+        log_key: Redis sorted set replayed after subscribing
+        window: Seconds a revocation stays relevant (access-token lifetime)
+        maxsize: Maximum number of users tracked in memory
+    """
+
+    def __init__(self, channel: str, log_key: str, window: float, maxsize: int = 100_000):
+        self.channel = channel
+        self.log_key = log_key
+        self.window = window
+        self.versions = TTLCache[int](maxsize, window)
+        self.stale_tokens = 0
+
+    def _record(self, user_id: int, version: int) -> None:
+        known = self.versions.get(user_id)
+        if known is None or version > known:
+            self.versions.set(user_id, version)
+
+    def is_stale(self, user_id: int, version: int) -> bool:
+        """Return True if a newer token version was announced for the user."""
+        known = self.versions.get(user_id)
+        stale = known is not None and version < known
+        if stale:
+            self.stale_tokens += 1
+        return stale
+
+    async def revoke(self, user_id: int, version: int) -> None:
+        """Announce that tokens older than ``version`` are revoked.
+
+        Args:
+            user_id: User id
+            version: The user's new ``token_version``
+        """
+        self._record(user_id, version)
+        redis = await get_redis()
+        member = f"{user_id}:{version}"
+        now = time.time()
+        await redis.zadd(self.log_key, {member: now})
+        await redis.zremrangebyscore(self.log_key, "-inf", now - self.window)
+        await redis.publish(self.channel, member)
+
+    def _on_message(self, member: str) -> None:
+        user_id, _, version = member.partition(":")
+        self._record(int(user_id), int(version))
+
+    async def _replay(self, redis) -> None:
+        since = time.time() - self.window
+        for member in await redis.zrangebyscore(self.log_key, since, "+inf"):
+            self._on_message(member.decode() if isinstance(member, bytes) else member)
+
+    async def listen(self, retry_delay: float = 1.0) -> None:
+        """Consume revocations until cancelled, replaying the log on every subscription.
+
+        Args:
+            retry_delay: Seconds to wait before resubscribing after an error
+        """
+        await subscribe_forever(
+            self.channel,
+            self._on_message,
+            get_redis,
+            on_subscribe=self._replay,
+            retry_delay=retry_delay,
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the number of tracked users and stale tokens seen."""
+        return {"tracked_users": len(self.versions), "stale_tokens": self.stale_tokens}
+
+
+token_revocations = TokenRevocations(
+    channel=settings.token_revocation_channel,
+    log_key=settings.token_revocation_log_key,
+    window=settings.access_token_expire_minutes * 60,
+)
+register_metrics("token_revocations", token_revocations.metrics)
@@ -0,0 +1,205 @@
+"""
+Two-tier User Cache.
+
+Authenticated requests look the current user up by email. The first tier is
+an in-process ``TTLCache`` so most requests need no network hop; the second
+tier is Redis (``user:{email}`` with a TTL), shared by every worker; the
+database is the fallback.
+
+When a user changes (avatar, role, password), ``invalidate`` deletes the
+Redis key and publishes the email on a pub/sub channel. Every worker runs
+``listen`` in the background and drops its local entry on each message. The
+short local TTL bounds staleness if a worker misses messages while its
+subscription is reconnecting.
+
+``invalidate`` also bumps a per-user generation key in Redis. A caller that
+loads a user from the database takes a :meth:`UserCache.generation`
+snapshot first and passes it to ``set``; the write is skipped if the user
+was invalidated in between, so a request that read the user before a role
+change or deactivation cannot put the old row back into the cache.
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from src.conf.config import settings
+from src.services.metrics import register_metrics
+from src.services.pubsub import subscribe_forever
+from src.services.redis_client import get_redis
+from src.utils.ttl_cache import TTLCache
+
+USER_CACHE_FIELDS = ("id", "email", "username", "avatar", "role")
+
+# Writes the entry only if the user's generation is still the one the
+# caller saw before reading the database
+SET_IF_GENERATION_LUA = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+def user_cache_key(email: str) -> str:
+    """Return the Redis key of a cached user."""
+    return f"user:{email}"
+
+
+def user_generation_key(email: str) -> str:
+    """Return the Redis key of a user's invalidation counter."""
+    return f"user-gen:{email}"
+
+
+def user_to_cache(user: Any) -> Dict[str, Any]:
+    """Return the cached representation of a user."""
+    return {field: getattr(user, field) for field in USER_CACHE_FIELDS}
+
+
+class UserCache:
+    """In-process LRU in front of Redis with pub/sub invalidation.
+
+    Args:
+        local_size: Maximum number of users cached in process
+        local_ttl: Lifetime of an in-process entry in seconds
+        redis_ttl: Lifetime of a Redis entry in seconds
+        channel: Pub/sub channel carrying invalidated emails
+    """
+
+    def __init__(self, local_size: int, local_ttl: float, redis_ttl: int, channel: str):
+        self.local = TTLCache[Dict[str, Any]](local_size, local_ttl)
+        self.redis_ttl = redis_ttl
+        self.channel = channel
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+        self.stale_writes_skipped = 0
+        # Bumped on every invalidation so a Redis read that raced with it
+        # does not repopulate the local tier with the old value.
+        self._generation = 0
+
+    async def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """Return cached user data, trying the local tier, then Redis.
+
+        Args:
+            email: User email
+
+        Returns:
+            Cached user fields, or None on a miss in both tiers
+        """
+        data = self.local.get(email)
+        if data is not None:
+            return data
+
+        generation = self._generation
+        redis = await get_redis()
+        raw = await redis.get(user_cache_key(email))
+        if not raw:
+            self.redis_misses += 1
+            return None
+        self.redis_hits += 1
+        data = json.loads(raw)
+        if generation == self._generation:
+            self.local.set(email, data)
+        return data
+
+    async def generation(self, email: str) -> Tuple[int, str]:
+        """Snapshot the user's invalidation state; take it before reading the database.
+
+        Args:
+            email: User email
+
+        Returns:
+            Opaque token to pass to :meth:`set`
+        """
+        local = self._generation
+        redis = await get_redis()
+        return local, await redis.get(user_generation_key(email)) or ""
+
+    async def set(self, user: Any, generation: Optional[Tuple[int, str]] = None) -> None:
+        """Store a user in both tiers.
+
+        Args:
+            user: User model (or any object with the cached fields)
+            generation: Snapshot from :meth:`generation` taken before the
+                user was read; if the user has been invalidated since, nothing
+                is written
+        """
+        data = user_to_cache(user)
+        redis = await get_redis()
+        raw = json.dumps(data)
+        if generation is None:
+            await redis.set(user_cache_key(user.email), raw, ex=self.redis_ttl)
+        else:
+            local, remote = generation
+            written = await redis.eval(
+                SET_IF_GENERATION_LUA, 2,
+                user_cache_key(user.email), user_generation_key(user.email),
+                remote, raw, self.redis_ttl,
+            )
+            if not written or local != self._generation:
+                self.stale_writes_skipped += 1
+                return
+        self.local.set(user.email, data)
+
+    async def invalidate(self, email: str) -> None:
+        """Drop a user from both tiers here and in every other worker.
+
+        Args:
+            email: Email of the changed user
+        """
+        self._drop_local(email)
+        redis = await get_redis()
+        generation_key = user_generation_key(email)
+        await redis.incr(generation_key)
+        await redis.expire(generation_key, self.redis_ttl)
+        await redis.delete(user_cache_key(email))
+        await redis.publish(self.channel, email)
+        self.invalidations_sent += 1
+
+    def _drop_local(self, email: str) -> None:
+        self._generation += 1
+        self.local.pop(email)
+
+    def _on_invalidation(self, email: str) -> None:
+        self._drop_local(email)
+        self.invalidations_received += 1
+
+    async def _on_subscribe(self, redis) -> None:
+        # Anything cached before the subscription may be stale
+        self.local.clear()
+
+    async def listen(self, retry_delay: float = 1.0) -> None:
+        """Consume invalidation messages until cancelled, reconnecting on errors.
+
+        Args:
+            retry_delay: Seconds to wait before resubscribing after an error
+        """
+        await subscribe_forever(
+            self.channel,
+            self._on_invalidation,
+            get_redis,
+            on_subscribe=self._on_subscribe,
+            retry_delay=retry_delay,
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return hit/miss counters of both tiers."""
+        return {
+            "local": self.local.stats(),
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "invalidations_sent": self.invalidations_sent,
+            "invalidations_received": self.invalidations_received,
+            "stale_writes_skipped": self.stale_writes_skipped,
+        }
+
+
+user_cache = UserCache(
+    local_size=settings.user_cache_local_size,
+    local_ttl=settings.user_cache_local_ttl,
+    redis_ttl=settings.user_cache_redis_ttl,
+    channel=settings.user_cache_channel,
+)
+register_metrics("user_cache", user_cache.metrics)
@@ -1,5 +1,8 @@
+import calendar
 from datetime import datetime, date, timedelta
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 
 def convert_birthday(birthday_str: str) -> date:
@@ -68,11 +71,137 @@ def days_to_birthday(birthday: date) -> int:
         Количество дней до следующего дня рождения
     """
     today = date.today()
-    next_birthday = date(today.year, birthday.month, birthday.day)
+    next_birthday = _birthday_in_year(birthday, today.year)
     
     # Если день рождения в этом году уже прошел, берем следующий год
     if next_birthday < today:
-        next_birthday = date(today.year + 1, birthday.month, birthday.day)
+        next_birthday = _birthday_in_year(birthday, today.year + 1)
     
     delta = next_birthday - today
-    return delta.days 
\ No newline at end of file
+    return delta.days
+
+
+def _birthday_in_year(birthday: date, year: int) -> date:
+    """День рождения в заданном году; 29 февраля в невисокосный год - 28 февраля."""
+    if birthday.month == 2 and birthday.day == 29 and not calendar.isleap(year):
+        return date(year, 2, 28)
+    return date(year, birthday.month, birthday.day) 
+
+def birthday_key(birthday: date) -> int:
+    """
+    Возвращает ключ ежегодного повторения дня рождения в формате MMDD.
+
+    Ключ не зависит от года, поэтому по нему можно строить индекс
+    и искать дни рождения в заданном окне дат.
+
+    Args:
+        birthday: Дата рождения (date или datetime)
+
+    Returns:
+        Целое число month * 100 + day, например 1231 для 31 декабря
+    """
+    return birthday.month * 100 + birthday.day
+
+
+def birthday_window_ranges(start: date, days: int) -> List[Tuple[int, int]]:
+    """
+    Возвращает диапазоны ключей MMDD, покрывающие окно [start, start + days].
+
+    Окно включает сегодняшний день и ``days`` следующих дней. Обычно это один
+    диапазон; если окно переходит через новый год (декабрь -> январь), их
+    два. Каждый диапазон - это одно сканирование индекса по ``BETWEEN``.
+    В невисокосный год день рождения 29 февраля отмечается 28 февраля,
+    поэтому окно, заканчивающееся 28 февраля, включает и ключ 229.
+
+    Args:
+        start: Первый день окна
+        days: Число дней после start (0 - только start)
+
+    Returns:
+        Список пар (первый ключ, последний ключ) в порядке наступления
+    """
+    if days >= 365:
+        return [(101, 1231)]
+    end = start + timedelta(days=days)
+    start_key, end_key = birthday_key(start), birthday_key(end)
+    if end_key == 228 and not calendar.isleap(end.year):
+        end_key = 229
+    if end.year == start.year:
+        return [(start_key, end_key)]
+    return [(start_key, 1231), (101, end_key)]
+
+
+def to_datetime64(birthdays: Union[np.ndarray, Sequence[str], Sequence[date]]) -> np.ndarray:
+    """
+    Приводит массив дат к numpy.datetime64[D].
+
+    ISO-строки (YYYY-MM-DD) разбираются самим NumPy, без построчного strptime.
+
+    Args:
+        birthdays: Массив datetime64, последовательность ISO-строк или объектов date
+
+    Returns:
+        Массив numpy.datetime64[D]
+
+    Raises:
+        ValueError: Если хотя бы одна строка имеет неправильный формат
+    """
+    return np.asarray(birthdays, dtype="datetime64[D]")
+
+
+def days_to_birthday_batch(
+    birthdays: Union[np.ndarray, Sequence[str], Sequence[date]],
+    today: Optional[date] = None,
+) -> np.ndarray:
+    """
+    Векторная версия days_to_birthday для массива дат рождения.
+
+    29 февраля в невисокосный год отмечается 28 февраля, как и в
+    days_to_birthday. Массив не должен содержать NaT.
+
+    Args:
+        birthdays: Массив datetime64, последовательность ISO-строк или объектов date
+        today: Дата отсчета (по умолчанию сегодня)
+
+    Returns:
+        Массив int64 с количеством дней до следующего дня рождения
+    """
+    dates = to_datetime64(birthdays)
+    today64 = np.datetime64(today or date.today(), "D")
+
+    # Номер месяца (0-11) и дня (0-30) без учета года
+    months = dates.astype("datetime64[M]")
+    month_index = months - months.astype("datetime64[Y]").astype("datetime64[M]")
+    day_index = dates - months.astype("datetime64[D]")
+
+    def occurrence(year: np.datetime64) -> np.ndarray:
+        month_start = year.astype("datetime64[M]") + month_index
+        month_length = (month_start + 1).astype("datetime64[D]") - month_start.astype("datetime64[D]")
+        # 29 февраля в невисокосный год сдвигается на последний день месяца
+        day = np.minimum(day_index, month_length - 1)
+        return month_start.astype("datetime64[D]") + day
+
+    this_year = today64.astype("datetime64[Y]")
+    next_birthday = occurrence(this_year)
+    passed = next_birthday < today64
+    next_birthday[passed] = occurrence(this_year + 1)[passed]
+    return (next_birthday - today64).astype(np.int64)
+
+
+def upcoming_birthdays_mask(
+    birthdays: Union[np.ndarray, Sequence[str], Sequence[date]],
+    days: int = 7,
+    today: Optional[date] = None,
+) -> np.ndarray:
+    """
+    Векторная проверка попадания дней рождения в ближайшие n дней.
+
+    Args:
+        birthdays: Массив datetime64, последовательность ISO-строк или объектов date
+        days: Количество дней для проверки (по умолчанию 7)
+        today: Дата отсчета (по умолчанию сегодня)
+
+    Returns:
+        Булев массив: True, если день рождения наступит в течение days дней
+    """
+    return days_to_birthday_batch(birthdays, today) <= days
@@ -0,0 +1,74 @@
+"""
+Entity tag helpers for conditional requests.
+
+Contact ETags are strong and derived from version counters rather than
+from the response body, so a conditional request can be answered from a
+single version lookup without loading or serializing any rows:
+
+- ``"c<id>.<version>"`` for a contact, from its per-row ``version``
+- ``"l<user_id>.<generation>"`` for a user's contact lists, from the
+  contact cache generation bumped after every contact write
+"""
+
+import re
+from typing import List, Optional, Set
+
+
+def contact_etag(contact_id: int, version: int) -> str:
+    """Return the ETag of one version of a contact."""
+    return f'"c{contact_id}.{version}"'
+
+
+def collection_etag(user_id: int, version: int) -> str:
+    """Return the ETag of a user's contact lists at a cache generation."""
+    return f'"l{user_id}.{version}"'
+
+
+def parse_etags(header: Optional[str]) -> List[str]:
+    """Split an ``If-Match`` / ``If-None-Match`` header into entity tags.
+
+    Args:
+        header: Header value, e.g. ``"a", W/"b"`` or ``*``
+
+    Returns:
+        List of tags as sent, weak tags keeping their ``W/`` prefix
+    """
+    if not header:
+        return []
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """Return True if ``If-None-Match`` matches, i.e. a GET may answer 304.
+
+    Uses the weak comparison required for ``If-None-Match``.
+    """
+    for tag in parse_etags(header):
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def if_match_versions(header: Optional[str], contact_id: int) -> Optional[Set[int]]:
+    """Return the contact versions an ``If-Match`` header accepts.
+
+    ``If-Match`` uses strong comparison, so weak tags never match.
+
+    Args:
+        header: ``If-Match`` header value
+        contact_id: Contact the request targets
+
+    Returns:
+        None if any version is acceptable (no header or ``*``), otherwise
+        the set of acceptable versions, which may be empty
+    """
+    tags = parse_etags(header)
+    if not tags or "*" in tags:
+        return None
+    prefix = f'"c{contact_id}.'
+    versions = set()
+    for tag in tags:
+        # ASCII digits only: str.isdigit() also accepts e.g. "²", which int() rejects
+        if tag.startswith(prefix) and tag.endswith('"') and re.fullmatch(r"[0-9]+", tag[len(prefix):-1]):
+            versions.add(int(tag[len(prefix):-1]))
+    return versions
@@ -0,0 +1,50 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token that encodes the sort mode and the
+``(sort key, id)`` tuple of the last row on the previous page. The next page
+is then fetched with a row-value comparison against that tuple instead of an
+``OFFSET``, so the database never has to scan and discard earlier rows.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List, Tuple
+
+
+def encode_cursor(sort: str, key: List[Any]) -> str:
+    """Encode a sort mode and the last row's key tuple into an opaque cursor.
+
+    Args:
+        sort: Name of the sort mode the page was produced with
+        key: Values of the sort columns of the last row, ending with its id
+
+    Returns:
+        URL-safe cursor string without padding
+    """
+    raw = json.dumps({"s": sort, "k": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, List[Any]]:
+    """Decode a cursor produced by :func:`encode_cursor`.
+
+    Args:
+        cursor: Cursor string received from the client
+
+    Returns:
+        Tuple of the sort mode and the key values
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort, key = data["s"], data["k"]
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(sort, str) or not isinstance(key, list):
+        raise ValueError("Invalid cursor")
+    return sort, key
@@ -19,13 +19,17 @@ from fastapi.testclient import TestClient
 
 from src.database.models import Base, User, Contact
 from src.database.models import Base, User
-from src.database.db import get_db
+from src.database.db import get_db, get_session_factory
 from src.conf.config import settings
 from main import app as main_app
-from src.services.auth import get_current_user
+from src.services.auth import get_current_user, get_token_user
 from tests.test_integration_utils import mock_get_current_user, mock_read_me
 from src.api.auth import read_me as original_read_me
 from src.services.redis_client import redis_client
+from src.services.user_cache import user_cache
+from src.auth.jwt_utils import verified_token_cache
+from src.services.rate_limiter import get_rate_limit_redis
+from src.services.contact_cache import contact_cache
 
 # Use SQLite in-memory for tests
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -63,6 +67,34 @@ def override_settings_database_url():
     with patch.object(settings.__class__, 'database_url', new=DATABASE_URL):
         yield
 
+@pytest.fixture(scope="session", autouse=True)
+def override_rate_limit_storage():
+    """Keep rate-limit buckets in an in-process fakeredis during tests"""
+    with patch.object(settings, "rate_limit_storage", "fakeredis"):
+        yield
+
+@pytest.fixture(scope="session", autouse=True)
+def override_contact_cache_redis():
+    """Keep the contact cache in the same fakeredis as the rate limiter"""
+    with patch.object(contact_cache, "get_client", get_rate_limit_redis):
+        yield
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_rate_limits():
+    """Start every test with full rate-limit buckets and an empty contact cache"""
+    redis = await get_rate_limit_redis()
+    await redis.flushall()
+    yield
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Start every test with empty in-process user and token caches"""
+    user_cache.local.clear()
+    verified_token_cache.clear()
+    yield
+    user_cache.local.clear()
+    verified_token_cache.clear()
+
 @pytest_asyncio.fixture(scope="session", autouse=True)
 async def prepare_database():
     """Prepare test database"""
@@ -133,7 +165,9 @@ def app():
     """Returns application instance with overriden dependencies"""
     app = main_app
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
     app.dependency_overrides[get_current_user] = mock_get_current_user
+    app.dependency_overrides[get_token_user] = mock_get_current_user
     app.dependency_overrides[original_read_me] = mock_read_me
     return app
 
@@ -0,0 +1,77 @@
+"""Minimal local SMTP server that keeps every accepted message in memory."""
+import asyncio
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from typing import List
+
+
+class SMTPSink:
+    """Accepts any AUTH PLAIN login and stores delivered messages.
+
+    Set ``fail_next`` to answer the next DATA command with a transient 451.
+    """
+
+    def __init__(self):
+        self.messages: List[EmailMessage] = []
+        self.fail_next = 0
+        self.connections = 0
+        self.port = None
+        self._server = None
+        self._writers = set()
+
+    async def start(self) -> "SMTPSink":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self):
+        """Close every client connection, like a server dropping idle sessions."""
+        for writer in list(self._writers):
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+
+        self.connections += 1
+        self._writers.add(writer)
+        reply("220 sink ESMTP")
+        try:
+            while line := await reader.readline():
+                command = line.decode().strip().upper()
+                if command.startswith("EHLO"):
+                    reply("250-sink")
+                    reply("250 AUTH PLAIN")
+                elif command.startswith("HELO"):
+                    reply("250 sink")
+                elif command.startswith("AUTH"):
+                    reply("235 2.7.0 Authentication successful")
+                elif command.startswith("DATA"):
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    data = b""
+                    while (chunk := await reader.readline()) != b".\r\n":
+                        data += chunk[1:] if chunk.startswith(b"..") else chunk
+                    if self.fail_next:
+                        self.fail_next -= 1
+                        reply("451 4.3.0 Try again later")
+                    else:
+                        self.messages.append(message_from_bytes(data, policy=policy.default))
+                        reply("250 OK")
+                elif command.startswith("QUIT"):
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("250 OK")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError
 
 from src.auth.handlers import create_user, authenticate_user, get_current_user
+from src.auth.hashing import DUMMY_PASSWORD_HASH
 from src.database.models import User
 
 
@@ -197,6 +198,26 @@ class TestAuthHandlers:
         assert exc_info.value.status_code == 401
         assert exc_info.value.detail == "Invalid credentials"
 
+    @pytest.mark.asyncio
+    async def test_authenticate_user_not_found_runs_dummy_verify(self):
+        """Тест: для несуществующего пользователя выполняется такая же проверка bcrypt"""
+        mock_result = MagicMock()
+        mock_result.scalar.return_value = None
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.execute.return_value = mock_result
+
+        with patch("src.auth.handlers.verify_password") as mock_verify:
+            mock_verify.return_value = True
+            with pytest.raises(HTTPException) as exc_info:
+                await authenticate_user(
+                    email="nonexistent@example.com",
+                    password="password123",
+                    db=mock_db
+                )
+
+        assert exc_info.value.status_code == 401
+        mock_verify.assert_called_once_with("password123", DUMMY_PASSWORD_HASH)
+
     @pytest.mark.asyncio
     async def test_get_current_user_success(self):
         """Тест успешного получения текущего пользователя"""
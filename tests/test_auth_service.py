@@ -1,14 +1,21 @@
 import json
+import time
+from datetime import timedelta
+
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 
 from fastapi import HTTPException, status
-from jose import JWTError
+from jose import JWTError, jwt as jose_jwt
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-from src.services.auth import get_current_user
+from src.auth.jwt_utils import (ACCESS_CLAIMS_VERSION, create_access_token, create_token,
+                                create_user_access_token, decode_token, verified_token_cache)
+from src.auth.principal import CurrentUser
+from src.services.auth import get_current_db_user, get_current_user, get_token_user
+from src.services.token_revocation import token_revocations
 from src.database.models import User
 from src.conf.config import settings
 
@@ -46,7 +53,7 @@ class TestAuthService:
             )
             
             # Setup Redis mock
-            with patch("src.services.auth.get_redis") as mock_get_redis:
+            with patch("src.services.user_cache.get_redis") as mock_get_redis:
                 mock_redis = AsyncMock()
                 mock_redis.get.return_value = None  # No cache
                 mock_get_redis.set = AsyncMock()  # Mock for set method
@@ -81,7 +88,7 @@ class TestAuthService:
             mock_decode.return_value = {"sub": "test@example.com"}
             
             # Mock Redis
-            with patch("src.services.auth.get_redis") as mock_get_redis:
+            with patch("src.services.user_cache.get_redis") as mock_get_redis:
                 # Setup Redis mock with data in cache
                 mock_redis = AsyncMock()
                 cached_user = {
@@ -105,6 +112,8 @@ class TestAuthService:
                 assert user is not None
                 assert user.email == "test@example.com"
                 assert user.username == "testuser"
+                assert isinstance(user, CurrentUser)
+                mock_session.execute.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_get_current_user_invalid_token(self):
@@ -134,7 +143,7 @@ class TestAuthService:
             mock_decode.return_value = {"sub": "nonexistent@example.com"}
             
             # Setup Redis mock
-            with patch("src.services.auth.get_redis") as mock_get_redis:
+            with patch("src.services.user_cache.get_redis") as mock_get_redis:
                 mock_redis = AsyncMock()
                 mock_redis.get.return_value = None  # No cache
                 mock_get_redis.return_value = mock_redis
@@ -191,4 +200,139 @@ class TestAuthService:
                 
                 # Check result
                 assert user is not None
-                assert user.email == "test_user@example.com" 
\ No newline at end of file
+                assert user.email == "test_user@example.com" 
+
+    def test_current_user_is_immutable(self):
+        """Test that the principal is a slotted, frozen value"""
+        principal = CurrentUser(id=1, email="test@example.com", username="testuser")
+
+        assert not hasattr(principal, "__dict__")
+        with pytest.raises(AttributeError):
+            principal.role = "admin"
+
+    @pytest.mark.asyncio
+    async def test_get_current_db_user(self):
+        """Test loading the session-bound user of the principal"""
+        principal = CurrentUser(id=1, email="test@example.com", username="testuser")
+        db_user = User(id=1, email="test@example.com", username="testuser", password="hashedpass")
+        mock_session = AsyncMock()
+        mock_session.get.return_value = db_user
+
+        assert await get_current_db_user(principal, mock_session) is db_user
+        mock_session.get.assert_awaited_once_with(User, 1)
+
+    @pytest.mark.asyncio
+    async def test_get_current_db_user_deleted(self):
+        """Test that a principal whose user was deleted is rejected"""
+        principal = CurrentUser(id=1, email="test@example.com", username="testuser")
+        mock_session = AsyncMock()
+        mock_session.get.return_value = None
+
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_db_user(principal, mock_session)
+        assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestStatelessTokens:
+    """Tests for access tokens carrying uid/role/token_version claims"""
+
+    @staticmethod
+    def make_user(token_version=0):
+        return User(id=101, email="stateless@example.com", username="stateless",
+                    password="hashedpass", role="admin", token_version=token_version)
+
+    @staticmethod
+    def make_token(user):
+        with patch.object(settings, "stateless_access_tokens", True):
+            return create_user_access_token(user)
+
+    def test_claims_only_when_enabled(self):
+        """Test that uid/role claims are opt-in"""
+        user = self.make_user(token_version=3)
+        claims = decode_token(self.make_token(user))
+        assert claims["uid"] == 101
+        assert claims["role"] == "admin"
+        assert claims["token_version"] == 3
+        assert claims["cv"] == ACCESS_CLAIMS_VERSION
+
+        legacy = decode_token(create_user_access_token(user))
+        assert "uid" not in legacy
+
+    @pytest.mark.asyncio
+    async def test_get_token_user_trusts_claims(self):
+        """Test that a fresh stateless token needs no lookup"""
+        token = self.make_token(self.make_user())
+        mock_session = AsyncMock()
+
+        with patch("src.services.user_cache.get_redis") as mock_get_redis:
+            principal = await get_token_user(token, mock_session)
+
+        assert principal == CurrentUser(id=101, email="stateless@example.com",
+                                        username="stateless", role="admin")
+        mock_get_redis.assert_not_called()
+        mock_session.execute.assert_not_called()
+        mock_session.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stale_token_is_revoked(self):
+        """Test that a token older than an announced version is checked and rejected"""
+        token = self.make_token(self.make_user(token_version=0))
+        mock_session = AsyncMock()
+        mock_session.get.return_value = self.make_user(token_version=1)
+
+        token_revocations._record(101, 1)
+        try:
+            for dependency in (get_token_user, get_current_user):
+                with pytest.raises(HTTPException) as exc_info:
+                    await dependency(token, mock_session)
+                assert exc_info.value.detail == "Token revoked"
+        finally:
+            token_revocations.versions.pop(101)
+
+    @pytest.mark.asyncio
+    async def test_stale_token_accepted_when_version_matches(self):
+        """Test that the lookup accepts a token matching the stored version"""
+        token = self.make_token(self.make_user(token_version=2))
+        mock_session = AsyncMock()
+        mock_session.get.return_value = self.make_user(token_version=2)
+
+        token_revocations._record(101, 3)
+        try:
+            principal = await get_token_user(token, mock_session)
+        finally:
+            token_revocations.versions.pop(101)
+
+        assert principal.id == 101
+        mock_session.get.assert_awaited_once_with(User, 101)
+
+
+class TestVerifiedTokenCache:
+    """Tests for the verified-token cache behind decode_token"""
+
+    def test_repeated_decode_verifies_once(self):
+        """Test that a reused token is verified only once"""
+        token = create_access_token({"sub": "cached@example.com"})
+
+        with patch("src.auth.jwt_utils.jose_jwt.decode", wraps=jose_jwt.decode) as mock_decode:
+            first = decode_token(token)
+            second = decode_token(token)
+
+        assert first == second
+        assert first is not second
+        mock_decode.assert_called_once()
+
+    def test_entry_expires_with_token(self):
+        """Test that cached claims never outlive the token's exp"""
+        token = create_token({"sub": "short@example.com"}, timedelta(seconds=30))
+        decode_token(token)
+
+        (expires, _), = verified_token_cache._data.values()
+        assert expires <= time.monotonic() + 30
+
+    def test_token_without_exp_not_cached(self):
+        """Test that tokens without exp are never cached"""
+        token = jose_jwt.encode({"sub": "forever@example.com"}, settings.secret_key,
+                                algorithm=settings.algorithm)
+        decode_token(token)
+
+        assert len(verified_token_cache) == 0
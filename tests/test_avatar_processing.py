@@ -0,0 +1,122 @@
+import io
+import threading
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from src.services.avatar_processing import (AvatarProcessor, InvalidImage, render_avatar,
+                                            sniff_image_format)
+
+
+def make_image(fmt="JPEG", size=(1200, 800), mode="RGB", color=(200, 30, 30), **save_kwargs):
+    out = io.BytesIO()
+    image = Image.new(mode, size, color)
+    # Some detail so the encoders have work to do
+    for x in range(0, size[0], 7):
+        image.putpixel((x, x % size[1]), (0, 0, 0) if mode == "RGB" else (0, 0, 0, 255))
+    image.save(out, fmt, **save_kwargs)
+    out.seek(0)
+    return out
+
+
+def decode(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+@pytest.mark.parametrize("fmt", ["JPEG", "PNG", "GIF", "WEBP"])
+def test_sniff_accepted_formats(fmt):
+    data = make_image(fmt, size=(20, 20)).read(12)
+
+    assert sniff_image_format(data) == fmt
+
+
+def test_sniff_rejects_other_content():
+    assert sniff_image_format(b"<html><body>") is None
+    assert sniff_image_format(b"RIFF\x00\x00\x00\x00WAVE") is None
+
+
+def test_render_resizes_to_square_webp_variants():
+    original = make_image(size=(1200, 800), quality=95)
+    original_size = len(original.getvalue())
+
+    result = render_avatar(original, [256, 128, 64], "webp", quality=80)
+
+    assert result.content_type == "image/webp"
+    assert sorted(result.variants) == [64, 128, 256]
+    for size, data in result.variants.items():
+        image = decode(data)
+        assert image.format == "WEBP"
+        assert image.size == (size, size)
+    assert result.original_bytes == original_size
+    assert result.bytes_saved == original_size - result.output_bytes
+    assert result.bytes_saved > 0
+
+
+def test_render_jpeg_flattens_alpha_and_never_upscales():
+    original = make_image("PNG", size=(100, 150), mode="RGBA", color=(0, 0, 255, 0))
+
+    result = render_avatar(original, [256, 64], "jpeg", quality=85)
+
+    assert result.content_type == "image/jpeg"
+    large = decode(result.variants[256])
+    assert large.format == "JPEG"
+    assert large.mode == "RGB"
+    assert large.size == (100, 100)
+    assert decode(result.variants[64]).size == (64, 64)
+
+
+def test_render_strips_metadata():
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    original = make_image(size=(400, 400), exif=exif)
+
+    result = render_avatar(original, [128], "jpeg")
+
+    assert not decode(result.variants[128]).getexif()
+
+
+def test_content_type_is_not_trusted():
+    with pytest.raises(InvalidImage):
+        render_avatar(io.BytesIO(b"#!/bin/sh\necho not an image\n"), [64])
+
+
+def test_corrupt_image_with_valid_magic_rejected():
+    truncated = io.BytesIO(make_image().getvalue()[:200])
+
+    with pytest.raises(InvalidImage):
+        render_avatar(truncated, [64])
+
+
+def test_oversized_dimensions_rejected():
+    with pytest.raises(InvalidImage):
+        render_avatar(make_image("PNG", size=(300, 300)), [64], max_pixels=300 * 299)
+
+
+@pytest.mark.asyncio
+async def test_processor_runs_on_pool_and_reports_bytes_saved():
+    processor = AvatarProcessor(max_workers=1, sizes=[128, 64])
+    threads = []
+
+    def recording_render(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return render_avatar(*args, **kwargs)
+
+    with patch("src.services.avatar_processing.render_avatar", side_effect=recording_render):
+        result = await processor.process(make_image(quality=95))
+        with pytest.raises(InvalidImage):
+            await processor.process(io.BytesIO(b"not an image"))
+
+    assert threads[0].startswith("avatar-process")
+    metrics = processor.metrics()
+    assert metrics["processed"] == 1
+    assert metrics["invalid"] == 1
+    assert metrics["bytes_saved"] == result.bytes_saved
+    assert metrics["in_flight"] == 0
+
+
+def test_unknown_output_format_rejected():
+    with pytest.raises(ValueError):
+        AvatarProcessor(max_workers=1, output_format="bmp")
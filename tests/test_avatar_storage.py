@@ -0,0 +1,68 @@
+import io
+from unittest.mock import patch
+
+import cloudinary.exceptions
+import pytest
+
+from src.services import avatar_storage
+from src.services.avatar_storage import (AvatarStorage, CloudinaryStorage, LocalStorage,
+                                         S3Storage, get_avatar_storage)
+
+
+def test_local_storage_saves_and_finds_objects(tmp_path):
+    storage = LocalStorage(str(tmp_path), "http://testserver/media/")
+
+    assert storage.exists("avatars/abc", "image/png") is None
+    url = storage.save(io.BytesIO(b"png bytes"), "avatars/abc", "image/png")
+
+    assert url == "http://testserver/media/avatars/abc.png"
+    assert (tmp_path / "avatars" / "abc.png").read_bytes() == b"png bytes"
+    assert storage.exists("avatars/abc", "image/png") == url
+    # No temporary files are left behind
+    assert [p.name for p in (tmp_path / "avatars").iterdir()] == ["abc.png"]
+
+
+def test_cloudinary_is_configured_on_first_use():
+    with patch("cloudinary.config") as mock_config:
+        storage = CloudinaryStorage("cloud", "key", "secret")
+        mock_config.assert_not_called()
+
+        with patch("cloudinary.api.resource", side_effect=cloudinary.exceptions.NotFound):
+            assert storage.exists("avatars/abc", "image/png") is None
+        with patch("cloudinary.uploader.upload", return_value={"secure_url": "https://c/abc"}):
+            assert storage.save(io.BytesIO(b"x"), "avatars/abc", "image/png") == "https://c/abc"
+
+    mock_config.assert_called_once_with(
+        cloud_name="cloud", api_key="key", api_secret="secret", secure=True
+    )
+
+
+def test_backend_selected_by_settings(tmp_path):
+    get_avatar_storage.cache_clear()
+    try:
+        with patch.object(avatar_storage.settings, "avatar_storage", "local"), \
+                patch.object(avatar_storage.settings, "avatar_local_dir", str(tmp_path)):
+            storage = get_avatar_storage()
+        assert isinstance(storage, LocalStorage)
+        assert storage.root == tmp_path
+    finally:
+        get_avatar_storage.cache_clear()
+
+
+def test_s3_storage_requires_boto3():
+    try:
+        import boto3  # noqa: F401
+    except ImportError:
+        with pytest.raises(RuntimeError, match="boto3"):
+            S3Storage(bucket="avatars")
+    else:
+        pytest.skip("boto3 is installed")
+
+
+def test_incomplete_backend_cannot_be_created():
+    class SaveOnly(AvatarStorage):
+        def save(self, fileobj, key, content_type):
+            return key
+
+    with pytest.raises(TypeError):
+        SaveOnly()
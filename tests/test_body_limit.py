@@ -0,0 +1,61 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.services.body_limit import BodySizeLimitMiddleware, max_body_size
+
+app = FastAPI()
+app.add_middleware(BodySizeLimitMiddleware)
+
+
+@app.post("/small")
+@max_body_size(10)
+async def small(request: Request):
+    return {"size": len(await request.body())}
+
+
+@app.post("/unlimited")
+async def unlimited(request: Request):
+    return {"size": len(await request.body())}
+
+
+limit_client = TestClient(app)
+
+
+def test_body_within_limit_passes():
+    response = limit_client.post("/small", content=b"x" * 10)
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 10}
+
+
+def test_declared_length_over_limit_rejected_before_reading():
+    response = limit_client.post("/small", content=b"x" * 11)
+
+    assert response.status_code == 413
+
+
+def test_streamed_body_over_limit_rejected():
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 4
+
+    response = limit_client.post("/small", content=chunks())
+
+    assert response.status_code == 413
+
+
+def test_routes_without_limit_are_untouched():
+    response = limit_client.post("/unlimited", content=b"x" * 1000)
+
+    assert response.status_code == 200
+
+
+def test_avatar_route_rejects_oversized_upload(client):
+    from src.conf.config import settings
+
+    response = client.post(
+        "/api/auth/avatar",
+        files={"file": ("avatar.png", b"x" * (settings.avatar_max_bytes + 32 * 1024), "image/png")},
+    )
+
+    assert response.status_code == 413
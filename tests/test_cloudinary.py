@@ -1,11 +1,27 @@
+import asyncio
+import hashlib
+import threading
+
+import cloudinary.exceptions
+
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import tempfile
 import io
 import uuid
 
-from src.services.cloudinary_service import upload_avatar
+from src.services.cloudinary_service import (
+    AvatarTooLarge,
+    AvatarUploader,
+    AvatarUploadOverloaded,
+    upload_avatar,
+)
 from fastapi import UploadFile
+from PIL import Image
+
+from src.conf.config import settings
+from src.services.avatar_processing import InvalidImage
+from src.services.avatar_storage import AvatarStorage
 
 
 @pytest.mark.asyncio
@@ -13,34 +29,165 @@ async def test_upload_avatar():
     """
     Тест загрузки аватара в Cloudinary
     """
-    # Создаем временный файл для тестирования
+    # Создаем тестовое изображение во временном файле
     with tempfile.NamedTemporaryFile(suffix=".jpg") as temp_file:
-        # Создаем тестовые данные
-        file_content = b"test image content"
-        temp_file.write(file_content)
+        Image.new("RGB", (600, 400), (10, 120, 200)).save(temp_file, "JPEG", quality=95)
         temp_file.flush()
         
-        # Создаем объект UploadFile
+        # Создаем объект UploadFile; тип содержимого клиента не учитывается
         file = MagicMock(spec=UploadFile)
         file.filename = "test_avatar.jpg"
+        file.content_type = "application/octet-stream"
+        file.file = temp_file
+        file.read = AsyncMock()
+        
+        def fake_upload(fileobj, public_id, **kwargs):
+            return {"secure_url": f"https://cloudinary.com/{public_id}"}
         
-        # Мокируем чтение файла
-        file.read = AsyncMock(return_value=file_content)
+        # Патчим cloudinary.uploader.upload; изображений еще нет в Cloudinary
+        with patch("cloudinary.uploader.upload", side_effect=fake_upload) as mock_upload, \
+                patch("cloudinary.api.resource", side_effect=cloudinary.exceptions.NotFound):
+            # Вызываем функцию загрузки аватара
+            result = await upload_avatar(file)
         
-        # Мокируем cloudinary.uploader.upload
-        mock_upload_result = {
-            "secure_url": "https://cloudinary.com/test_avatar.jpg"
-        }
+        # Загружается по одному уменьшенному WebP на каждый размер
+        assert mock_upload.call_count == len(settings.avatar_sizes)
+        assert sorted(result.variants) == sorted(settings.avatar_sizes)
+        assert result.url == result.variants[max(settings.avatar_sizes)]
+        assert result.bytes_saved > 0
+        assert not file.read.called
         
-        # Патчим функцию uuid4, чтобы она всегда возвращала один и тот же id
-        with patch("uuid.uuid4", return_value=uuid.UUID("00000000-0000-0000-0000-000000000000")):
-            # Патчим cloudinary.uploader.upload
-            with patch("cloudinary.uploader.upload", return_value=mock_upload_result):
-                # Вызываем функцию загрузки аватара
-                result = await upload_avatar(file)
-                
-                # Проверяем результат
-                assert result == "https://cloudinary.com/test_avatar.jpg"
-                
-                # Проверяем, что файл был прочитан
-                assert file.read.called 
\ No newline at end of file
+        # Ключ объекта строится по размеру и хешу содержимого
+        for call in mock_upload.call_args_list:
+            data = call.args[0].getvalue()
+            assert Image.open(io.BytesIO(data)).format == "WEBP"
+            digest = hashlib.sha256(data).hexdigest()
+            assert call.kwargs["public_id"].endswith(f"/{digest}")
+
+
+@pytest.mark.asyncio
+async def test_upload_avatar_rejects_non_image():
+    """
+    Тест: файл без сигнатуры изображения отклоняется, даже с типом image/jpeg
+    """
+    file = MagicMock(spec=UploadFile)
+    file.content_type = "image/jpeg"
+    file.file = io.BytesIO(b"<?php echo 'not an image'; ?>")
+    
+    with patch("cloudinary.uploader.upload") as mock_upload:
+        with pytest.raises(InvalidImage):
+            await upload_avatar(file)
+    
+    mock_upload.assert_not_called()
+
+
+class FakeStorage(AvatarStorage):
+    """Хранилище в памяти, запоминающее потоки, в которых оно вызывалось"""
+
+    def __init__(self, delay: threading.Event = None):
+        self.objects = {}
+        self.saves = 0
+        self.threads = []
+        self.delay = delay
+
+    def exists(self, key, content_type):
+        return self.objects.get(key)
+
+    def save(self, fileobj, key, content_type):
+        self.threads.append(threading.current_thread().name)
+        if self.delay is not None:
+            self.delay.wait()
+        self.saves += 1
+        self.objects[key] = f"https://cdn.example.com/{key}"
+        return self.objects[key]
+
+
+@pytest.mark.asyncio
+async def test_upload_runs_on_upload_pool():
+    """
+    Тест: загрузка выполняется в пуле потоков, а не в цикле событий
+    """
+    storage = FakeStorage()
+    uploader = AvatarUploader(max_workers=1, storage=storage)
+
+    result = await uploader.upload(io.BytesIO(b"image"), "image/png")
+
+    digest = hashlib.sha256(b"image").hexdigest()
+    assert result == f"https://cdn.example.com/avatars/{digest}"
+    assert storage.threads[0].startswith("avatar-upload")
+    metrics = uploader.metrics()
+    assert metrics["completed"] == 1
+    assert metrics["bytes"] == 5
+    assert metrics["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_identical_upload_is_deduplicated():
+    """
+    Тест: повторная загрузка того же изображения не передает файл снова
+    """
+    storage = FakeStorage()
+    uploader = AvatarUploader(max_workers=1, storage=storage)
+
+    first = await uploader.upload(io.BytesIO(b"same image"), "image/png")
+    second = await uploader.upload(io.BytesIO(b"same image"), "image/png")
+    other = await uploader.upload(io.BytesIO(b"other image"), "image/png")
+
+    assert first == second != other
+    assert storage.saves == 2
+    assert uploader.metrics()["deduplicated"] == 1
+
+    # Новый процесс без памяти о ключах находит объект в хранилище
+    fresh = AvatarUploader(max_workers=1, storage=storage)
+    assert await fresh.upload(io.BytesIO(b"same image"), "image/png") == first
+    assert storage.saves == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_lookup_falls_back_to_save():
+    """
+    Тест: ошибка проверки наличия объекта не мешает загрузке
+    """
+    storage = FakeStorage()
+    storage.exists = MagicMock(side_effect=cloudinary.exceptions.RateLimited("Rate Limit Exceeded"))
+    uploader = AvatarUploader(max_workers=1, storage=storage)
+
+    result = await uploader.upload(io.BytesIO(b"image"), "image/png")
+
+    assert result == f"https://cdn.example.com/avatars/{hashlib.sha256(b'image').hexdigest()}"
+    assert storage.saves == 1
+    assert uploader.metrics()["lookup_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_too_large():
+    """
+    Тест: слишком большой файл отклоняется до загрузки
+    """
+    storage = FakeStorage()
+    uploader = AvatarUploader(max_workers=1, max_bytes=4, storage=storage)
+
+    with pytest.raises(AvatarTooLarge):
+        await uploader.upload(io.BytesIO(b"image"), "image/png")
+
+    assert storage.saves == 0
+
+
+@pytest.mark.asyncio
+async def test_upload_queue_full():
+    """
+    Тест: при заполненной очереди загрузка отклоняется сразу
+    """
+    release = threading.Event()
+    uploader = AvatarUploader(max_workers=1, max_queue=1, storage=FakeStorage(delay=release))
+
+    running = asyncio.ensure_future(uploader.upload(io.BytesIO(b"a"), "image/png"))
+    waiting = asyncio.ensure_future(uploader.upload(io.BytesIO(b"b"), "image/png"))
+    await asyncio.sleep(0.05)
+    with pytest.raises(AvatarUploadOverloaded):
+        await uploader.upload(io.BytesIO(b"c"), "image/png")
+    release.set()
+    await asyncio.gather(running, waiting)
+
+    assert uploader.metrics()["rejected"] == 1
+    assert uploader.metrics()["completed"] == 2
@@ -0,0 +1,161 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import fakeredis
+import pytest
+import redis.asyncio as redis
+
+from src.services.contact_cache import ContactCache
+
+
+def make_cache(client=None, **kwargs):
+    client = client or fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def get_client():
+        return client
+
+    return ContactCache(get_client=get_client, **kwargs), client
+
+
+@pytest.mark.asyncio
+async def test_second_read_is_served_from_redis():
+    cache, _ = make_cache()
+    loader = AsyncMock(return_value=[{"id": 1}])
+
+    first = await cache.get_or_load(1, "list:0:10", loader)
+    second = await cache.get_or_load(1, "list:0:10", loader)
+
+    assert first == second == [{"id": 1}]
+    loader.assert_awaited_once()
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_bumps_generation_for_every_view():
+    cache, client = make_cache()
+    await cache.get_or_load(1, "list:0:10", AsyncMock(return_value=["old"]))
+    await cache.get_or_load(1, "item:5", AsyncMock(return_value={"id": 5}))
+    await cache.get_or_load(2, "list:0:10", AsyncMock(return_value=["other"]))
+
+    await cache.invalidate(1)
+
+    assert await cache.get_or_load(1, "list:0:10", AsyncMock(return_value=["new"])) == ["new"]
+    assert await cache.get_or_load(1, "item:5", AsyncMock(return_value=None)) is None
+    assert await cache.get_or_load(2, "list:0:10", AsyncMock(return_value=["changed"])) == ["other"]
+    assert await client.get(cache.generation_key(1)) == "1"
+    assert await cache.generation(1) == 1
+    assert await cache.generation(2) == 0
+    # Old entries are left to expire instead of being deleted
+    assert await client.exists(cache.entry_key(1, 0, "list:0:10"))
+
+
+@pytest.mark.asyncio
+async def test_result_loaded_before_a_write_is_not_served_after_it():
+    cache, _ = make_cache()
+    loading = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_loader():
+        loading.set()
+        await release.wait()
+        return ["stale"]
+
+    reader = asyncio.create_task(cache.get_or_load(1, "list:0:10", slow_loader))
+    await loading.wait()
+    await cache.invalidate(1)
+    release.set()
+    assert await reader == ["stale"]
+
+    assert await cache.get_or_load(1, "list:0:10", AsyncMock(return_value=["fresh"])) == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache, _ = make_cache()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [{"id": 1}]
+
+    results = await asyncio.gather(*(cache.get_or_load(1, "list:0:10", loader) for _ in range(10)))
+
+    assert calls == 1
+    assert all(result == [{"id": 1}] for result in results)
+    assert cache.metrics()["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_misses_in_other_workers_wait_for_the_lock_holder():
+    shared = fakeredis.FakeAsyncRedis(decode_responses=True)
+    first, _ = make_cache(shared)
+    second, _ = make_cache(shared)
+    other = AsyncMock(return_value=["duplicate"])
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return ["loaded"]
+
+    results = await asyncio.gather(
+        first.get_or_load(1, "list:0:10", slow),
+        second.get_or_load(1, "list:0:10", other),
+    )
+
+    assert results == [["loaded"], ["loaded"]]
+    other.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_loader_errors_reach_every_waiter_and_are_not_cached():
+    cache, _ = make_cache()
+
+    async def loader():
+        await asyncio.sleep(0.05)
+        raise ValueError("Invalid cursor")
+
+    results = await asyncio.gather(
+        *(cache.get_or_load(1, "page:id:10:x", loader) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert await cache.get_or_load(1, "page:id:10:x", AsyncMock(return_value=[])) == []
+
+
+@pytest.mark.asyncio
+async def test_fails_open_when_redis_is_down():
+    client = AsyncMock()
+    client.get.side_effect = redis.ConnectionError("down")
+    client.incr.side_effect = redis.ConnectionError("down")
+    cache, _ = make_cache(client)
+    loader = AsyncMock(return_value=["from db"])
+
+    assert await cache.get_or_load(1, "list:0:10", loader) == ["from db"]
+    assert await cache.generation(1) is None
+    await cache.invalidate(1)
+
+    assert cache.metrics()["errors"] == 3
+    assert cache.metrics()["invalidations"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_invalidation_bypasses_cache_until_retried():
+    shared = fakeredis.FakeAsyncRedis(decode_responses=True)
+    broken = AsyncMock(wraps=shared)
+    broken.incr.side_effect = redis.ConnectionError("blip")
+    cache, _ = make_cache(shared)
+    assert await cache.get_or_load(1, "list:0:10", AsyncMock(return_value=["old"])) == ["old"]
+
+    cache.get_client = AsyncMock(return_value=broken)
+    await cache.invalidate(1)
+    assert cache.metrics()["pending_invalidations"] == 1
+    assert await cache.generation(1) is None
+    assert await cache.get_or_load(1, "list:0:10", AsyncMock(return_value=["new"])) == ["new"]
+
+    cache.get_client = AsyncMock(return_value=shared)
+    assert await cache.generation(1) == 1
+    assert cache.metrics()["pending_invalidations"] == 0
+    assert await cache.get_or_load(1, "list:0:10", AsyncMock(return_value=["new"])) == ["new"]
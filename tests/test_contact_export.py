@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import uuid
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.database.models import User
+from src.repository.contacts import upsert_contacts
+from src.schemas.contacts import ContactCreate
+from src.services.contact_export import EXPORT_FIELDS, export_contacts
+
+
+@pytest_asyncio.fixture
+async def user(async_session: AsyncSession) -> User:
+    unique_username = f"exporter-{uuid.uuid4()}"
+    new_user = User(
+        username=unique_username,
+        email=f"{unique_username}@example.com",
+        password="hashed"
+    )
+    async_session.add(new_user)
+    await async_session.commit()
+    await async_session.refresh(new_user)
+    return new_user
+
+
+@pytest_asyncio.fixture
+async def contacts(async_session: AsyncSession, user: User):
+    await upsert_contacts([
+        ContactCreate(
+            first_name=f"Export{i}",
+            last_name="Me",
+            email=f"export{i}@example.com",
+            phone=str(i),
+            birthday=date(1990, 1, i + 1),
+            additional_data="note" if i % 2 else None,
+        )
+        for i in range(5)
+    ], async_session, user.id)
+
+
+async def collect(user: User, fmt: str, async_session: AsyncSession):
+    # The export opens its own session on the test engine
+    session_factory = async_sessionmaker(async_session.bind, expire_on_commit=False)
+    return [
+        chunk async for chunk in export_contacts(
+            user.id, fmt, session_factory, fetch_size=2, rows_per_chunk=2
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(async_session: AsyncSession, user: User, contacts):
+    chunks = await collect(user, "ndjson", async_session)
+
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [row["first_name"] for row in rows] == [f"Export{i}" for i in range(5)]
+    assert rows[0]["birthday"] == "1990-01-01"
+    assert list(rows[0]) == EXPORT_FIELDS
+
+
+@pytest.mark.asyncio
+async def test_export_csv(async_session: AsyncSession, user: User, contacts):
+    chunks = await collect(user, "csv", async_session)
+
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert len(rows) == 5
+    assert rows[1]["additional_data"] == "note"
+    assert rows[0]["additional_data"] == ""
+
+
+@pytest.mark.asyncio
+async def test_export_empty(async_session: AsyncSession, user: User):
+    assert await collect(user, "ndjson", async_session) == []
+    assert await collect(user, "csv", async_session) == [",".join(EXPORT_FIELDS) + "\r\n"]
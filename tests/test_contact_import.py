@@ -0,0 +1,138 @@
+import io
+import uuid
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import Contact, User
+from src.repository import contacts as repository_contacts
+from src.services.contact_import import detect_format, import_contacts
+
+
+@pytest_asyncio.fixture
+async def user(async_session: AsyncSession) -> User:
+    unique_username = f"importer-{uuid.uuid4()}"
+    new_user = User(
+        username=unique_username,
+        email=f"{unique_username}@example.com",
+        password="hashed"
+    )
+    async_session.add(new_user)
+    await async_session.commit()
+    await async_session.refresh(new_user)
+    return new_user
+
+
+async def contacts_of(user: User, async_session: AsyncSession):
+    result = await async_session.execute(
+        select(Contact)
+        .where(Contact.user_id == user.id)
+        .order_by(Contact.email)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().all()
+
+
+def test_detect_format():
+    assert detect_format("contacts.csv", "text/csv") == "csv"
+    assert detect_format("contacts.ndjson", "application/octet-stream") == "ndjson"
+    assert detect_format("upload", "application/x-ndjson") == "ndjson"
+
+
+@pytest.mark.asyncio
+async def test_import_csv_in_chunks(async_session: AsyncSession, user: User):
+    data = (
+        "first_name,last_name,email,phone,birthday,additional_data\n"
+        "Ann,Lee,ann@example.com,111,1990-01-02,\n"
+        "Bob,Ray,not-an-email,222,1990-01-03,\n"
+        "Cid,Moe,cid@example.com,333,1990-13-01,\n"
+        "Dan,Poe,dan@example.com,444,1991-02-28,\"multi\nline\"\n"
+    ).encode()
+
+    result = await import_contacts(io.BytesIO(data), "csv", async_session, user.id, chunk_size=2)
+
+    assert result.imported == 2
+    assert result.failed == 2
+    assert [e.line for e in result.errors] == [3, 4]
+    assert result.errors[0].errors[0].startswith("email:")
+
+    contacts = await contacts_of(user, async_session)
+    assert [c.email for c in contacts] == ["ann@example.com", "dan@example.com"]
+    assert contacts[0].additional_data is None
+    assert contacts[1].additional_data == "multi\nline"
+    assert contacts[1].birthday_key == 228
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson_upserts_by_email(async_session: AsyncSession, user: User):
+    first = b'{"first_name": "Old", "last_name": "Name", "email": "up@example.com", "phone": "1", "birthday": "1990-01-01"}\n'
+    await import_contacts(io.BytesIO(first), "ndjson", async_session, user.id, chunk_size=10)
+
+    second = (
+        b'{"first_name": "New", "last_name": "Name", "email": "up@example.com", "phone": "2", "birthday": "1990-05-06"}\n'
+        b'\n'
+        b'{broken json\n'
+    )
+    result = await import_contacts(io.BytesIO(second), "ndjson", async_session, user.id, chunk_size=10)
+
+    assert result.imported == 1
+    assert result.failed == 1
+    assert result.errors[0].line == 3
+
+    contacts = await contacts_of(user, async_session)
+    assert len(contacts) == 1
+    assert contacts[0].first_name == "New"
+    assert contacts[0].birthday_key == 506
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_non_utf8(async_session: AsyncSession, user: User):
+    with pytest.raises(ValueError):
+        await import_contacts(io.BytesIO(b"\xff\xfe\x00bad"), "csv", async_session, user.id, chunk_size=10)
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_names_longer_than_the_column(async_session: AsyncSession, user: User):
+    data = (
+        "first_name,last_name,email,phone,birthday\n"
+        f"{'x' * 101},Long,long@example.com,1,1990-01-01\n"
+        "Short,Name,short@example.com,2,1990-01-02\n"
+    ).encode()
+
+    result = await import_contacts(io.BytesIO(data), "csv", async_session, user.id, chunk_size=10)
+
+    assert result.imported == 1
+    assert result.errors[0].line == 2
+    assert "first_name" in result.errors[0].errors[0]
+
+
+@pytest.mark.asyncio
+async def test_import_reports_rows_rejected_by_the_database(async_session: AsyncSession, user: User):
+    upsert = repository_contacts.upsert_contacts
+
+    async def reject_bad_rows(contacts, db, user_id):
+        if any(c.email == "bad@example.com" for c in contacts):
+            raise DBAPIError("INSERT", {}, ValueError("value too long"))
+        return await upsert(contacts, db, user_id)
+
+    data = (
+        '{"first_name": "Good", "last_name": "One", "email": "good@example.com", "phone": "1", "birthday": "1990-01-01"}\n'
+        '{"first_name": "Bad", "last_name": "Row", "email": "bad@example.com", "phone": "2", "birthday": "1990-01-02"}\n'
+        '{"first_name": "Good", "last_name": "Two", "email": "good2@example.com", "phone": "3", "birthday": "1990-01-03"}\n'
+    ).encode()
+    user_id = user.id
+    with patch("src.services.contact_import.repository_contacts.upsert_contacts", reject_bad_rows):
+        result = await import_contacts(io.BytesIO(data), "ndjson", async_session, user_id, chunk_size=10)
+
+    assert result.imported == 2
+    assert result.failed == 1
+    assert result.errors[0].line == 2
+    # The rollback expired the user; query by id
+    rows = await async_session.execute(
+        select(Contact.email).where(Contact.user_id == user_id).order_by(Contact.email)
+    )
+    assert rows.scalars().all() == ["good2@example.com", "good@example.com"]
@@ -2,6 +2,7 @@ import uuid
 import pytest
 import pytest_asyncio
 from datetime import date
+from unittest.mock import patch
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -13,7 +14,14 @@ from src.repository.contacts import (
     get_contacts,
     update_contact,
     delete_contact,
+    get_contacts_page,
+    search_contacts,
+    get_upcoming_birthdays,
+    get_contact_version,
+    upsert_contacts,
+    PreconditionFailed,
 )
+from src.utils.pagination import encode_cursor
 
 
 @pytest_asyncio.fixture
@@ -121,3 +129,198 @@ async def test_delete_contact(async_session: AsyncSession, user: User):
 
     should_be_none = await get_contact(created.id, async_session)
     assert should_be_none is None
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_page_walks_all_pages(async_session: AsyncSession, user: User):
+    for name in ["Carol", "Alice", "Bob", "Dave", "Eve"]:
+        await create_contact(ContactCreate(
+            first_name=name,
+            last_name="Pager",
+            email=f"{name.lower()}@example.com",
+            phone="111",
+            birthday=date.today(),
+        ), async_session, user_id=user.id)
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = await get_contacts_page(
+            user.id, async_session, limit=2, cursor=cursor, sort="name"
+        )
+        seen.extend(contact.first_name for contact in page)
+        if cursor is None:
+            break
+
+    assert seen == ["Alice", "Bob", "Carol", "Dave", "Eve"]
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_page_is_scoped_to_user(async_session: AsyncSession, user: User):
+    other = User(username=f"other-{uuid.uuid4()}", email=f"other-{uuid.uuid4()}@example.com", password="hashed")
+    async_session.add(other)
+    await async_session.commit()
+    await create_contact(ContactCreate(
+        first_name="Hidden",
+        last_name="Contact",
+        email="hidden@example.com",
+        phone="222",
+        birthday=date.today(),
+    ), async_session, user_id=other.id)
+
+    page, cursor = await get_contacts_page(user.id, async_session, limit=10)
+    assert all(contact.user_id == user.id for contact in page)
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_page_rejects_foreign_cursor(async_session: AsyncSession, user: User):
+    with pytest.raises(ValueError):
+        await get_contacts_page(user.id, async_session, limit=10, cursor="not-a-cursor")
+
+    id_cursor = encode_cursor("id", [1])
+    with pytest.raises(ValueError):
+        await get_contacts_page(user.id, async_session, limit=10, cursor=id_cursor, sort="name")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort,key", [
+    ("id", ["1"]),
+    ("id", [[1]]),
+    ("id", [{"id": 1}]),
+    ("id", [True]),
+    ("id", [1, 2]),
+    ("name", ["Doe", "John", "1"]),
+    ("email", [None, 1]),
+])
+async def test_get_contacts_page_rejects_tampered_key(async_session: AsyncSession, user: User, sort, key):
+    with pytest.raises(ValueError):
+        await get_contacts_page(user.id, async_session, limit=10, cursor=encode_cursor(sort, key), sort=sort)
+
+
+@pytest.mark.asyncio
+async def test_search_contacts_ranked_and_scoped(async_session: AsyncSession, user: User):
+    other = User(username=f"other-{uuid.uuid4()}", email=f"other-{uuid.uuid4()}@example.com", password="hashed")
+    async_session.add(other)
+    await async_session.commit()
+    for owner, first, last in [(user, "Jonathan", "Finder"), (user, "Mary", "Jonesfinder"), (other, "Jonathan", "Finder")]:
+        await create_contact(ContactCreate(
+            first_name=first,
+            last_name=last,
+            email=f"{first.lower()}.{last.lower()}@example.com",
+            phone="333",
+            birthday=date.today(),
+        ), async_session, user_id=owner.id)
+
+    results = await search_contacts(user.id, "jonath fin", async_session, limit=10)
+    assert [c.first_name for c in results] == ["Jonathan"]
+    assert results[0].user_id == user.id
+
+    assert await search_contacts(user.id, "***", async_session, limit=10) == []
+
+
+@pytest.mark.asyncio
+async def test_search_contacts_follows_updates(async_session: AsyncSession, user: User):
+    created = await create_contact(ContactCreate(
+        first_name="Quentin",
+        last_name="Renamed",
+        email="quentin@example.com",
+        phone="444",
+        birthday=date.today(),
+    ), async_session, user_id=user.id)
+    await update_contact(created.id, ContactUpdate(
+        first_name="Zebulon",
+        last_name="Renamed",
+        email="zebulon@example.com",
+        phone="444",
+        birthday=date.today(),
+    ), async_session)
+
+    assert await search_contacts(user.id, "quentin", async_session, limit=10) == []
+    assert [c.id for c in await search_contacts(user.id, "zebu", async_session, limit=10)] == [created.id]
+
+    await delete_contact(created.id, async_session)
+    assert await search_contacts(user.id, "zebu", async_session, limit=10) == []
+
+
+@pytest.mark.asyncio
+async def test_get_upcoming_birthdays_wraps_year(async_session: AsyncSession, user: User):
+    for first, birthday in [("NewYear", date(1985, 1, 2)), ("Eve", date(1990, 12, 31)), ("Summer", date(1990, 7, 1))]:
+        await create_contact(ContactCreate(
+            first_name=first,
+            last_name="Birthday",
+            email=f"{first.lower()}@example.com",
+            phone="555",
+            birthday=birthday,
+        ), async_session, user_id=user.id)
+
+    with patch("src.repository.contacts.date") as mock_date:
+        mock_date.today.return_value = date(2023, 12, 30)
+        results = await get_upcoming_birthdays(async_session, user_id=user.id, days=7)
+
+    assert [c.first_name for c in results] == ["Eve", "NewYear"]
+
+
+@pytest.mark.asyncio
+async def test_get_upcoming_birthdays_leap_day(async_session: AsyncSession, user: User):
+    await create_contact(ContactCreate(
+        first_name="Leapling",
+        last_name="Birthday",
+        email="leapling@example.com",
+        phone="666",
+        birthday=date(2000, 2, 29),
+    ), async_session, user_id=user.id)
+
+    with patch("src.repository.contacts.date") as mock_date:
+        mock_date.today.return_value = date(2023, 2, 27)
+        results = await get_upcoming_birthdays(async_session, user_id=user.id, days=1)
+    assert [c.first_name for c in results] == ["Leapling"]
+
+    with patch("src.repository.contacts.date") as mock_date:
+        mock_date.today.return_value = date(2024, 2, 27)
+        results = await get_upcoming_birthdays(async_session, user_id=user.id, days=1)
+    assert results == []
+
+
+@pytest.mark.asyncio
+async def test_writes_bump_contact_version(async_session: AsyncSession, user: User):
+    data = ContactCreate(
+        first_name="Version",
+        last_name="Counter",
+        email="version@example.com",
+        phone="777",
+        birthday=date(1990, 5, 5),
+    )
+    created = await create_contact(data, async_session, user_id=user.id)
+    assert created.version == 1
+
+    updated = await update_contact(
+        created.id, ContactUpdate(**{**data.model_dump(), "first_name": "Renamed"}),
+        async_session, user_id=user.id,
+    )
+    assert updated.version == 2
+    await upsert_contacts([data], async_session, user_id=user.id)
+    assert await get_contact_version(created.id, async_session, user.id) == 3
+
+
+@pytest.mark.asyncio
+async def test_conditional_update_and_delete(async_session: AsyncSession, user: User):
+    data = ContactCreate(
+        first_name="Guarded",
+        last_name="Contact",
+        email="guarded@example.com",
+        phone="888",
+        birthday=date(1990, 6, 6),
+    )
+    created = await create_contact(data, async_session, user_id=user.id)
+    changed = ContactUpdate(**{**data.model_dump(), "first_name": "Changed"})
+
+    with pytest.raises(PreconditionFailed):
+        await update_contact(created.id, changed, async_session, user_id=user.id, versions={2})
+    assert (await update_contact(created.id, changed, async_session, user_id=user.id, versions={1})).version == 2
+    assert await update_contact(9999, changed, async_session, user_id=user.id, versions={1}) is None
+
+    with pytest.raises(PreconditionFailed):
+        await delete_contact(created.id, async_session, user_id=user.id, versions={1})
+    assert await delete_contact(created.id, async_session, user_id=user.id, versions={2}) is not None
+    assert await get_contact_version(created.id, async_session, user.id) is None
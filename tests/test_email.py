@@ -2,8 +2,13 @@ import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 from email.message import EmailMessage
 
-from src.services.email import send_verification_email, send_reset_password_email
+from src.services.email import (
+    build_reset_password_email,
+    send_reset_password_email,
+    send_verification_email,
+)
 from src.conf.config import settings
+from src.services.smtp_pool import create_smtp_client
 
 
 class TestEmail:
@@ -17,7 +22,7 @@ class TestEmail:
         test_token = "verification-token-123"
         
         # Мокируем функцию отправки email
-        with patch("aiosmtplib.send", new_callable=AsyncMock) as mock_send:
+        with patch("src.services.email.smtp_pool.send", new_callable=AsyncMock) as mock_send:
             # Вызываем тестируемую функцию
             await send_verification_email(test_email, test_token)
             
@@ -35,16 +40,9 @@ class TestEmail:
             assert message["Subject"] == "Verify your email"
             
             # Проверяем содержимое сообщения
-            content = message.get_content()
+            content = message.get_body(("plain",)).get_content()
             assert f"http://localhost:8000/api/auth/verify/{test_token}" in content
-            
-            # Проверяем параметры SMTP
-            assert kwargs["hostname"] == settings.mail_server
-            assert kwargs["port"] == settings.mail_port
-            assert kwargs["username"] == settings.mail_username
-            assert kwargs["password"] == settings.mail_password
-            assert kwargs["start_tls"] == True
-            assert kwargs["validate_certs"] == False
+
     
     @pytest.mark.asyncio
     async def test_send_reset_password_email(self):
@@ -54,7 +52,7 @@ class TestEmail:
         test_token = "reset-token-123"
         
         # Мокируем функцию отправки email
-        with patch("aiosmtplib.send", new_callable=AsyncMock) as mock_send:
+        with patch("src.services.email.smtp_pool.send", new_callable=AsyncMock) as mock_send:
             # Вызываем тестируемую функцию
             await send_reset_password_email(test_email, test_token)
             
@@ -70,11 +68,30 @@ class TestEmail:
             assert message["From"] == settings.mail_from
             assert message["To"] == test_email
             assert message["Subject"] == "Password Reset Request"
+    
+    def test_smtp_client_settings(self):
+        """Тест параметров SMTP для соединений пула"""
+        with patch("aiosmtplib.SMTP") as mock_smtp:
+            create_smtp_client()
             
             # Проверяем параметры SMTP
+            kwargs = mock_smtp.call_args.kwargs
             assert kwargs["hostname"] == settings.mail_server
             assert kwargs["port"] == settings.mail_port
             assert kwargs["username"] == settings.mail_username
             assert kwargs["password"] == settings.mail_password
             assert kwargs["start_tls"] == True
-            assert kwargs["validate_certs"] == False 
\ No newline at end of file
+            assert kwargs["validate_certs"] == False
+    
+    def test_reset_email_multipart_with_base_url(self):
+        """Тест multipart-письма со ссылкой на настраиваемый базовый URL"""
+        with patch.object(settings, "app_base_url", "https://contacts.example.com"):
+            message = build_reset_password_email("test@example.com", "reset-token-123")
+        
+        # Проверяем, что письмо содержит текстовую и HTML-части
+        assert message.get_content_type() == "multipart/alternative"
+        text = message.get_body(("plain",)).get_content()
+        html = message.get_body(("html",)).get_content()
+        link = "https://contacts.example.com/api/auth/reset-password/reset-token-123"
+        assert link in text
+        assert f'href="{link}"' in html
@@ -0,0 +1,173 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select
+
+from src.api.auth import register_user
+from src.conf.config import settings
+from src.database.models import Base, EmailOutbox, User
+from src.schemas.users import UserCreate
+from src.services.email_outbox import EmailOutboxWorker, enqueue_email
+from src.services.smtp_pool import smtp_pool
+from tests.conftest import TestingSessionLocal, engine_test
+from tests.smtp_sink import SMTPSink
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime.now(timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest_asyncio.fixture
+async def outbox():
+    async with engine_test.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with TestingSessionLocal() as session:
+        await session.execute(delete(EmailOutbox))
+        await session.commit()
+    yield
+    async with TestingSessionLocal() as session:
+        await session.execute(delete(EmailOutbox))
+        await session.commit()
+
+
+@pytest_asyncio.fixture
+async def smtp_sink():
+    sink = await SMTPSink().start()
+    with patch.object(settings, "mail_server", "127.0.0.1"), \
+            patch.object(settings, "mail_port", sink.port), \
+            patch.object(settings, "MAIL_STARTTLS", False):
+        yield sink
+        await smtp_pool.close()
+    await sink.stop()
+
+
+async def _enqueue(count=1, kind="verify_email"):
+    async with TestingSessionLocal() as session:
+        for i in range(count):
+            enqueue_email(session, kind, f"user{i}@example.com", token=f"token-{i}")
+        await session.commit()
+
+
+async def _rows():
+    async with TestingSessionLocal() as session:
+        result = await session.execute(select(EmailOutbox).order_by(EmailOutbox.id))
+        return list(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_worker_delivers_to_smtp_sink(outbox, smtp_sink):
+    await _enqueue(2)
+    worker = EmailOutboxWorker(TestingSessionLocal)
+
+    assert await worker.run_once() == 2
+
+    recipients = sorted(m["To"] for m in smtp_sink.messages)
+    assert recipients == ["user0@example.com", "user1@example.com"]
+    assert any("/api/auth/verify/token-0" in m.get_body(("plain",)).get_content() for m in smtp_sink.messages)
+    assert [row.status for row in await _rows()] == ["sent", "sent"]
+    assert await worker.run_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_retried_with_backoff(outbox, smtp_sink):
+    await _enqueue()
+    smtp_sink.fail_next = 1
+    clock = FakeClock()
+    worker = EmailOutboxWorker(TestingSessionLocal, base_delay=10, clock=clock)
+
+    await worker.run_once()
+    [row] = await _rows()
+    assert row.status == "pending"
+    assert row.attempts == 1
+    assert "451" in row.last_error
+    # Not due again until the backoff has passed
+    assert await worker.run_once() == 0
+
+    clock.now += timedelta(seconds=10)
+    assert await worker.run_once() == 1
+    [row] = await _rows()
+    assert row.status == "sent"
+    assert row.attempts == 2
+    assert len(smtp_sink.messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_are_dead_lettered(outbox):
+    async def failing_send(message):
+        raise ConnectionError("smtp down")
+
+    await _enqueue()
+    clock = FakeClock()
+    worker = EmailOutboxWorker(
+        TestingSessionLocal, send=failing_send, max_attempts=3, base_delay=1, clock=clock
+    )
+
+    for _ in range(3):
+        await worker.run_once()
+        clock.now += timedelta(hours=1)
+
+    [row] = await _rows()
+    assert row.status == "dead"
+    assert row.attempts == 3
+    assert row.last_error == "ConnectionError: smtp down"
+    assert await worker.run_once() == 0
+    assert worker.metrics()["dead"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deliveries_are_bounded_by_concurrency(outbox):
+    in_flight = peak = 0
+
+    async def slow_send(message):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    await _enqueue(6)
+    worker = EmailOutboxWorker(TestingSessionLocal, send=slow_send, concurrency=2)
+
+    assert await worker.run_once() == 6
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_claimed_rows_are_leased(outbox):
+    await _enqueue()
+    clock = FakeClock()
+    worker = EmailOutboxWorker(TestingSessionLocal, lease=60, clock=clock)
+
+    assert len(await worker.claim()) == 1
+    assert await worker.claim() == []
+    clock.now += timedelta(seconds=60)
+    # A worker that crashed mid-delivery releases the row once the lease expires
+    [row] = await worker.claim()
+    assert row.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_signup_queues_email_in_the_same_transaction(outbox):
+    body = UserCreate(username="outboxuser", email="outbox@example.com", password="secret123")
+    async with TestingSessionLocal() as session:
+        await session.execute(delete(User).where(User.email == body.email))
+        await session.commit()
+        with patch("aiosmtplib.send") as mock_send:
+            user = await register_user(body, db=session)
+
+    mock_send.assert_not_called()
+    [row] = await _rows()
+    assert (row.kind, row.recipient) == ("verify_email", "outbox@example.com")
+    assert row.payload == {"token": user.verification_token}
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        enqueue_email(None, "newsletter", "user@example.com")
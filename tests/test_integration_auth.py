@@ -159,7 +159,7 @@ class TestAuthRoutes:
                 
                 # Мокируем commit и отправку email
                 with patch("sqlalchemy.ext.asyncio.AsyncSession.commit") as mock_commit:
-                    with patch("src.api.auth.send_reset_password_email", new_callable=AsyncMock) as mock_send_email:
+                    with patch("src.api.auth.enqueue_email") as mock_send_email:
                         # Делаем mock_user.reset_token доступным для присвоения
                         with patch("uuid.uuid4") as mock_uuid:
                             mock_uuid.return_value = "test-token"
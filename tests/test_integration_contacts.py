@@ -1,6 +1,11 @@
+from unittest.mock import AsyncMock, patch
+
 import pytest
+import redis.asyncio as redis
 from fastapi.testclient import TestClient
 from src.database.models import Contact
+from src.services.auth import get_token_user
+from tests.test_integration_utils import mock_get_current_user
 from datetime import date
 import json
 
@@ -29,6 +34,13 @@ def test_contact(async_session, test_user, contact_data):
     async_session.refresh(contact)
     return contact
 
+@pytest.fixture
+def user_client(app, test_user):
+    """Test client authenticated as test_user"""
+    app.dependency_overrides[get_token_user] = lambda: test_user
+    yield TestClient(app)
+    app.dependency_overrides[get_token_user] = mock_get_current_user
+
 # Tests for contact routes
 class TestContactsRoutes:
     
@@ -47,4 +59,173 @@ class TestContactsRoutes:
         response = client.get("/contacts/test/9999")  # Use special ID for 404
         
         # Check result
-        assert response.status_code == 404 
\ No newline at end of file
+        assert response.status_code == 404 
+
+    def test_get_contacts_cursor_mode(self, user_client, contact_data):
+        """Test paging through contacts with a cursor"""
+        for i in range(3):
+            response = user_client.post(
+                "/contacts/contacts/",
+                json={**contact_data, "email": f"page{i}@example.com"},
+            )
+            assert response.status_code == 201
+
+        response = user_client.get(
+            "/contacts/contacts/",
+            params={"pagination": "cursor", "limit": 2},
+        )
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) == 2
+        assert page["has_more"] is True
+
+        response = user_client.get(
+            "/contacts/contacts/",
+            params={"cursor": page["next_cursor"], "limit": 2},
+        )
+        page = response.json()
+        assert len(page["items"]) == 1
+        assert page["has_more"] is False
+        assert page["next_cursor"] is None
+
+    def test_get_contacts_invalid_cursor(self, user_client):
+        """Test that a malformed cursor is rejected"""
+        response = user_client.get(
+            "/contacts/contacts/",
+            params={"cursor": "garbage"},
+        )
+        assert response.status_code == 400
+
+    def test_search_contacts(self, user_client, contact_data):
+        """Test searching contacts through the API"""
+        response = user_client.post(
+            "/contacts/contacts/",
+            json={**contact_data, "first_name": "Searchy", "email": "searchy@example.com"},
+        )
+        assert response.status_code == 201
+
+        response = user_client.get("/contacts/contacts/search", params={"q": "search"})
+        assert response.status_code == 200
+        assert [c["first_name"] for c in response.json()] == ["Searchy"]
+
+    def test_import_contacts(self, user_client):
+        """Test bulk import through the API"""
+        data = (
+            "first_name,last_name,email,phone,birthday\n"
+            "Imported,One,imported1@example.com,111,1990-01-01\n"
+            "Broken,Two,broken,222,1990-01-01\n"
+        )
+        response = user_client.post(
+            "/contacts/contacts/import",
+            files={"file": ("contacts.csv", data, "text/csv")},
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["imported"] == 1
+        assert result["failed"] == 1
+        assert result["errors"][0]["line"] == 3
+
+    def test_cached_reads_follow_writes(self, user_client, contact_data):
+        """Test that cached list and detail reads reflect every write"""
+        assert user_client.get("/contacts/contacts/").json() == []
+
+        created = user_client.post(
+            "/contacts/contacts/", json={**contact_data, "email": "cached@example.com"}
+        ).json()
+        assert [c["id"] for c in user_client.get("/contacts/contacts/").json()] == [created["id"]]
+        assert user_client.get(f"/contacts/contacts/{created['id']}").json()["first_name"] == "John"
+
+        updated = {**contact_data, "email": "cached@example.com", "first_name": "Jane"}
+        assert user_client.put(f"/contacts/contacts/{created['id']}", json=updated).status_code == 200
+        assert user_client.get(f"/contacts/contacts/{created['id']}").json()["first_name"] == "Jane"
+        assert user_client.get("/contacts/contacts/").json()[0]["first_name"] == "Jane"
+
+        user_client.delete(f"/contacts/contacts/{created['id']}")
+        assert user_client.get(f"/contacts/contacts/{created['id']}").status_code == 404
+        assert user_client.get("/contacts/contacts/").json() == []
+
+    def test_conditional_get_returns_304(self, user_client, contact_data):
+        """Test ETag revalidation of contact lists and single contacts"""
+        listing = user_client.get("/contacts/contacts/")
+        list_etag = listing.headers["etag"]
+
+        created = user_client.post(
+            "/contacts/contacts/", json={**contact_data, "email": "etag@example.com"}
+        )
+        contact_etag = created.headers["etag"]
+        url = f"/contacts/contacts/{created.json()['id']}"
+
+        response = user_client.get(url, headers={"If-None-Match": contact_etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == contact_etag
+        assert user_client.get(url).headers["etag"] == contact_etag
+
+        # The write bumped the contact cache generation
+        response = user_client.get("/contacts/contacts/", headers={"If-None-Match": list_etag})
+        assert response.status_code == 200
+        new_list_etag = response.headers["etag"]
+        assert new_list_etag != list_etag
+        response = user_client.get("/contacts/contacts/", headers={"If-None-Match": new_list_etag})
+        assert response.status_code == 304
+
+    def test_failed_invalidation_never_answers_304(self, user_client, contact_data):
+        """Test that a write whose cache bump failed is not hidden by the old ETag"""
+        listing = user_client.get("/contacts/contacts/")
+        list_etag = listing.headers["etag"]
+
+        with patch.object(redis.Redis, "incr", AsyncMock(side_effect=redis.ConnectionError("blip"))):
+            created = user_client.post(
+                "/contacts/contacts/", json={**contact_data, "email": "unbumped@example.com"}
+            )
+            assert created.status_code == 201
+            response = user_client.get("/contacts/contacts/", headers={"If-None-Match": list_etag})
+            assert response.status_code == 200
+            assert "etag" not in response.headers
+            assert [c["id"] for c in response.json()] == [created.json()["id"]]
+
+        # Once Redis accepts the bump again the list gets a new ETag
+        response = user_client.get("/contacts/contacts/", headers={"If-None-Match": list_etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != list_etag
+
+    def test_if_match_guards_writes(self, user_client, contact_data):
+        """Test that PUT and DELETE with a stale If-Match fail with 412"""
+        data = {**contact_data, "email": "guarded@example.com"}
+        created = user_client.post("/contacts/contacts/", json=data)
+        etag = created.headers["etag"]
+        url = f"/contacts/contacts/{created.json()['id']}"
+
+        response = user_client.put(url, json={**data, "first_name": "First"}, headers={"If-Match": etag})
+        assert response.status_code == 200
+        new_etag = response.headers["etag"]
+        assert new_etag != etag
+
+        response = user_client.put(url, json={**data, "first_name": "Lost"}, headers={"If-Match": etag})
+        assert response.status_code == 412
+        assert user_client.get(url).json()["first_name"] == "First"
+
+        assert user_client.delete(url, headers={"If-Match": etag}).status_code == 412
+        assert user_client.delete(url, headers={"If-Match": new_etag}).status_code == 200
+        assert user_client.delete(url, headers={"If-Match": new_etag}).status_code == 404
+
+    def test_create_duplicate_contact(self, user_client, contact_data):
+        """Test that a second contact with the same email is rejected"""
+        data = {**contact_data, "email": "duplicate@example.com"}
+        assert user_client.post("/contacts/contacts/", json=data).status_code == 201
+        assert user_client.post("/contacts/contacts/", json=data).status_code == 409
+
+    def test_export_contacts(self, user_client, contact_data):
+        """Test streaming export through the API"""
+        response = user_client.post(
+            "/contacts/contacts/",
+            json={**contact_data, "email": "exported@example.com"},
+        )
+        assert response.status_code == 201
+
+        response = user_client.get("/contacts/contacts/export", params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.splitlines()
+        assert lines[0].startswith("id,first_name")
+        assert "exported@example.com" in lines[1]
@@ -9,4 +9,24 @@ def test_app_health(client: TestClient):
     # assert response.status_code == 200
     
     # Проверяем заголовки ответа (JSON или HTML)
-    assert "application/json" in response.headers.get("content-type", "") or "text/html" in response.headers.get("content-type", "") 
\ No newline at end of file
+    assert "application/json" in response.headers.get("content-type", "") or "text/html" in response.headers.get("content-type", "") 
+
+
+def test_metrics_require_admin(app, client: TestClient):
+    """Тест: метрики доступны только администраторам"""
+    from src.auth.principal import CurrentUser
+    from src.services.auth import get_current_user
+
+    def as_role(role):
+        principal = CurrentUser(id=1, email=f"{role}@example.com", username=role, role=role)
+        return lambda: principal
+
+    original = app.dependency_overrides[get_current_user]
+    try:
+        for role, expected in (("user", 403), ("admin", 200)):
+            app.dependency_overrides[get_current_user] = as_role(role)
+            response = client.get("/api/metrics/")
+            assert response.status_code == expected
+    finally:
+        app.dependency_overrides[get_current_user] = original
+    assert isinstance(response.json(), dict)
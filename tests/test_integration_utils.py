@@ -37,6 +37,10 @@ class MockRedis:
         """Set value with expiration time"""
         self.storage[key] = value
 
+    async def publish(self, channel, message):
+        """Pretend to publish a message, returning the number of receivers"""
+        return 0
+
 mock_redis = MockRedis()
 
 # Override get_redis function for tests
@@ -47,7 +51,7 @@ def override_get_redis():
         return mock_redis
 
     with patch("src.services.redis_client.get_redis", mock_get_redis):
-        with patch("src.services.auth.get_redis", mock_get_redis):
+        with patch("src.services.user_cache.get_redis", mock_get_redis):
             with patch("src.api.auth.get_redis", mock_get_redis):
                 yield
 
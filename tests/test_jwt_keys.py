@@ -0,0 +1,104 @@
+import ecdsa
+import pytest
+import rsa
+from fastapi.testclient import TestClient
+from jose import JWTError, jwt as jose_jwt
+from unittest.mock import patch
+
+from src.auth.jwt_utils import create_access_token, decode_token
+from src.auth.keys import KeyRing, get_key_ring
+from src.conf.config import settings
+
+
+@pytest.fixture
+def keys_dir(tmp_path):
+    for kid in ("2026-01", "2026-02"):
+        pem = ecdsa.SigningKey.generate(curve=ecdsa.NIST256p).to_pem()
+        (tmp_path / f"{kid}.pem").write_bytes(pem)
+    return tmp_path
+
+
+@pytest.fixture
+def es256(keys_dir):
+    """Sign tokens with the ES256 keys in keys_dir"""
+    get_key_ring.cache_clear()
+    with patch.object(settings, "algorithm", "ES256"), \
+            patch.object(settings, "jwt_keys_dir", str(keys_dir)), \
+            patch.object(settings, "jwt_active_kid", None):
+        yield
+    get_key_ring.cache_clear()
+
+
+def test_tokens_carry_active_kid(es256):
+    token = create_access_token({"sub": "keys@example.com"})
+
+    assert jose_jwt.get_unverified_header(token)["kid"] == "2026-02"
+    assert decode_token(token)["sub"] == "keys@example.com"
+
+
+def test_rotated_out_key_still_verifies(es256):
+    with patch.object(settings, "jwt_active_kid", "2026-01"):
+        get_key_ring.cache_clear()
+        old_token = create_access_token({"sub": "old@example.com"})
+    get_key_ring.cache_clear()
+
+    assert jose_jwt.get_unverified_header(old_token)["kid"] == "2026-01"
+    assert decode_token(old_token)["sub"] == "old@example.com"
+
+
+def test_unknown_kid_and_hmac_tokens_rejected(es256):
+    forged = jose_jwt.encode({"sub": "forged@example.com"}, settings.secret_key,
+                             algorithm="HS256", headers={"kid": "2026-02"})
+    unknown = jose_jwt.encode({"sub": "x@example.com"}, settings.secret_key,
+                              algorithm="HS256", headers={"kid": "missing"})
+
+    with pytest.raises(JWTError):
+        decode_token(forged)
+    with pytest.raises(JWTError):
+        decode_token(unknown)
+
+
+def test_rs256_key_ring(tmp_path):
+    _, private_key = rsa.newkeys(1024)
+    (tmp_path / "rsa-1.pem").write_bytes(private_key.save_pkcs1())
+
+    key_ring = KeyRing(str(tmp_path), "RS256")
+
+    (jwk,) = key_ring.jwks()["keys"]
+    assert jwk["kty"] == "RSA"
+    assert jwk["kid"] == "rsa-1"
+    assert "d" not in jwk
+
+
+def test_key_ring_requires_keys(tmp_path):
+    with pytest.raises(RuntimeError):
+        KeyRing(str(tmp_path), "ES256")
+    with pytest.raises(RuntimeError):
+        KeyRing(str(tmp_path), "ES256", active_kid="missing")
+
+
+def test_jwks_endpoint(app, es256):
+    client = TestClient(app)
+
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == f"public, max-age={settings.jwks_max_age}"
+    keys = response.json()["keys"]
+    assert [key["kid"] for key in keys] == ["2026-01", "2026-02"]
+    assert all(key["kty"] == "EC" and "d" not in key for key in keys)
+
+    cached = client.get("/.well-known/jwks.json",
+                        headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+    etag = response.headers["etag"]
+    for header in (f'"other", {etag}', f"W/{etag}"):
+        assert client.get("/.well-known/jwks.json", headers={"If-None-Match": header}).status_code == 304
+
+
+def test_jwks_endpoint_empty_for_hmac(app):
+    get_key_ring.cache_clear()
+    response = TestClient(app).get("/.well-known/jwks.json")
+
+    assert response.json() == {"keys": []}
@@ -0,0 +1,102 @@
+import asyncio
+import math
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from src.services.login_throttle import LoginThrottle, login_throttle
+from src.services.rate_limiter import get_rate_limit_redis
+
+
+def make_throttle():
+    return LoginThrottle(account_free_failures=2, ip_free_failures=4,
+                         base_delay=1.0, max_delay=5.0, window=60)
+
+
+async def block_seconds(key):
+    client = await get_rate_limit_redis()
+    return math.ceil(max(await client.pttl(key), 0) / 1000)
+
+
+@pytest.mark.asyncio
+async def test_account_blocked_with_exponential_backoff():
+    throttle = make_throttle()
+    client = await get_rate_limit_redis()
+    block = "login:blocked:account:victim@example.com"
+
+    delays = []
+    for i in range(6):
+        assert not (await throttle.reserve("Victim@example.com", f"10.0.0.{i}")).blocked
+        delays.append(await block_seconds(block))
+        await client.delete(block)
+
+    assert delays == [0, 0, 1, 2, 4, 5]
+    await throttle.reserve("victim@example.com", "10.0.1.1")
+    state = await throttle.reserve("victim@example.com", "10.0.1.2")
+    assert state.blocked
+    assert 4.0 < state.retry_after <= 5.0
+
+
+@pytest.mark.asyncio
+async def test_ip_blocked_across_accounts():
+    throttle = make_throttle()
+
+    for i in range(5):
+        await throttle.reserve(f"user{i}@example.com", "10.0.0.9")
+
+    assert (await throttle.reserve("someone@example.com", "10.0.0.9")).blocked
+    assert not (await throttle.reserve("someone@example.com", "10.0.0.10")).blocked
+
+
+@pytest.mark.asyncio
+async def test_concurrent_attempts_are_reserved_atomically():
+    throttle = make_throttle()
+
+    states = await asyncio.gather(
+        *(throttle.reserve("victim@example.com", f"10.0.0.{i}") for i in range(10))
+    )
+
+    # The two free failures plus the one that starts the backoff
+    assert sum(not state.blocked for state in states) == 3
+
+
+@pytest.mark.asyncio
+async def test_success_clears_account_only():
+    throttle = make_throttle()
+    for _ in range(2):
+        await throttle.reserve("user@example.com", "10.0.0.1")
+    state = await throttle.reserve("user@example.com", "10.0.0.1")
+
+    await throttle.refund("user@example.com", "10.0.0.1", state, success=True)
+
+    assert (await throttle.reserve("user@example.com", "10.0.0.2")).counts == (1, 1)
+    assert (await throttle.reserve("other@example.com", "10.0.0.1")).counts == (1, 3)
+
+
+@pytest.mark.asyncio
+async def test_refund_lifts_the_block_of_its_attempt():
+    throttle = make_throttle()
+    for _ in range(2):
+        await throttle.reserve("user@example.com", "10.0.0.1")
+    state = await throttle.reserve("user@example.com", "10.0.0.1")
+    assert (await throttle.reserve("user@example.com", "10.0.0.1")).blocked
+
+    await throttle.refund("user@example.com", "10.0.0.1", state)
+
+    assert (await throttle.reserve("user@example.com", "10.0.0.1")).counts == (3, 3)
+
+
+def test_throttled_login_skips_password_check(app):
+    credentials = {"username": "victim", "email": "victim@example.com", "password": "wrong"}
+    invalid = HTTPException(status_code=401, detail="Invalid credentials")
+
+    with patch.object(login_throttle, "account_free_failures", 1), \
+            patch("src.api.auth.user_cache.generation", AsyncMock(return_value=(0, ""))), \
+            patch("src.api.auth.handlers.authenticate_user", AsyncMock(side_effect=invalid)) as mock_auth:
+        client = TestClient(app)
+        statuses = [client.post("/api/auth/login", json=credentials).status_code for _ in range(3)]
+
+    assert statuses == [401, 401, 429]
+    assert mock_auth.await_count == 2
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.auth.hashing import hash_password
+from src.services.metrics import collect_metrics
+from src.services.password_hasher import (PasswordHasher, PasswordHasherOverloaded,
+                                          password_hasher)
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_the_event_loop():
+    hasher = PasswordHasher(max_workers=2)
+    hashed = await hasher.hash("secure_password")
+
+    assert hashed != "secure_password"
+    assert await hasher.verify("secure_password", hashed)
+    assert not await hasher.verify("wrong_password", hashed)
+    assert hasher.metrics()["completed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_run_uses_worker_thread():
+    hasher = PasswordHasher(max_workers=1)
+    thread_name = await hasher.run(lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("password-hash")
+
+
+@pytest.mark.asyncio
+async def test_queue_limit_rejects_and_counts():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    blocked = asyncio.ensure_future(hasher.run(release.wait))
+    await asyncio.sleep(0.05)
+    waiting = asyncio.ensure_future(hasher.run(lambda: "done"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordHasherOverloaded):
+        await hasher.run(lambda: "rejected")
+
+    metrics = hasher.metrics()
+    assert metrics["in_flight"] == 1
+    assert metrics["queued"] == 1
+    assert metrics["rejected"] == 1
+
+    release.set()
+    assert await blocked is True
+    assert await waiting == "done"
+
+    metrics = hasher.metrics()
+    assert metrics["queued"] == 0
+    assert metrics["in_flight"] == 0
+    assert metrics["peak_queued"] == 1
+    assert metrics["completed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_while_hashing():
+    hasher = PasswordHasher(max_workers=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.001)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await asyncio.gather(*(hasher.run(hash_password, "password") for _ in range(4)))
+    task.cancel()
+
+    assert ticks > 10
+
+
+def test_singleton_registered_in_metrics():
+    assert collect_metrics()["password_hasher"]["max_workers"] == password_hasher.max_workers
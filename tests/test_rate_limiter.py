@@ -0,0 +1,106 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import redis.asyncio as redis
+from fastapi.testclient import TestClient
+
+from src.auth.jwt_utils import create_access_token
+from src.auth.principal import CurrentUser
+from src.services.auth import get_token_user
+from src.services.rate_limiter import RateLimiter, rate_limit_key, rate_limited, rate_limiter
+from tests.test_integration_utils import mock_get_current_user
+
+
+def make_request(authorization=None, host="10.0.0.1"):
+    request = MagicMock()
+    request.headers = {"authorization": authorization} if authorization else {}
+    request.client.host = host
+    return request
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_limits():
+    limiter = RateLimiter(capacity=3, refill_rate=1.0)
+
+    results = [await limiter.hit("client") for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert 0 < results[-1].retry_after <= 1
+    assert limiter.metrics()["limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cost_weights_and_isolated_keys():
+    limiter = RateLimiter(capacity=10, refill_rate=0.1)
+
+    assert (await limiter.hit("heavy", cost=8)).allowed
+    assert not (await limiter.hit("heavy", cost=5)).allowed
+    assert (await limiter.hit("heavy", cost=2)).allowed
+    assert (await limiter.hit("light", cost=10)).allowed
+
+
+@pytest.mark.asyncio
+async def test_fails_open_when_redis_is_down():
+    limiter = RateLimiter(capacity=1, refill_rate=1.0)
+    script = AsyncMock(side_effect=redis.ConnectionError("down"))
+    limiter._script = script
+
+    result = await limiter.hit("client")
+
+    assert result.allowed
+    assert limiter.metrics()["errors"] == 1
+
+
+def test_key_prefers_token_user():
+    token = create_access_token({"sub": "limited@example.com"})
+    stateless = create_access_token({"sub": "limited@example.com", "uid": 7})
+
+    assert rate_limit_key(make_request(f"Bearer {token}")) == "user:limited@example.com"
+    assert rate_limit_key(make_request(f"Bearer {stateless}")) == "user:7"
+    assert rate_limit_key(make_request("Bearer not-a-token")) == "ip:10.0.0.1"
+    assert rate_limit_key(make_request()) == "ip:10.0.0.1"
+
+
+def test_route_returns_429_with_retry_after(app):
+    app.dependency_overrides[get_token_user] = lambda: CurrentUser(
+        id=1, email="limited@example.com", username="limited"
+    )
+    try:
+        with patch.object(rate_limiter, "capacity", 2):
+            client = TestClient(app)
+            responses = [
+                client.get("/contacts/contacts/", headers={"X-Test": "true"})
+                for _ in range(3)
+            ]
+    finally:
+        app.dependency_overrides[get_token_user] = mock_get_current_user
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[0].headers["X-RateLimit-Remaining"] == "1"
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+
+
+def test_unmarked_routes_are_not_limited(app):
+    with patch.object(rate_limiter, "capacity", 1):
+        client = TestClient(app)
+        # "/test" would also match "/{contact_id}", which is rate limited
+        responses = [client.get("/contacts/contacts/test") for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert "X-RateLimit-Remaining" not in responses[0].headers
+
+
+@pytest.mark.asyncio
+async def test_cost_above_capacity_takes_full_bucket():
+    limiter = RateLimiter(capacity=3, refill_rate=1.0)
+
+    first = await limiter.hit("client", cost=20)
+    second = await limiter.hit("client", cost=20)
+
+    assert first.allowed and first.remaining == 0
+    assert not second.allowed
+    assert 0 < second.retry_after <= 3
+
+
+def test_cost_above_capacity_accepted_at_import():
+    assert rate_limited(cost=10_000)(lambda: None).rate_limit_cost == 10_000
@@ -33,6 +33,9 @@ class MockExecuteResult:
     def scalar_one_or_none(self):
         return self.scalar_result
     
+    def scalar_one(self):
+        return self.scalar_result
+    
     def scalars(self):
         return self.scalars_result
 
@@ -53,26 +56,33 @@ class TestContactsRepository:
             additional_data="Test contact"
         )
         
+        # Row returned by INSERT ... RETURNING
+        returned_contact = Contact(**contact_data.model_dump(), id=1, user_id=1)
+        
         # Mock DB session
         mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.execute.return_value = MockExecuteResult(scalar_result=returned_contact)
         mock_db.commit = AsyncMock()
-        mock_db.refresh = AsyncMock()
         
         # Call the tested function
         result = await create_contact(contact_data, mock_db, user_id=1)
         
         # Check results
-        assert result is not None
+        assert result is returned_contact
         assert result.first_name == "John"
         assert result.last_name == "Doe"
         assert result.email == "john.doe@example.com"
         assert result.phone == "+1234567890"
         assert result.user_id == 1
         
-        # Check that appropriate session methods were called
-        mock_db.add.assert_called_once()
+        # A single INSERT ... RETURNING followed by a commit, no refresh
+        mock_db.execute.assert_called_once()
+        stmt = mock_db.execute.call_args.args[0]
+        assert stmt.is_insert
+        assert "RETURNING" in str(stmt)
         mock_db.commit.assert_called_once()
-        mock_db.refresh.assert_called_once()
+        mock_db.add.assert_not_called()
+        mock_db.refresh.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_get_contact_exists(self):
@@ -250,25 +260,31 @@ class TestContactsRepository:
             additional_data="Updated contact"
         )
         
-        # Mock get_contact function to return our mock contact
-        with patch("src.repository.contacts.get_contact", new=AsyncMock(return_value=mock_contact)):
-            # Mock DB session
-            mock_db = AsyncMock(spec=AsyncSession)
-            mock_db.commit = AsyncMock()
-            mock_db.refresh = AsyncMock()
-            
-            # Call the tested function
-            result = await update_contact(contact_id=1, contact=update_data, db=mock_db)
-            
-            # Check results
-            assert result is not None
-            assert result.first_name == "John Updated"
-            assert result.last_name == "Doe Updated"
-            assert result.email == "john.updated@example.com"
-            
-            # Verify that appropriate session methods were called
-            mock_db.commit.assert_called_once()
-            mock_db.refresh.assert_called_once()
+        # Row returned by UPDATE ... RETURNING
+        updated_contact = Contact(**update_data.model_dump(), id=1, user_id=1)
+        
+        # Mock DB session
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.execute.return_value = MockExecuteResult(scalar_result=updated_contact)
+        mock_db.commit = AsyncMock()
+        
+        # Call the tested function
+        result = await update_contact(contact_id=1, contact=update_data, db=mock_db, user_id=1)
+        
+        # Check results
+        assert result is not None
+        assert result.first_name == "John Updated"
+        assert result.last_name == "Doe Updated"
+        assert result.email == "john.updated@example.com"
+        
+        # A single UPDATE ... RETURNING scoped to id and owner, no refresh
+        mock_db.execute.assert_called_once()
+        stmt = mock_db.execute.call_args.args[0]
+        assert stmt.is_update
+        assert "contacts.user_id" in str(stmt)
+        assert "contacts.version" in str(stmt)
+        mock_db.commit.assert_called_once()
+        mock_db.refresh.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_update_contact_not_exists(self):
@@ -283,20 +299,20 @@ class TestContactsRepository:
             additional_data="Updated contact"
         )
         
-        # Mock get_contact function to return None (contact not found)
-        with patch("src.repository.contacts.get_contact", new=AsyncMock(return_value=None)):
-            # Mock DB session
-            mock_db = AsyncMock(spec=AsyncSession)
-            
-            # Call the tested function
-            result = await update_contact(contact_id=999, contact=update_data, db=mock_db)
-            
-            # Check results
-            assert result is None
-            
-            # Verify that commit and refresh methods were not called
-            mock_db.commit.assert_not_called()
-            mock_db.refresh.assert_not_called()
+        # Mock DB session: UPDATE ... RETURNING matched no row
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.execute.return_value = MockExecuteResult(scalar_result=None)
+        
+        # Call the tested function
+        result = await update_contact(contact_id=999, contact=update_data, db=mock_db)
+        
+        # Check results
+        assert result is None
+        
+        # Verify that nothing was committed or refreshed
+        mock_db.execute.assert_called_once()
+        mock_db.commit.assert_not_called()
+        mock_db.refresh.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_delete_contact_exists(self):
@@ -312,42 +328,41 @@ class TestContactsRepository:
             user_id=1
         )
         
-        # Mock get_contact function to return our mock contact
-        with patch("src.repository.contacts.get_contact", new=AsyncMock(return_value=mock_contact)):
-            # Mock DB session
-            mock_db = AsyncMock(spec=AsyncSession)
-            mock_db.delete = AsyncMock()
-            mock_db.commit = AsyncMock()
-            
-            # Call the tested function
-            result = await delete_contact(contact_id=1, db=mock_db)
-            
-            # Check results
-            assert result is not None
-            assert result.id == 1
-            assert result.first_name == "John"
-            
-            # Verify that appropriate session methods were called
-            mock_db.delete.assert_called_once_with(mock_contact)
-            mock_db.commit.assert_called_once()
+        # Mock DB session returning the row deleted by DELETE ... RETURNING
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.execute.return_value = MockExecuteResult(scalar_result=mock_contact)
+        mock_db.commit = AsyncMock()
+        
+        # Call the tested function
+        result = await delete_contact(contact_id=1, db=mock_db, user_id=1)
+        
+        # Check results
+        assert result is not None
+        assert result.id == 1
+        assert result.first_name == "John"
+        
+        # A single DELETE ... RETURNING, no prior SELECT or session.delete
+        mock_db.execute.assert_called_once()
+        assert mock_db.execute.call_args.args[0].is_delete
+        mock_db.delete.assert_not_called()
+        mock_db.commit.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_delete_contact_not_exists(self):
         """Test for deleting a non-existent contact"""
-        # Mock get_contact function to return None (contact not found)
-        with patch("src.repository.contacts.get_contact", new=AsyncMock(return_value=None)):
-            # Mock DB session
-            mock_db = AsyncMock(spec=AsyncSession)
-            
-            # Call the tested function
-            result = await delete_contact(contact_id=999, db=mock_db)
-            
-            # Check results
-            assert result is None
-            
-            # Verify that delete and commit methods were not called
-            mock_db.delete.assert_not_called()
-            mock_db.commit.assert_not_called()
+        # Mock DB session: DELETE ... RETURNING matched no row
+        mock_db = AsyncMock(spec=AsyncSession)
+        mock_db.execute.return_value = MockExecuteResult(scalar_result=None)
+        
+        # Call the tested function
+        result = await delete_contact(contact_id=999, db=mock_db)
+        
+        # Check results
+        assert result is None
+        
+        # Verify that delete and commit methods were not called
+        mock_db.delete.assert_not_called()
+        mock_db.commit.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_get_upcoming_birthdays(self):
@@ -0,0 +1,79 @@
+import uuid
+from contextlib import ExitStack, contextmanager
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.api.auth import reset_password
+from src.conf.config import settings
+from src.database.models import RevocationOutbox, User
+from src.services.revocation_outbox import RevocationRelay
+
+REDIS_USERS = (
+    "src.services.token_revocation.get_redis",
+    "src.services.user_cache.get_redis",
+    "src.services.revocation_outbox.get_redis",
+)
+
+
+@contextmanager
+def announcement_redis(**kwargs):
+    with ExitStack() as stack:
+        for target in REDIS_USERS:
+            stack.enter_context(patch(target, AsyncMock(**kwargs)))
+        yield
+
+
+@pytest_asyncio.fixture
+async def user(async_session: AsyncSession) -> User:
+    username = f"reset-{uuid.uuid4()}"
+    new_user = User(username=username, email=f"{username}@example.com",
+                    password="hashed", reset_token=f"token-{username}")
+    async_session.add(new_user)
+    await async_session.commit()
+    await async_session.refresh(new_user)
+    return new_user
+
+
+async def pending(async_session: AsyncSession, user_id: int):
+    result = await async_session.execute(
+        select(RevocationOutbox.token_version).where(RevocationOutbox.user_id == user_id)
+    )
+    return list(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_reset_succeeds_and_relay_announces_when_redis_fails(async_session: AsyncSession, user: User):
+    user_id, email = user.id, user.email
+    with announcement_redis(side_effect=redis.ConnectionError("down")):
+        response = await reset_password(user.reset_token, "new-password", async_session)
+
+    assert response == {"message": "Password has been reset"}
+    assert await pending(async_session, user_id) == [1]
+
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    await client.set(f"refresh_token:{email}", "old")
+    relay = RevocationRelay(async_sessionmaker(async_session.bind, expire_on_commit=False))
+    with announcement_redis(return_value=client):
+        assert await relay.run_once() == 1
+
+    assert await client.zrange(settings.token_revocation_log_key, 0, -1) == [f"{user_id}:1"]
+    assert not await client.exists(f"refresh_token:{email}")
+    assert await pending(async_session, user_id) == []
+    assert relay.metrics()["announced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reset_announces_immediately_when_redis_is_up(async_session: AsyncSession, user: User):
+    user_id = user.id
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    with announcement_redis(return_value=client):
+        await reset_password(user.reset_token, "new-password", async_session)
+
+    assert await client.zrange(settings.token_revocation_log_key, 0, -1) == [f"{user_id}:1"]
+    assert await pending(async_session, user_id) == []
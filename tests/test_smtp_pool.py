@@ -0,0 +1,113 @@
+import asyncio
+from email.message import EmailMessage
+
+import aiosmtplib
+import pytest
+import pytest_asyncio
+
+from src.services.smtp_pool import SMTPPool
+from tests.smtp_sink import SMTPSink
+
+
+@pytest_asyncio.fixture
+async def sink():
+    sink = await SMTPSink().start()
+    yield sink
+    await sink.stop()
+
+
+def make_pool(sink, **kwargs):
+    def client_factory():
+        return aiosmtplib.SMTP(
+            hostname="127.0.0.1", port=sink.port, username="u", password="p", start_tls=False
+        )
+
+    return SMTPPool(client_factory, **kwargs)
+
+
+def make_message(i=0):
+    message = EmailMessage()
+    message["From"] = "noreply@example.com"
+    message["To"] = f"user{i}@example.com"
+    message["Subject"] = f"Message {i}"
+    message.set_content("Hello")
+    return message
+
+
+@pytest.mark.asyncio
+async def test_sends_reuse_one_session(sink):
+    pool = make_pool(sink)
+    for i in range(3):
+        await pool.send(make_message(i))
+    await pool.send_many([make_message(3), make_message(4)])
+
+    assert len(sink.messages) == 5
+    assert sink.connections == 1
+    metrics = pool.metrics()
+    assert metrics["connects"] == 1
+    assert metrics["reused"] == 4
+    assert metrics["sent"] == 5
+    assert metrics["idle"] == 1
+    await pool.close()
+    assert pool.metrics()["open"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sends_are_bounded_by_size(sink):
+    pool = make_pool(sink, size=2)
+    await asyncio.gather(*(pool.send(make_message(i)) for i in range(10)))
+
+    assert len(sink.messages) == 10
+    assert sink.connections <= 2
+    assert pool.metrics()["open"] <= 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_session_recycled_after_max_messages(sink):
+    pool = make_pool(sink, max_messages=2)
+    for i in range(5):
+        await pool.send(make_message(i))
+
+    assert sink.connections == 3
+    assert pool.metrics()["open"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_dropped_session_is_reconnected(sink):
+    pool = make_pool(sink)
+    await pool.send(make_message(0))
+    sink.drop_connections()
+
+    await pool.send(make_message(1))
+
+    assert len(sink.messages) == 2
+    assert sink.connections == 2
+    assert pool.metrics()["reconnects"] == 1
+    assert pool.metrics()["open"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_rejected_message_keeps_session(sink):
+    pool = make_pool(sink)
+    sink.fail_next = 1
+    with pytest.raises(aiosmtplib.SMTPResponseException):
+        await pool.send(make_message(0))
+    await pool.send(make_message(1))
+
+    assert len(sink.messages) == 1
+    assert sink.connections == 1
+    assert pool.metrics()["failed"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_server_raises(sink):
+    await sink.stop()
+    pool = make_pool(sink)
+
+    with pytest.raises(aiosmtplib.SMTPConnectError):
+        await pool.send(make_message())
+    assert pool.metrics()["open"] == 0
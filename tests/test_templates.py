@@ -44,4 +44,41 @@ class TestTemplates:
             mock_template_response.assert_called_once_with("test_template.html", {"request": mock_request, "title": "Test Title", "content": "Test Content"})
             
             # Проверяем, что метод вернул ожидаемый объект
-            assert response == mock_response 
\ No newline at end of file
+            assert response == mock_response
+
+    def test_single_shared_environment(self):
+        """Тест: HTML-страницы и письма используют одно окружение Jinja"""
+        from src.api.auth import templates as auth_templates
+        from src.services.templates import env
+
+        assert auth_templates is templates
+        assert templates.env is env
+        assert env.bytecode_cache is not None
+
+    def test_precompile_templates(self):
+        """Тест предварительной компиляции всех шаблонов"""
+        from src.services.templates import precompile_templates
+
+        names = precompile_templates()
+
+        assert "reset_password.html" in names
+        assert "email/verify_email.txt" in names
+        assert "email/reset_password.html" in names
+
+    def test_bytecode_cache_written(self, tmp_path):
+        """Тест записи скомпилированных шаблонов в кэш байткода"""
+        from src.services.templates import create_environment
+
+        create_environment(str(tmp_path)).get_template("email/verify_email.html")
+
+        assert any(tmp_path.iterdir())
+
+    def test_render_email_text_and_html(self):
+        """Тест рендеринга текстовой и HTML-версии письма"""
+        from src.services.templates import render_email
+
+        text, html = render_email("reset_password", reset_link="https://app.example.com/r?a=1&b=2")
+
+        assert "https://app.example.com/r?a=1&b=2" in text
+        # В HTML-версии ссылка экранируется
+        assert 'href="https://app.example.com/r?a=1&amp;b=2"' in html
@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.services.token_revocation import TokenRevocations
+
+
+def make_revocations():
+    return TokenRevocations(channel="revoked", log_key="revocations", window=900)
+
+
+def test_only_older_versions_are_stale():
+    revocations = make_revocations()
+    assert not revocations.is_stale(1, 0)
+
+    revocations._on_message("1:2")
+    revocations._on_message("1:1")
+
+    assert revocations.is_stale(1, 1)
+    assert not revocations.is_stale(1, 2)
+    assert not revocations.is_stale(2, 0)
+    assert revocations.metrics()["stale_tokens"] == 1
+
+
+@pytest.mark.asyncio
+async def test_revoke_records_logs_and_publishes():
+    revocations = make_revocations()
+    mock_redis = AsyncMock()
+
+    with patch("src.services.token_revocation.get_redis", return_value=mock_redis):
+        await revocations.revoke(7, 3)
+
+    assert revocations.is_stale(7, 2)
+    mock_redis.zadd.assert_awaited_once()
+    assert list(mock_redis.zadd.call_args.args[1]) == ["7:3"]
+    mock_redis.zremrangebyscore.assert_awaited_once()
+    mock_redis.publish.assert_awaited_once_with("revoked", "7:3")
+
+
+@pytest.mark.asyncio
+async def test_replay_restores_recent_revocations():
+    revocations = make_revocations()
+    mock_redis = AsyncMock()
+    mock_redis.zrangebyscore.return_value = [b"5:1", "6:4"]
+
+    await revocations._replay(mock_redis)
+
+    assert revocations.is_stale(5, 0)
+    assert revocations.is_stale(6, 3)
@@ -0,0 +1,172 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis
+import pytest
+
+from src.services.user_cache import UserCache, user_cache_key
+from src.utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePubSub:
+    """Minimal stand-in for redis.asyncio PubSub fed from a queue"""
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.subscribe = AsyncMock()
+        self.aclose = AsyncMock()
+
+    async def listen(self):
+        yield {"type": "subscribe", "data": 1}
+        while True:
+            yield await self.queue.get()
+
+
+def make_user(**overrides):
+    fields = dict(id=1, email="user@example.com", username="user", avatar=None, role="user")
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def make_cache():
+    return UserCache(local_size=2, local_ttl=30, redis_ttl=3600, channel="invalidate")
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    clock.now = 5
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_local_tier_skips_redis():
+    cache = make_cache()
+    mock_redis = AsyncMock()
+    mock_redis.get.return_value = json.dumps({"id": 1, "email": "user@example.com"})
+
+    with patch("src.services.user_cache.get_redis", return_value=mock_redis):
+        first = await cache.get("user@example.com")
+        second = await cache.get("user@example.com")
+
+    assert first == second
+    mock_redis.get.assert_awaited_once_with(user_cache_key("user@example.com"))
+    metrics = cache.metrics()
+    assert metrics["local"]["hits"] == 1
+    assert metrics["redis_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_miss_in_both_tiers():
+    cache = make_cache()
+    mock_redis = AsyncMock()
+    mock_redis.get.return_value = None
+
+    with patch("src.services.user_cache.get_redis", return_value=mock_redis):
+        assert await cache.get("user@example.com") is None
+
+    assert cache.metrics()["redis_misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_set_writes_both_tiers_with_ttl():
+    cache = make_cache()
+    mock_redis = AsyncMock()
+
+    with patch("src.services.user_cache.get_redis", return_value=mock_redis):
+        await cache.set(make_user())
+
+    mock_redis.set.assert_awaited_once()
+    assert mock_redis.set.call_args.kwargs["ex"] == 3600
+    assert cache.local.get("user@example.com")["role"] == "user"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_and_publishes():
+    cache = make_cache()
+    mock_redis = AsyncMock()
+
+    with patch("src.services.user_cache.get_redis", return_value=mock_redis):
+        await cache.set(make_user())
+        await cache.invalidate("user@example.com")
+
+    assert cache.local.get("user@example.com") is None
+    mock_redis.delete.assert_awaited_once_with(user_cache_key("user@example.com"))
+    mock_redis.publish.assert_awaited_once_with("invalidate", "user@example.com")
+
+
+@pytest.mark.asyncio
+async def test_listener_drops_entries_published_by_other_workers():
+    cache = make_cache()
+    queue = asyncio.Queue()
+    pubsub = FakePubSub(queue)
+    mock_redis = MagicMock()
+    mock_redis.pubsub.return_value = pubsub
+
+    with patch("src.services.user_cache.get_redis", AsyncMock(return_value=mock_redis)):
+        listener = asyncio.create_task(cache.listen())
+        await asyncio.sleep(0)
+        cache.local.set("user@example.com", {"id": 1})
+        cache.local.set("other@example.com", {"id": 2})
+
+        await queue.put({"type": "message", "data": "user@example.com"})
+        for _ in range(5):
+            await asyncio.sleep(0)
+        listener.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await listener
+
+    pubsub.subscribe.assert_awaited_once_with("invalidate")
+    pubsub.aclose.assert_awaited_once()
+    assert cache.local.get("user@example.com") is None
+    assert cache.local.get("other@example.com") == {"id": 2}
+    assert cache.metrics()["invalidations_received"] == 1
+
+
+@pytest.mark.asyncio
+async def test_write_back_after_invalidation_is_skipped():
+    cache = make_cache()
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    with patch("src.services.user_cache.get_redis", AsyncMock(return_value=redis)):
+        # A request reads the user, then the role changes before it writes back
+        generation = await cache.generation("user@example.com")
+        await cache.invalidate("user@example.com")
+        await cache.set(make_user(role="admin"), generation)
+
+        assert await redis.get(user_cache_key("user@example.com")) is None
+        assert cache.local.get("user@example.com") is None
+        assert cache.metrics()["stale_writes_skipped"] == 1
+
+        # A request that read the user after the invalidation may cache it
+        await cache.set(make_user(role="user"), await cache.generation("user@example.com"))
+        assert json.loads(await redis.get(user_cache_key("user@example.com")))["role"] == "user"
+        assert cache.local.get("user@example.com")["role"] == "user"
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
 import datetime
@@ -5,7 +6,9 @@ from datetime import date, datetime, timedelta
 
 from src.auth.hashing import pwd_context, verify_password, hash_password
 from src.auth.jwt_utils import create_access_token, create_refresh_token
-from src.utils.datetime_utils import convert_birthday, get_upcoming_birthdays, days_to_birthday, format_date
+from src.utils.datetime_utils import convert_birthday, get_upcoming_birthdays, days_to_birthday, format_date, birthday_window_ranges
+from src.utils.datetime_utils import days_to_birthday_batch, upcoming_birthdays_mask
+from src.utils.etag import collection_etag, contact_etag, if_match_versions, none_match
 
 
 def test_verify_password():
@@ -135,4 +138,71 @@ class TestDatetimeUtils:
         assert format_date(test_date, "%B %d, %Y") == "June 15, 2023"
         
         # Форматирование None
-        assert format_date(None) == "" 
\ No newline at end of file
+        assert format_date(None) == "" 
+
+def test_birthday_window_ranges():
+    # Сегодня и ещё days дней
+    assert birthday_window_ranges(date(2023, 5, 10), 0) == [(510, 510)]
+    assert birthday_window_ranges(date(2023, 5, 10), 7) == [(510, 517)]
+
+    # Окно через новый год - два диапазона
+    assert birthday_window_ranges(date(2023, 12, 30), 3) == [(1230, 1231), (101, 102)]
+
+    # В невисокосный год 29 февраля отмечается 28-го
+    assert birthday_window_ranges(date(2023, 2, 27), 1) == [(227, 229)]
+    assert birthday_window_ranges(date(2024, 2, 27), 1) == [(227, 228)]
+
+    # Окно длиной в год покрывает все ключи
+    assert birthday_window_ranges(date(2024, 3, 1), 366) == [(101, 1231)]
+
+
+def test_days_to_birthday_leap_day():
+    # 29 февраля не должно падать в невисокосный год
+    with patch("src.utils.datetime_utils.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 2, 1)
+        assert days_to_birthday(date(2000, 2, 29)) == 27
+
+
+def test_days_to_birthday_batch():
+    birthdays = ["1990-01-01", "1985-12-31", "2000-02-29", "1970-06-15"]
+    today = date(2023, 12, 31)
+
+    result = days_to_birthday_batch(birthdays, today)
+    assert result.tolist() == [1, 0, 60, 167]
+
+    # Результат совпадает со скалярной версией
+    with patch("src.utils.datetime_utils.date", wraps=date) as mock_date:
+        mock_date.today.return_value = today
+        expected = [days_to_birthday(convert_birthday(b)) for b in birthdays]
+    assert result.tolist() == expected
+
+    # Массив datetime64 принимается напрямую
+    as_datetime64 = np.array(birthdays, dtype="datetime64[D]")
+    assert days_to_birthday_batch(as_datetime64, today).tolist() == expected
+
+
+def test_upcoming_birthdays_mask():
+    birthdays = ["1990-01-01", "1985-12-31", "2000-02-29", "1970-06-15"]
+    mask = upcoming_birthdays_mask(birthdays, days=7, today=date(2023, 12, 31))
+    assert mask.tolist() == [True, True, False, False]
+
+
+def test_none_match_uses_weak_comparison():
+    etag = contact_etag(5, 3)
+
+    assert none_match(etag, etag)
+    assert none_match(f'"other", W/{etag}', etag)
+    assert none_match("*", etag)
+    assert not none_match(contact_etag(5, 2), etag)
+    assert not none_match(collection_etag(5, 3), etag)
+    assert not none_match(None, etag)
+
+
+def test_if_match_versions():
+    assert if_match_versions(None, 5) is None
+    assert if_match_versions("*", 5) is None
+    assert if_match_versions(f"{contact_etag(5, 3)}, {contact_etag(5, 4)}", 5) == {3, 4}
+    # Weak tags and tags of other contacts never match
+    assert if_match_versions(f"W/{contact_etag(5, 3)}, {contact_etag(6, 3)}", 5) == set()
+    assert if_match_versions('"garbage"', 5) == set()
+    assert if_match_versions('"c5.²", "c5.٣"', 5) == set()